@@ -0,0 +1,179 @@
+from __future__ import absolute_import, unicode_literals
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+import itertools
+import timeit
+
+
+__all__ = ('Benchmark', 'SkipBenchmark', 'get_cases', 'median',
+           'median_interval', 'params', 'run_benchmark', 'self_timed')
+
+
+class Benchmark(object):
+    """Base class for a set of benchmarks, analogous to
+    `unittest.TestCase`.
+
+    Each method whose name begins with `bench_` is a benchmark.  It is
+    called once per combination of its parameters (see `params`), and
+    performs any preparation that should not be timed before returning
+    a callable, which is what gets timed.
+    """
+    # The models whose tables the benchmarks in this class use.  Their
+    # rows are deleted before each benchmark.
+    models = ()
+
+    # The percentage by which the benchmarks in this class must slow down
+    # to be considered a regression, for benchmarks which are noisier
+    # than most; None to use the threshold given to `compare`.
+    threshold = None
+
+    def setUp(self):
+        for model in reversed(self.models):
+            model.objects.all().delete()
+
+    def tearDown(self):
+        pass
+
+
+class SkipBenchmark(Exception):
+    """Exception raised by a benchmark method which can not be run in the
+    current environment.
+    """
+
+
+def params(**kwargs):
+    """Decorate a benchmark method, so that it is run once for every
+    combination of the given values of its keyword arguments.
+    """
+    def decorator(method):
+        method.params = kwargs
+        return method
+    return decorator
+
+
+def self_timed(func):
+    """Decorate the callable returned by a benchmark method, to say that
+    it times itself: it is called once per timing, and returns the time
+    taken in seconds, so that work it does around what it measures (such
+    as starting a process) is not included.
+    """
+    func.self_timed = True
+    return func
+
+
+def get_cases(benchmark_class):
+    """Yield a three-tuple of the name, method name and keyword arguments
+    of every case of every benchmark in the given class.
+    """
+    for attr in sorted(dir(benchmark_class)):
+        if not attr.startswith('bench_'):
+            continue
+        base_name = attr[len('bench_'):]
+        param_values = getattr(getattr(benchmark_class, attr), 'params', {})
+
+        # Expand the parameters into every combination of their values.
+        keys = sorted(param_values.keys())
+        for values in itertools.product(*[param_values[k] for k in keys]):
+            kwargs = dict(zip(keys, values))
+            name = base_name
+            if kwargs:
+                name = '%s[%s]' % (base_name, ','.join(
+                    ['%s=%s' % (k, kwargs[k]) for k in keys],
+                ))
+            yield name, attr, kwargs
+
+
+def run_benchmark(benchmark, method_name, kwargs, repeat=5, min_time=0.1):
+    """Run a single case of a benchmark, and return a dictionary of
+    its results.
+
+    The callable returned by the benchmark method is called enough times
+    (`number`) that each of the `repeat` timings takes at least `min_time`
+    seconds.  If it times itself (see `self_timed`), it is called until
+    there are at least `repeat` timings, which together take at least
+    `repeat * min_time` seconds (but no more than `5 * repeat` timings
+    are taken).  The results give the time taken by a
+    single call, in seconds, for each timing, along with their median and
+    minimum, the number of database queries a single call performs, and
+    the benchmark's regression threshold.
+    """
+    benchmark.setUp()
+    try:
+        func = getattr(benchmark, method_name)(**kwargs)
+
+        # Call the function once, both to count its queries and so that
+        # any first-call costs are not timed.
+        with CaptureQueriesContext(connection) as context:
+            func()
+        queries = len(context.captured_queries)
+
+        # If the function times itself, take its own timings; otherwise,
+        # determine how many calls are needed per timing, and take them.
+        number = 1
+        if getattr(func, 'self_timed', False):
+            times = []
+            while len(times) < repeat or (sum(times) < repeat * min_time
+                                          and len(times) < repeat * 5):
+                times.append(func())
+        else:
+            timer = timeit.Timer(func)
+            while timer.timeit(number) < min_time:
+                number *= 2
+            times = [t / number for t in timer.repeat(repeat, number)]
+    finally:
+        benchmark.tearDown()
+
+    # Done; return the answer.
+    return {
+        'min': min(times),
+        'median': median(times),
+        'number': number,
+        'queries': queries,
+        'threshold': benchmark.threshold,
+        'times': times,
+    }
+
+
+def median(values):
+    """Return the median of the given values."""
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def median_interval(values, confidence=0.95):
+    """Return a two-tuple of the bounds of a confidence interval for the
+    median of the population the given values are sampled from.
+
+    The bounds are order statistics of the values, chosen using the
+    binomial distribution, so no assumption is made about the shape of
+    the population.  With too few values for the requested confidence,
+    the bounds are the minimum and maximum.
+    """
+    values = sorted(values)
+    count = len(values)
+    tail = (1 - confidence) / 2.0
+
+    # Find the widest exclusion of values from each end which keeps the
+    # probability of the median lying outside the interval within
+    # the tail.
+    rank = 1
+    while rank < (count + 1) // 2 and _binomial_cdf(rank, count) <= tail:
+        rank += 1
+
+    # Done; return the answer.
+    return values[rank - 1], values[count - rank]
+
+
+def _binomial_cdf(k, n):
+    """Return the probability of at most `k` successes in `n` trials,
+    each with a probability of one half.
+    """
+    answer = 0
+    coefficient = 1
+    for i in range(0, k + 1):
+        answer += coefficient
+        coefficient = coefficient * (n - i) // (i + 1)
+    return answer / 2.0 ** n
@@ -0,0 +1,86 @@
+from __future__ import absolute_import, unicode_literals
+from benchmarks.base import Benchmark, params
+from django.test.client import RequestFactory
+from tests import models as test_models
+from tests.views import ChildViewSet, GrandchildViewSet, NormalViewSet
+
+
+# The number of objects in each collection.
+ROWS = 20
+
+
+class EndpointBenchmarks(Benchmark):
+    """Benchmarks of complete requests to list and retrieve endpoints,
+    including rendering.  Their query counts are the number of queries
+    each endpoint performs.
+    """
+    models = (test_models.NormalModel, test_models.ChildModel,
+              test_models.GrandchildModel)
+
+    # Whole requests vary a good deal from one run to the next; any
+    # change in their query counts is still a regression.
+    threshold = 75.0
+
+    def setUp(self):
+        super(EndpointBenchmarks, self).setUp()
+        self.rf = RequestFactory()
+
+        # Create a normal object with a collection of child objects, the
+        # first of which has a collection of grandchild objects.
+        test_models.NormalModel.objects.bulk_create([
+            test_models.NormalModel(foo=i, bar=i, baz=i, bacon=i)
+            for i in range(0, ROWS)
+        ])
+        self.normal = test_models.NormalModel.objects.order_by('pk')[0]
+        test_models.ChildModel.objects.bulk_create([
+            test_models.ChildModel(normal=self.normal)
+            for i in range(0, ROWS)
+        ])
+        self.child = test_models.ChildModel.objects.order_by('pk')[0]
+        test_models.GrandchildModel.objects.bulk_create([
+            test_models.GrandchildModel(child=self.child)
+            for i in range(0, ROWS)
+        ])
+        self.grandchild = test_models.GrandchildModel.objects.order_by(
+            'pk',
+        )[0]
+
+    @params(action=('list', 'retrieve'))
+    def bench_normal(self, action):
+        """Request a top-level endpoint."""
+        return self._get_request(NormalViewSet, action, '/normal/',
+                                 self.normal)
+
+    @params(action=('list', 'retrieve'))
+    def bench_child(self, action):
+        """Request an endpoint nested one level deep."""
+        return self._get_request(ChildViewSet, action,
+            '/normal/%d/child/' % self.normal.pk,
+            self.child,
+            normal__pk=self.normal.pk,
+        )
+
+    @params(action=('list', 'retrieve'))
+    def bench_grandchild(self, action):
+        """Request an endpoint nested two levels deep."""
+        return self._get_request(GrandchildViewSet, action,
+            '/normal/%d/child/%d/grandchild/' % (self.normal.pk,
+                                                 self.child.pk),
+            self.grandchild,
+            child__normal__pk=self.normal.pk,
+            child__pk=self.child.pk,
+        )
+
+    def _get_request(self, viewset, action, path, obj, **kwargs):
+        """Return a callable which requests the given action of the
+        given viewset, and renders the response.
+        """
+        view = viewset.as_view({'get': action})
+        if action == 'retrieve':
+            path = '%s%d/' % (path, obj.pk)
+            kwargs['pk'] = obj.pk
+
+        def run():
+            request = self.rf.get(path, HTTP_ACCEPT='application/json')
+            return view(request, **kwargs).render()
+        return run
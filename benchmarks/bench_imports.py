@@ -0,0 +1,49 @@
+from __future__ import absolute_import, unicode_literals
+from benchmarks.base import Benchmark, params, self_timed
+import os
+import subprocess
+import sys
+
+
+# The script which times an import in a fresh interpreter.  Django, and
+# the parts of REST Framework which any API uses, are imported first and
+# not timed, so that the timing is of what DRF Toolbox itself adds.
+IMPORT_SCRIPT = '''
+from django.conf import settings
+from importlib import import_module
+from timeit import default_timer
+import sys
+settings.configure()
+import django.db.models, django.http
+import rest_framework.serializers, rest_framework.views
+module_name, name = sys.argv[1].rsplit('.', 1)
+started = default_timer()
+getattr(import_module(module_name), name)
+sys.stdout.write('%r' % (default_timer() - started))
+'''
+
+
+class ImportBenchmarks(Benchmark):
+    """Benchmarks of importing DRF Toolbox, as each process serving an
+    API does when it starts.
+    """
+    # Imports depend on the filesystem and on what the interpreter
+    # happens to do at start-up, so their timings vary more than most.
+    threshold = 50.0
+    @params(target=(
+        'drf_toolbox.renderers.JSONRenderer',
+        'drf_toolbox.routers.Router',
+        'drf_toolbox.serializers.ModelSerializer',
+        'drf_toolbox.viewsets.ModelViewSet',
+    ))
+    def bench_import(self, target):
+        """Import the module providing the given name, and look the name
+        up, in a fresh interpreter.
+        """
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        args = [sys.executable, '-c', IMPORT_SCRIPT, target]
+
+        @self_timed
+        def run():
+            return float(subprocess.check_output(args, env=env))
+        return run
@@ -0,0 +1,27 @@
+from __future__ import absolute_import, unicode_literals
+from benchmarks.base import Benchmark, params
+from datetime import datetime, timedelta
+from drf_toolbox.renderers import JSONRenderer
+
+
+class RendererBenchmarks(Benchmark):
+    """Benchmarks of rendering API output."""
+    @params(rows=(10, 100, 1000))
+    def bench_json_timestamps(self, rows):
+        """Render a list of objects which each carry several
+        timestamps, as audit records tend to.
+        """
+        start = datetime(2014, 1, 1)
+        data = [{
+            'id': i,
+            'created': start + timedelta(minutes=i),
+            'modified': start + timedelta(minutes=i, seconds=30),
+            'published': start + timedelta(hours=i),
+            'history': [start + timedelta(days=j) for j in range(0, 5)],
+            'title': 'Item %d' % i,
+        } for i in range(0, rows)]
+        renderer = JSONRenderer()
+
+        def run():
+            return renderer.render(data, 'application/json', {})
+        return run
@@ -0,0 +1,74 @@
+from __future__ import absolute_import, unicode_literals
+from benchmarks.base import Benchmark, params
+from django.core.urlresolvers import RegexURLResolver
+from drf_toolbox.routers import Router
+from tests.views import NormalViewSet
+
+
+# The number of viewsets registered side by side in a wide registry, and
+# the number nested within one another in a deep registry.
+WIDE_SIZE = 50
+DEEP_SIZE = 6
+
+
+class RouterBenchmarks(Benchmark):
+    """Benchmarks of building and using a router's URL patterns."""
+    def setUp(self):
+        super(RouterBenchmarks, self).setUp()
+        self.viewsets = [
+            type(str('Resource%dViewSet' % i), (NormalViewSet,), {})
+            for i in range(0, max(WIDE_SIZE, DEEP_SIZE))
+        ]
+
+    @params(shape=('deep', 'wide'))
+    def bench_build(self, shape):
+        """Register every viewset in a registry, and build its
+        URL patterns.
+        """
+        def run():
+            return self._create_router(shape).get_urls()
+        return run
+
+    @params(shape=('deep', 'wide'))
+    def bench_resolve(self, shape):
+        """Resolve the detail URL of the last viewset in a registry."""
+        resolver = self._create_resolver(shape)
+        path = self._get_path(shape)
+
+        def run():
+            return resolver.resolve(path)
+        return run
+
+    @params(shape=('deep', 'wide'))
+    def bench_reverse(self, shape):
+        """Build the detail URL of the last viewset in a registry."""
+        resolver = self._create_resolver(shape)
+        match = resolver.resolve(self._get_path(shape))
+
+        def run():
+            return resolver.reverse(match.url_name, **match.kwargs)
+        return run
+
+    def _create_resolver(self, shape):
+        return RegexURLResolver(r'^/', self._create_router(shape).get_urls())
+
+    def _create_router(self, shape):
+        """Return a router with a wide or deep registry of viewsets."""
+        router = Router()
+        if shape == 'wide':
+            for i in range(0, WIDE_SIZE):
+                router.register('resource%d' % i, self.viewsets[i],
+                                base_name='resource%d' % i)
+        else:
+            for i in range(0, DEEP_SIZE):
+                prefix = '/'.join(['resource%d' % j for j in range(0, i + 1)])
+                router.register(prefix, self.viewsets[i],
+                                base_name='resource%d' % i)
+        return router
+
+    def _get_path(self, shape):
+        """Return the detail URL of the last viewset in a registry."""
+        if shape == 'wide':
+            return '/resource%d/1/' % (WIDE_SIZE - 1)
+        return ''.join(['/resource%d/%d' % (i, i + 1)
+                        for i in range(0, DEEP_SIZE)]) + '/'
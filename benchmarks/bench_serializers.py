@@ -0,0 +1,99 @@
+from __future__ import absolute_import, unicode_literals
+from benchmarks.base import Benchmark, SkipBenchmark, params
+from django.test.client import RequestFactory
+from drf_toolbox.compat import django_pgfields_installed
+from drf_toolbox.serializers import ModelSerializer, RelatedField
+from tests import models as test_models
+import uuid
+
+
+class SerializerBenchmarks(Benchmark):
+    """Benchmarks of serializing and deserializing model objects."""
+    models = (test_models.NormalModel, test_models.ChildModel,
+              test_models.GrandchildModel)
+
+    def setUp(self):
+        super(SerializerBenchmarks, self).setUp()
+        self.context = {'request': RequestFactory().get('/grandchild/')}
+
+    @params(depth=(0, 1), rows=(10, 100, 1000))
+    def bench_list(self, depth, rows):
+        """Serialize a list of grandchild objects, with their child and
+        normal objects nested within them.
+        """
+        self._create_grandchildren(rows)
+
+        class Serializer(ModelSerializer):
+            class Meta:
+                model = test_models.GrandchildModel
+        Serializer.Meta.depth = depth
+
+        def run():
+            queryset = test_models.GrandchildModel.objects.all()
+            return Serializer(queryset, many=True, context=self.context).data
+        return run
+
+    @params(lookup=('pk', 'unique'), rows=(10, 100))
+    def bench_related_from_native(self, lookup, rows):
+        """Resolve a batch of related objects from their primary keys,
+        or from dictionaries of unique field values.
+        """
+        normals = self._create_normals(rows)
+        field = RelatedField((),
+            queryset=test_models.NormalModel.objects.all(),
+        )
+        if lookup == 'pk':
+            values = [normal.pk for normal in normals]
+        else:
+            values = [{'bacon': normal.bacon, 'foo': 0} for normal in normals]
+
+        def run():
+            return [field.from_native(value) for value in values]
+        return run
+
+    @params(rows=(10, 100, 1000))
+    def bench_pgfields_list(self, rows):
+        """Serialize a list of unsaved objects with UUID, array, JSON and
+        composite fields.
+        """
+        if not django_pgfields_installed:
+            raise SkipBenchmark('django-pgfields is not installed.')
+
+        class Serializer(ModelSerializer):
+            class Meta:
+                model = test_models.PGFieldsModel
+
+        coords_class = test_models.CoordsField.instance_class
+        size_class = test_models.SizeField.instance_class
+        objects = [test_models.PGFieldsModel(
+            id=uuid.uuid4(),
+            uuid=uuid.uuid4(),
+            array=[i, i + 1, i + 2],
+            extra={'index': i, 'tags': ['foo', 'bar']},
+            coords=coords_class(x=i, y=-i),
+            size=size_class(width=i, height=i * 2),
+        ) for i in range(0, rows)]
+
+        def run():
+            return Serializer(objects, many=True, context=self.context).data
+        return run
+
+    def _create_normals(self, rows):
+        test_models.NormalModel.objects.bulk_create([
+            test_models.NormalModel(foo=i, bar=i, baz=i, bacon=i)
+            for i in range(0, rows)
+        ])
+        return list(test_models.NormalModel.objects.order_by('pk'))
+
+    def _create_grandchildren(self, rows):
+        """Create the given number of grandchild objects, each with its
+        own child and normal objects.
+        """
+        normals = self._create_normals(rows)
+        test_models.ChildModel.objects.bulk_create([
+            test_models.ChildModel(normal=normal) for normal in normals
+        ])
+        test_models.GrandchildModel.objects.bulk_create([
+            test_models.GrandchildModel(child=child)
+            for child in test_models.ChildModel.objects.order_by('pk')
+        ])
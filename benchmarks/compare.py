@@ -0,0 +1,80 @@
+from __future__ import absolute_import, unicode_literals
+from benchmarks.base import median, median_interval
+
+
+__all__ = ('compare',)
+
+
+def compare(baseline, current, threshold=25.0, confidence=0.95,
+            pattern=''):
+    """Compare the current benchmark results against the baseline results,
+    and return a two-tuple of lists of messages: regressions, which should
+    fail the run, and notes, which should not.
+
+    A benchmark's timing has regressed when its median is more than
+    `threshold` percent (or the benchmark's own threshold, if it has one)
+    above the baseline median, and the confidence intervals of the two
+    medians do not overlap; either alone is too easily caused by noise.
+    A benchmark's query count has regressed whenever it differs from the
+    baseline at all.
+
+    Benchmarks in the baseline whose names contain `pattern` (that is,
+    which should have been run), but which are not in the current
+    results, have also regressed: they can no longer be checked.
+    """
+    regressions = []
+    notes = []
+
+    # Sanity check: Timings from a different environment are not
+    # comparable with these; say so.
+    same_environment = (baseline.get('environment') ==
+                        current.get('environment'))
+    if not same_environment:
+        notes.append('The baseline was recorded in a different environment '
+                     '(%s); timings may not be comparable.' % ', '.join([
+            '%s=%s' % (key, value) for key, value in
+            sorted(baseline.get('environment', {}).items())
+        ]))
+
+    # Any benchmark which should have been run, but was not, can not be
+    # checked.  In a different environment, some benchmarks are expected
+    # to be skipped, so that is only noted.
+    base_results = baseline['benchmarks']
+    for name in sorted(base_results):
+        if pattern in name and name not in current['benchmarks']:
+            message = '%s: in the baseline, but not run.' % name
+            if same_environment:
+                regressions.append(message)
+            else:
+                notes.append(message)
+
+    # Compare each benchmark present in both sets of results.
+    for name, result in sorted(current['benchmarks'].items()):
+        if name not in base_results:
+            notes.append('%s: not in the baseline.' % name)
+            continue
+        base_result = base_results[name]
+
+        # Any change in the number of queries is a regression.
+        if result['queries'] != base_result['queries']:
+            regressions.append('%s: %d queries, expected %d.' % (
+                name, result['queries'], base_result['queries'],
+            ))
+
+        # Determine whether the timing is meaningfully slower.
+        base_median = median(base_result['times'])
+        current_median = median(result['times'])
+        change = (current_median / base_median - 1) * 100
+        _, base_high = median_interval(base_result['times'], confidence)
+        current_low, _ = median_interval(result['times'], confidence)
+        limit = result.get('threshold')
+        if limit is None:
+            limit = threshold
+        if change > limit and current_low > base_high:
+            regressions.append('%s: %.3g ms, %.1f%% slower than the '
+                               'baseline (%.3g ms).' % (
+                name, current_median * 1000, change, base_median * 1000,
+            ))
+
+    # Done; return the answer.
+    return regressions, notes
@@ -0,0 +1,181 @@
+from __future__ import absolute_import, unicode_literals
+from django.conf import settings
+from importlib import import_module
+import argparse
+import inspect
+import json
+import os
+import platform
+import sys
+
+
+# Ensure that the drf-toolbox directory is part of our Python path.
+APP_ROOT = os.path.realpath(os.path.dirname(__file__) + '/../')
+sys.path.insert(0, APP_ROOT)
+
+
+# Configure basic settings.  These match the test settings.
+settings.configure(
+    ALLOWED_HOSTS=['testserver'],
+    DATABASES={
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+    },
+    REST_FRAMEWORK={
+        'DEFAULT_MODEL_SERIALIZER_CLASS':
+            'drf_toolbox.serializers.ModelSerializer',
+        'DEFAULT_RENDERER_CLASSES': (
+            'drf_toolbox.renderers.JSONRenderer',
+        ),
+    },
+)
+
+
+def get_environment():
+    """Return a dictionary describing the environment the benchmarks are
+    being run in, so that results can be compared like for like.
+    """
+    import django
+    import rest_framework
+    from drf_toolbox.compat import django_pgfields_installed
+    return {
+        'django': django.get_version(),
+        'django_pgfields': django_pgfields_installed,
+        'python': platform.python_version(),
+        'python_implementation': platform.python_implementation(),
+        'rest_framework': rest_framework.VERSION,
+    }
+
+
+def get_modules():
+    """Return the benchmark modules, in order."""
+    directory = os.path.realpath(os.path.dirname(__file__))
+    return [import_module('benchmarks.%s' % filename[:-3])
+            for filename in sorted(os.listdir(directory))
+            if filename.startswith('bench_') and filename.endswith('.py')]
+
+
+def run(pattern='', repeat=5, min_time=0.1, stream=sys.stderr):
+    """Run every benchmark whose name contains the given pattern, and
+    return a dictionary of the results, keyed by benchmark name.
+    """
+    from benchmarks.base import Benchmark, SkipBenchmark, get_cases
+    from benchmarks.base import run_benchmark
+    from tests import models as test_models
+    from tests.database import create_tables
+
+    # Create the tables that the benchmarks need.
+    create_tables([test_models.NormalModel, test_models.ChildModel,
+                   test_models.GrandchildModel, test_models.RelatedModel])
+
+    # Run each benchmark case in turn.
+    answer = {}
+    for module in get_modules():
+        prefix = module.__name__.split('.')[-1][len('bench_'):]
+        for _, benchmark_class in inspect.getmembers(module, inspect.isclass):
+            if not issubclass(benchmark_class, Benchmark) or \
+                            benchmark_class.__module__ != module.__name__:
+                continue
+            benchmark = benchmark_class()
+            for name, method_name, kwargs in get_cases(benchmark_class):
+                name = '%s.%s' % (prefix, name)
+                if pattern not in name:
+                    continue
+                stream.write('%s ... ' % name)
+                stream.flush()
+                try:
+                    answer[name] = run_benchmark(benchmark, method_name,
+                        kwargs,
+                        min_time=min_time,
+                        repeat=repeat,
+                    )
+                except SkipBenchmark as ex:
+                    stream.write('skipped: %s\n' % ex)
+                    continue
+                stream.write('%.3g ms\n' % (answer[name]['median'] * 1000))
+    return answer
+
+
+def run_with_baseline(baseline_file, results, threshold=25.0,
+                      confidence=0.95, pattern='', stream=sys.stderr):
+    """Compare the given results, of the benchmarks whose names contain
+    the given pattern, with those in the given baseline file, report any
+    differences to the stream, and return True if nothing has regressed,
+    False otherwise.
+    """
+    from benchmarks.compare import compare
+
+    with open(baseline_file, 'r') as f:
+        baseline = json.load(f)
+    regressions, notes = compare(baseline, results,
+        confidence=confidence,
+        pattern=pattern,
+        threshold=threshold,
+    )
+    for note in notes:
+        stream.write('Note: %s\n' % note)
+    for regression in regressions:
+        stream.write('Regression: %s\n' % regression)
+    return not regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run the DRF Toolbox benchmarks, and write the '
+                    'results as JSON.',
+    )
+    parser.add_argument('-k', dest='pattern', default='',
+                        help='Only run benchmarks whose names contain '
+                             'this string.')
+    parser.add_argument('-o', '--output', default='-',
+                        help='The file to write results to (default: '
+                             'standard output).')
+    parser.add_argument('--repeat', type=int, default=10,
+                        help='The number of timings to take of each '
+                             'benchmark (default: 10).')
+    parser.add_argument('--min-time', type=float, default=0.1,
+                        help='The minimum duration of each timing, in '
+                             'seconds (default: 0.1).')
+    parser.add_argument('--baseline',
+                        help='Compare the results against the baseline '
+                             'results in this file, and exit with a '
+                             'non-zero status if any have regressed.')
+    parser.add_argument('--threshold', type=float, default=25.0,
+                        help='The percentage by which a median timing '
+                             'must exceed the baseline to be considered '
+                             'a regression, for benchmarks which do not '
+                             'set their own (default: 25).')
+    parser.add_argument('--confidence', type=float, default=0.95,
+                        help='The confidence level of the intervals '
+                             'around each median (default: 0.95).')
+    args = parser.parse_args(argv)
+
+    # Run the benchmarks.
+    results = {
+        'benchmarks': run(args.pattern, repeat=args.repeat,
+                          min_time=args.min_time),
+        'environment': get_environment(),
+    }
+
+    # Write out the results.
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output == '-':
+        sys.stdout.write(output + '\n')
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+    # If we were given a baseline, compare the results against it.
+    if args.baseline:
+        if not run_with_baseline(args.baseline, results,
+                                 confidence=args.confidence,
+                                 pattern=args.pattern,
+                                 threshold=args.threshold):
+            sys.exit(1)
+
+
+# Actually run the benchmarks.
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+from __future__ import absolute_import, unicode_literals
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import signals
+from django.http import HttpResponse
+from importlib import import_module
+import hashlib
+import threading
+import time
+
+
+__all__ = ('LocalBus', 'add_dependency', 'get_ancestors', 'get_bus',
+           'get_cached_response', 'get_generations', 'get_response_cache_key',
+           'invalidate', 'set_cached_response', 'watch')
+
+
+_ancestors = {}
+_bus = None
+_lock = threading.Lock()
+_watched = set()
+
+
+class LocalBus(object):
+    """An invalidation bus which delivers messages to subscribers within
+    this process, immediately.
+
+    Other buses (for instance, to deliver messages to every process in a
+    deployment) may be used by setting `DRF_TOOLBOX_INVALIDATION_BUS` to
+    the dot path of a class which provides the same two methods.
+    """
+    def __init__(self):
+        self.subscribers = []
+
+    def publish(self, labels):
+        """Deliver the given list of model labels ("app_label.ModelName")
+        to every subscriber.
+        """
+        for callback in list(self.subscribers):
+            callback(labels)
+
+    def subscribe(self, callback):
+        """Call the given callable with the list of model labels in every
+        message subsequently published.
+        """
+        self.subscribers.append(callback)
+
+
+def add_dependency(model, ancestor):
+    """Record that representations of the given ancestor model include
+    the given model (for instance, because the ancestor's viewset has the
+    model's viewset nested beneath it), so changes to the model must also
+    invalidate the ancestor.
+    """
+    with _lock:
+        _ancestors.setdefault(_get_model_label(model), set()).add(
+            _get_model_label(ancestor),
+        )
+    watch(model)
+
+
+def get_ancestors(model):
+    """Return a sorted list of the labels of every model whose
+    representations include the given model, directly or indirectly.
+    """
+    answer = set()
+    pending = [_get_model_label(model)]
+    while pending:
+        for label in _ancestors.get(pending.pop(), ()):
+            if label not in answer:
+                answer.add(label)
+                pending.append(label)
+    answer.discard(_get_model_label(model))
+    return sorted(answer)
+
+
+def get_bus():
+    """Return the invalidation bus in use, creating it if necessary."""
+    global _bus
+    with _lock:
+        if _bus is None:
+            path = getattr(settings, 'DRF_TOOLBOX_INVALIDATION_BUS',
+                           'drf_toolbox.cache.LocalBus')
+            module_name, class_name = path.rsplit('.', 1)
+            _bus = getattr(import_module(module_name), class_name)()
+            _bus.subscribe(_bump_generations)
+        return _bus
+
+
+def get_cached_response(key):
+    """Return the response stored under the given key, or None if there
+    is no such response.
+    """
+    stored = cache.get(key)
+    if stored is None:
+        return None
+
+    # Rebuild the response from its rendered content.
+    status, content, headers = stored
+    response = HttpResponse(content, status=status)
+    for header, value in headers:
+        response[header] = value
+    return response
+
+
+def get_generations(models):
+    """Return a tuple of the current generation of each of the given
+    models.  A model's generation changes whenever `invalidate` is called
+    for it, so keys which include it change too.
+    """
+    keys = [_get_generation_key(_get_model_label(model))
+            for model in models]
+    generations = cache.get_many(keys)
+
+    # Any models without a generation yet get one now.  Generations start
+    # from the current time, so that a generation which has been evicted
+    # from the cache is never reused.
+    for key in keys:
+        if key not in generations:
+            cache.add(key, int(time.time() * 1000000), None)
+            generations[key] = cache.get(key)
+
+    # Done; return the answer.
+    return tuple([generations[key] for key in keys])
+
+
+def get_response_cache_key(view, request, models=()):
+    """Return the key under which the response of the given view to the
+    given request is cached.
+
+    The key varies on the URL (including URL kwargs and the query string),
+    the accepted media type, the user, and the generations of the
+    given models.
+    """
+    key = repr((
+        type(view).__module__,
+        type(view).__name__,
+        request.method,
+        request.get_full_path(),
+        getattr(request, 'accepted_media_type', None),
+        getattr(request.user, 'pk', None),
+        get_generations(models),
+    ))
+    return 'drf_toolbox:response:%s' % (
+        hashlib.md5(key.encode('utf-8')).hexdigest()
+    )
+
+
+def invalidate(model):
+    """Invalidate every cached response that depends on the given model,
+    or on any model whose representations include it.
+    """
+    labels = [_get_model_label(model)] + get_ancestors(model)
+    get_bus().publish(labels)
+
+
+def set_cached_response(key, response, timeout):
+    """Store the rendered content of the given response under the given
+    key, for the given number of seconds.
+    """
+    cache.set(key, (
+        response.status_code,
+        response.content,
+        list(response.items()),
+    ), timeout)
+
+
+def watch(model):
+    """Invalidate cached responses which depend on the given model
+    whenever an instance of it is saved or deleted.
+    """
+    with _lock:
+        if model in _watched:
+            return
+        _watched.add(model)
+    for signal in (signals.post_save, signals.post_delete):
+        signal.connect(_invalidate_sender, sender=model, weak=False,
+            dispatch_uid='drf_toolbox.cache.%s' % _get_model_label(model),
+        )
+
+
+def _bump_generations(labels):
+    """Change the generation of each of the models with the given labels,
+    invalidating every cached response which depends on them.
+    """
+    for label in labels:
+        key = _get_generation_key(label)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, int(time.time() * 1000000), None)
+
+
+def _get_generation_key(label):
+    return 'drf_toolbox:generation:%s' % label
+
+
+def _get_model_label(model):
+    return '%s.%s' % (model._meta.app_label, model._meta.object_name)
+
+
+def _invalidate_sender(sender, **kwargs):
+    invalidate(sender)
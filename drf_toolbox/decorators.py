@@ -1,14 +1,79 @@
-from __future__ import unicode_literals
+from __future__ import absolute_import, unicode_literals
+from drf_toolbox import cache
+from functools import wraps
 from rest_framework.decorators import action, link
 
 
-def base_action(methods=['POST'], **kwargs):
+def base_action(methods=['POST'], cache_timeout=None, **kwargs):
     """A decorator to cause a method to be routed as a "base action" in
     Django REST Framework, meaning it doesn't expect to operate on
     a specific model instance.
+
+    If `cache_timeout` is provided, responses to GET requests are cached
+    for that many seconds; see `cache_response`.
     """
     def decorator(func):
+        if cache_timeout is not None:
+            func = cache_response(cache_timeout)(func)
         func.base_http_methods = methods
         func.kwargs = kwargs
         return func
     return decorator
+
+
+def cache_response(timeout, invalidate=True):
+    """A decorator for viewset methods (such as `list`, `retrieve`, or
+    routed actions) which caches the rendered responses to GET requests
+    for `timeout` seconds.
+
+    Cached responses vary on the URL (including its keyword arguments and
+    query string), the accepted media type, and the user.  If `invalidate`
+    is True, they are also discarded whenever an instance of the viewset's
+    model, or of any model its URL is nested under, is saved or deleted.
+
+    Those models are watched from the moment the viewset is registered
+    with a DRF Toolbox router (or, if it is registered lazily, imported);
+    viewsets used without one only watch them from their first GET
+    request.
+    """
+    def decorator(func):
+        @wraps(func)
+        def inner(self, request, *args, **kwargs):
+            # Sanity check: Only GET requests are cached.
+            if request.method not in ('GET', 'HEAD'):
+                return func(self, request, *args, **kwargs)
+
+            # Determine the models that cached responses depend on, and
+            # ensure that changes to them invalidate the cache (in case
+            # the viewset was not registered with a DRF Toolbox router).
+            models = ()
+            if invalidate:
+                if hasattr(self, 'get_cache_models'):
+                    models = self.get_cache_models()
+                elif getattr(self, 'model', None) is not None:
+                    models = (self.model,)
+                for model in models:
+                    cache.watch(model)
+
+            # If we have a cached response, return it.
+            key = cache.get_response_cache_key(self, request, models)
+            response = cache.get_cached_response(key)
+            if response is not None:
+                return response
+
+            # Get the response, rendering and caching it if successful.
+            response = func(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                response = self.finalize_response(request, response,
+                                                  *args, **kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+                if response.status_code == 200:
+                    cache.set_cached_response(key, response, timeout)
+            return response
+
+        # Let routers know that the models this method's responses depend
+        # on should be watched; see `Router.register`.
+        inner.cache_invalidate = invalidate
+        return inner
+    return decorator
@@ -0,0 +1,46 @@
+from __future__ import absolute_import, unicode_literals
+from django.core.management.base import BaseCommand, CommandError
+from django.test.client import RequestFactory
+from drf_toolbox import profiling
+from importlib import import_module
+from optparse import make_option
+
+
+class Command(BaseCommand):
+    """Serialize a sample of objects with the given serializer class,
+    and print how many calls, how much time and how many queries each
+    field took.
+    """
+    args = '<serializer>'
+    help = 'Profile the serialization of a sample queryset, field by field.'
+    option_list = BaseCommand.option_list + (
+        make_option('--limit', type='int', default=100,
+                    help='The number of objects to serialize.'),
+        make_option('--host', default='testserver',
+                    help='The host name to use when building URLs.'),
+    )
+
+    def handle(self, *args, **options):
+        # Sanity check: We need exactly one serializer.
+        if len(args) != 1:
+            raise CommandError('Provide the dot path of a serializer class.')
+
+        # Load the serializer class.
+        try:
+            module_name, class_name = args[0].rsplit('.', 1)
+            serializer_class = getattr(import_module(module_name),
+                                       class_name)
+        except (AttributeError, ImportError, ValueError):
+            raise CommandError('Could not import serializer "%s".' % args[0])
+
+        # Serialize a sample of objects, with a request to build URLs
+        # against, profiling each field.
+        model = serializer_class.Meta.model
+        queryset = model._default_manager.all()[:options['limit']]
+        request = RequestFactory().get('/', SERVER_NAME=options['host'])
+        with profiling.SerializationProfile() as profile:
+            serializer_class(queryset, many=True,
+                             context={'request': request}).data
+
+        # Report.
+        self.stdout.write(profile.get_report(), ending='')
@@ -0,0 +1,308 @@
+from __future__ import absolute_import, unicode_literals
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger
+from django.core.paginator import Paginator
+from django.db.models import Q
+from drf_toolbox.utils import json
+from rest_framework import serializers
+from rest_framework.pagination import BasePaginationSerializer
+from rest_framework.templatetags.rest_framework import replace_query_param
+import base64
+import binascii
+import six
+
+
+__all__ = ('ApproximatePage', 'ApproximatePaginator', 'CountedQuerySet',
+           'InvalidCursor', 'KeysetPage', 'KeysetPaginationSerializer',
+           'KeysetPaginator')
+
+
+class ApproximatePaginator(Paginator):
+    """A paginator for use when the number of objects is approximate,
+    such as an estimate or a cached count (see `CountedQuerySet`).
+
+    The count is only reported; which pages exist is determined by the
+    objects themselves.  Each page retrieves one more object than it
+    holds, to establish whether there is a next page, and a page beyond
+    the last object is empty regardless of the count.  Orphans are
+    not supported.
+    """
+    def validate_number(self, number):
+        """Validate the given 1-based page number, without reference to
+        the number of pages.
+        """
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        """Return an ApproximatePage for the given 1-based page number,
+        raising EmptyPage if there are no objects on it.
+        """
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+        has_next = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if not object_list and (number > 1 or
+                                not self.allow_empty_first_page):
+            raise EmptyPage('That page contains no results')
+
+        # Make the count consistent with the objects retrieved: on the
+        # last page, it is known exactly, and otherwise, it is at least
+        # the number of objects up to and including the next one.
+        if has_next:
+            self._count = max(self.count, bottom + len(object_list) + 1)
+        else:
+            self._count = bottom + len(object_list)
+        self._num_pages = None
+
+        # Done; return the page.
+        return ApproximatePage(object_list, number, self, has_next)
+
+
+class ApproximatePage(Page):
+    """A page from an ApproximatePaginator, which knows whether there
+    is a next page from the objects retrieved rather than the count.
+    """
+    def __init__(self, object_list, number, paginator, has_next):
+        super(ApproximatePage, self).__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class CountedQuerySet(object):
+    """A wrapper around a queryset, for use with Django's paginator, which
+    obtains the number of objects from the given callable rather than from
+    `queryset.count()`.
+
+    Slicing the wrapper slices the underlying queryset, so pages contain
+    ordinary querysets.
+    """
+    def __init__(self, queryset, count):
+        self.queryset = queryset
+        self._count = count
+
+    def __getitem__(self, key):
+        return self.queryset[key]
+
+    def __len__(self):
+        return self.count()
+
+    def count(self):
+        return self._count(self.queryset)
+
+
+class InvalidCursor(ValueError):
+    """Exception raised when a cursor can not be decoded."""
+
+
+class KeysetPage(object):
+    """A single page of results from a KeysetPaginator, along with the
+    cursors for the pages on either side of it.
+
+    Note: This is deliberately not iterable, as REST Framework serializers
+    would then treat it as a list of objects.
+    """
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator(object):
+    """Paginator that pages through a queryset by filtering on the values
+    of its ordering fields (a "keyset"), rather than by offset.
+
+    Each page is a single query whose cost does not depend on how far
+    into the queryset it is, so very large collections can be paged
+    through cheaply.  The last of the ordering fields must be unique;
+    the primary key is appended if it is not already present.
+    """
+    def __init__(self, queryset, per_page, ordering=('pk',)):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+
+        # Ensure that the ordering ends in a unique field, so that
+        # every object has a distinct position.
+        ordering = list(ordering)
+        if ordering[-1].lstrip('-') not in ('pk', self._pk_name):
+            ordering.append('-pk' if ordering[-1].startswith('-') else 'pk')
+        self.ordering = tuple(ordering)
+
+    def page(self, cursor=None):
+        """Return the KeysetPage identified by the given cursor, or the
+        first page if no cursor is provided.
+
+        If the cursor can not be decoded, raise InvalidCursor.
+        """
+        # Determine where this page starts, and which direction we
+        # are paging in.
+        forward, values = True, None
+        if cursor:
+            forward, values = self.decode_cursor(cursor)
+
+        # Retrieve one more object than we need, to determine whether
+        # there is another page beyond this one.
+        ordering = self.ordering
+        if not forward:
+            ordering = [self._reverse(name) for name in ordering]
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._get_keyset_q(ordering, values))
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if not forward:
+            object_list.reverse()
+
+        # Determine whether there are pages on either side of this one.
+        if forward:
+            has_next, has_previous = has_more, values is not None
+        else:
+            has_next, has_previous = True, has_more
+
+        # Determine the cursors for those pages.  If this page is empty,
+        # they are on either side of the cursor we were given.
+        next_cursor, previous_cursor = None, None
+        first = last = values
+        if object_list:
+            first = self._get_values(object_list[0])
+            last = self._get_values(object_list[-1])
+        if has_next and last is not None:
+            next_cursor = self.encode_cursor(True, last)
+        if has_previous and first is not None:
+            previous_cursor = self.encode_cursor(False, first)
+
+        # Done; return the page.
+        return KeysetPage(object_list,
+            next_cursor=next_cursor,
+            previous_cursor=previous_cursor,
+        )
+
+    def decode_cursor(self, cursor):
+        """Return a two-tuple of the direction (True for forward) and the
+        ordering field values encoded in the given cursor.
+
+        If the cursor can not be decoded, raise InvalidCursor.
+        """
+        try:
+            if isinstance(cursor, six.text_type):
+                cursor = cursor.encode('ascii')
+            padding = b'=' * (-len(cursor) % 4)
+            payload = base64.urlsafe_b64decode(cursor + padding)
+            direction, values = json.loads(payload.decode('utf-8'))
+            if direction not in ('n', 'p') or \
+                                    len(values) != len(self.ordering):
+                raise ValueError('Malformed cursor.')
+
+            # Convert each value back into the appropriate Python type.
+            values = [self._get_model_field(name).to_python(value)
+                      for name, value in zip(self.ordering, values)]
+        except (binascii.Error, TypeError, ValueError, ValidationError):
+            raise InvalidCursor('Invalid cursor.')
+        return direction == 'n', values
+
+    def encode_cursor(self, forward, values):
+        """Return an opaque cursor for the page on the given side of
+        the object with the given ordering field values.
+        """
+        payload = json.dumps(['n' if forward else 'p', values],
+                             separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode('utf-8'))
+        return cursor.rstrip(b'=').decode('ascii')
+
+    @property
+    def _pk_name(self):
+        return self.queryset.model._meta.pk.name
+
+    def _get_keyset_q(self, ordering, values):
+        """Return a Q object matching objects which come after the object
+        with the given values, in the given ordering.
+        """
+        answer = None
+        for index, name in enumerate(ordering):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            q = Q(**{'%s__%s' % (name.lstrip('-'), lookup): values[index]})
+            for prior_name, value in zip(ordering[:index], values):
+                q &= Q(**{prior_name.lstrip('-'): value})
+            answer = q if answer is None else answer | q
+        return answer
+
+    def _get_model_field(self, name):
+        name = name.lstrip('-')
+        if name == 'pk':
+            return self.queryset.model._meta.pk
+        return self.queryset.model._meta.get_field(name)
+
+    def _get_values(self, obj):
+        """Return the values of the ordering fields for the given object,
+        as they should be encoded in a cursor.
+        """
+        answer = []
+        for name in self.ordering:
+            value = getattr(obj, self._get_model_field(name).attname)
+            if not isinstance(value, (bool, float, type(None)) +
+                                     six.integer_types):
+                value = self._get_model_field(name).value_to_string(obj)
+            answer.append(value)
+        return answer
+
+    def _reverse(self, name):
+        if name.startswith('-'):
+            return name[1:]
+        return '-%s' % name
+
+
+class NextCursorField(serializers.Field):
+    """Field that returns a link to the next page in keyset-paginated
+    results.
+
+    The cursor is put in the query parameter given by `cursor_kwarg` in
+    the serializer context, or by `cursor_field` if there is none.
+    """
+    cursor_field = 'cursor'
+
+    def to_native(self, value):
+        if not value.has_next():
+            return None
+        return self._get_url(value.next_cursor)
+
+    def _get_url(self, cursor):
+        request = self.context.get('request')
+        url = request and request.build_absolute_uri() or ''
+        cursor_field = self.context.get('cursor_kwarg', self.cursor_field)
+        return replace_query_param(url, cursor_field, cursor)
+
+
+class PreviousCursorField(NextCursorField):
+    """Field that returns a link to the previous page in keyset-paginated
+    results.
+    """
+    def to_native(self, value):
+        if not value.has_previous():
+            return None
+        return self._get_url(value.previous_cursor)
+
+
+class KeysetPaginationSerializer(BasePaginationSerializer):
+    """A pagination serializer for keyset-paginated results.
+
+    Unlike the stock pagination serializer, no count is provided,
+    since counting the whole collection is exactly the expense that
+    keyset pagination avoids.
+    """
+    next = NextCursorField(source='*')
+    previous = PreviousCursorField(source='*')
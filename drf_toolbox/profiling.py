@@ -0,0 +1,105 @@
+from __future__ import absolute_import, unicode_literals
+from drf_toolbox import queries
+from timeit import default_timer
+import collections
+import threading
+
+
+__all__ = ('HEADER', 'SerializationProfile', 'get_profile')
+
+
+# The response header in which viewsets report serialization profiles.
+HEADER = 'X-Serialization-Profile'
+
+_local = threading.local()
+
+
+class SerializationProfile(object):
+    """Context manager which, while active, records the number of calls,
+    cumulative time and number of queries of every field serialized by
+    a DRF Toolbox serializer in this thread.
+
+    Fields are keyed by their path, such as "child.normal.api_endpoint"
+    for a field of a serializer nested within a related field.  Times and
+    queries include those of any fields nested within.
+    """
+    def __init__(self):
+        self.fields = collections.OrderedDict()
+        self._counter = queries.QueryCounter(sources=False)
+        self._path = []
+        self._previous = None
+
+    def __enter__(self):
+        self._counter.__enter__()
+        self._previous = getattr(_local, 'profile', None)
+        _local.profile = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.profile = self._previous
+        self._counter.__exit__(exc_type, exc_value, traceback)
+
+    def call(self, name, func, *args, **kwargs):
+        """Call the given function, recording its call, duration and
+        queries against the field with the given name, nested within
+        any field which is currently being serialized.
+        """
+        self._path.append(name)
+        path = '.'.join(self._path)
+        start, query_count = default_timer(), len(self._counter)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats = self.fields.setdefault(path, [0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += default_timer() - start
+            stats[2] += len(self._counter) - query_count
+            self._path.pop()
+
+    def get_header(self):
+        """Return a compact summary of the profile, suitable for use as
+        the value of a response header, with durations in milliseconds.
+        """
+        return ', '.join([
+            '%s;calls=%d;dur=%.1f;queries=%d' % (path, calls,
+                                                 duration * 1000, count)
+            for path, (calls, duration, count) in self.fields.items()
+        ])
+
+    def get_report(self):
+        """Return a table of the profile, one field per line, with
+        durations in milliseconds.
+        """
+        width = max([len(path) for path in self.fields] + [len('Field')])
+        row = '%%-%ds %%8s %%12s %%12s %%8s' % width
+        lines = [row % ('Field', 'Calls', 'Total (ms)', 'Each (ms)',
+                        'Queries')]
+        for path, (calls, duration, count) in self.fields.items():
+            lines.append(row % (path, calls, '%.3f' % (duration * 1000),
+                                '%.3f' % (duration * 1000 / calls), count))
+        return '\n'.join(lines) + '\n'
+
+    def instrument(self, serializer):
+        """Wrap the `field_to_native` method of each of the given
+        serializer's fields, so that calls to it are recorded by whichever
+        profile is active at the time.
+        """
+        for field in serializer.fields.values():
+            if 'field_to_native' not in field.__dict__:
+                field.field_to_native = _profiled(field.field_to_native)
+
+
+def get_profile():
+    """Return the serialization profile active in this thread, or None
+    if there is none.
+    """
+    return getattr(_local, 'profile', None)
+
+
+def _profiled(field_to_native):
+    def wrapper(obj, field_name):
+        profile = get_profile()
+        if profile is None:
+            return field_to_native(obj, field_name)
+        return profile.call(field_name, field_to_native, obj, field_name)
+    return wrapper
@@ -0,0 +1,184 @@
+from __future__ import absolute_import, unicode_literals
+from django.conf import settings
+from django.db import connections
+from django.db.backends import util
+from rest_framework import serializers
+from timeit import default_timer
+import collections
+import logging
+import sys
+
+
+__all__ = ('QueryBudgetExceeded', 'QueryCounter', 'describe_queries',
+           'enforce_budget')
+
+
+logger = logging.getLogger('drf_toolbox.queries')
+
+
+class QueryBudgetExceeded(Exception):
+    """Exception raised when a request performs more queries than its
+    budget allows.
+    """
+
+
+class QueryCounter(object):
+    """Context manager which records every query performed on the given
+    database connections (every connection by default) while it is
+    active.
+
+    Each query is recorded as a two-tuple of its SQL and a description of
+    the serializer field which caused it (such as
+    "ChildSerializer.normal (RelatedField)"), or None if it was not
+    caused by a serializer field or `sources` is False.  The total time
+    spent executing queries, in seconds, is kept as `duration`.
+    """
+    def __init__(self, using=None, sources=True):
+        self.using = using
+        self.sources = sources
+        self.duration = 0.0
+        self.queries = []
+        self._saved = []
+
+    def __enter__(self):
+        if self.using is None:
+            targets = connections.all()
+        else:
+            targets = [connections[alias] for alias in self.using]
+
+        # Have each connection wrap its cursors in cursors that record
+        # to this counter.  The previous cursor factory is kept, so that
+        # `connection.queries` is still kept when in debug mode, and so
+        # that counters may be nested.
+        for connection in targets:
+            self._saved.append((
+                connection,
+                connection.use_debug_cursor,
+                connection.__dict__.get('make_debug_cursor'),
+            ))
+            connection.make_debug_cursor = self._get_cursor_factory(
+                connection,
+            )
+            connection.use_debug_cursor = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for connection, use_debug_cursor, factory in reversed(self._saved):
+            connection.use_debug_cursor = use_debug_cursor
+            if factory is None:
+                del connection.make_debug_cursor
+            else:
+                connection.make_debug_cursor = factory
+        self._saved = []
+
+    def __len__(self):
+        return len(self.queries)
+
+    def record(self, sql, duration=0.0):
+        """Record that the given SQL has been executed, taking the given
+        number of seconds.
+        """
+        self.duration += duration
+        self.queries.append((sql, _get_source() if self.sources else None))
+
+    def _get_cursor_factory(self, connection):
+        """Return a callable that wraps a database cursor for the given
+        connection in a cursor that records to this counter.
+        """
+        debug = connection.use_debug_cursor or (
+            connection.use_debug_cursor is None and settings.DEBUG
+        )
+        make_debug_cursor = connection.make_debug_cursor
+
+        def factory(cursor):
+            if debug:
+                cursor = make_debug_cursor(cursor)
+            else:
+                cursor = util.CursorWrapper(cursor, connection)
+            return _RecordingCursorWrapper(cursor, self)
+        return factory
+
+
+class _RecordingCursorWrapper(object):
+    """Database cursor wrapper which records each query it executes
+    to a QueryCounter.
+    """
+    def __init__(self, cursor, counter):
+        self.cursor = cursor
+        self.counter = counter
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def execute(self, sql, params=None):
+        start = default_timer()
+        try:
+            return self.cursor.execute(sql, params)
+        finally:
+            self.counter.record(sql, default_timer() - start)
+
+    def executemany(self, sql, param_list):
+        start = default_timer()
+        try:
+            return self.cursor.executemany(sql, param_list)
+        finally:
+            self.counter.record(sql, default_timer() - start)
+
+
+def describe_queries(queries):
+    """Return a description of what caused the given recorded queries,
+    such as "3 from ChildSerializer.normal (RelatedField)".
+    """
+    sources = collections.OrderedDict()
+    for sql, source in queries:
+        source = source or 'outside of serialization'
+        sources[source] = sources.get(source, 0) + 1
+    return ', '.join(['%d from %s' % (count, source)
+                      for source, count in sources.items()])
+
+
+def enforce_budget(counter, budget, name, mode=None):
+    """Log a warning, or raise QueryBudgetExceeded if `mode` is "raise",
+    if the given counter has recorded more queries than the budget allows.
+
+    The message names the serializer field which caused each query
+    beyond the budget.  If no mode is given, the
+    `DRF_TOOLBOX_QUERY_BUDGET_MODE` setting is used, defaulting to "log".
+    """
+    # Sanity check: If we are within budget, there is nothing to do.
+    if len(counter) <= budget:
+        return
+
+    # Determine what caused each query beyond the budget.
+    message = '%s performed %d queries, exceeding its budget of %d. ' \
+              'Excess queries: %s.' % (
+        name, len(counter), budget, describe_queries(counter.queries[budget:]),
+    )
+
+    # Complain.
+    if mode is None:
+        mode = getattr(settings, 'DRF_TOOLBOX_QUERY_BUDGET_MODE', 'log')
+    if mode == 'raise':
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+def _get_source():
+    """Return a description of the innermost serializer field which is
+    currently being serialized, or None if there is no such field.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_code.co_name == 'field_to_native':
+            field = frame.f_locals.get('self')
+            if isinstance(field, serializers.Field):
+                return '%s.%s (%s)' % (
+                    type(getattr(field, 'parent', None)).__name__,
+                    frame.f_locals.get('field_name'),
+                    type(field).__name__,
+                )
+        frame = frame.f_back
+    return None
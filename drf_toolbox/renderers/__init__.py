@@ -1,3 +1,12 @@
 from __future__ import absolute_import, unicode_literals
-from .json import JSONRenderer, JSONPRenderer
-from .api import APIRenderer
+from drf_toolbox.utils import lazy
+
+
+# The renderers are imported when they are first used, so that using
+# the JSON renderers does not import the browsable API renderer, and
+# importing a single renderer module does not import them all.
+lazy.install(__name__, exports={
+    'APIRenderer': 'drf_toolbox.renderers.api',
+    'JSONPRenderer': 'drf_toolbox.renderers.json',
+    'JSONRenderer': 'drf_toolbox.renderers.json',
+})
@@ -2,11 +2,12 @@ from __future__ import absolute_import, unicode_literals
 from django import forms
 from django.conf import settings
 from django.template import loader, RequestContext
+from drf_toolbox.timing import RenderTimingMixin
 from rest_framework.renderers import BrowsableAPIRenderer, HTMLFormRenderer
 import collections
 
 
-class APIRenderer(BrowsableAPIRenderer):
+class APIRenderer(RenderTimingMixin, BrowsableAPIRenderer):
     """BrowsableAPIRenderer subclass that adds the settings.VERSION
     to the context, if it's present.
     """
@@ -1,5 +1,8 @@
 from __future__ import absolute_import, unicode_literals
 from copy import copy
+from django.core.exceptions import ImproperlyConfigured
+from django.http import Http404
+from drf_toolbox import cache
 from drf_toolbox.compat import models
 from drf_toolbox.serializers import ModelSerializer
 from importlib import import_module
@@ -8,12 +11,120 @@ from rest_framework.compat import url
 from rest_framework.settings import api_settings
 import re
 import six
+import uuid
 
 
 base_regex = re.compile(r'[^/.]')
 integer_regex = re.compile(r'[0-9]+')
 uuid_regex = re.compile(r'[0-9a-f-]{36}')
 
+# The regex and converter for each type of lookup value.
+lookup_types = {
+    'int': (integer_regex, int),
+    'uuid': (uuid_regex, uuid.UUID),
+}
+
+
+class _NotSuper(object):
+    """A class that definitely will not be a superclass of whatever we
+    might get on our isinstance checks.
+
+    This gets around the fact that we can't guarantee that
+    models.UUIDField will exist, since django-pgfields might not
+    be installed.
+    """
+
+
+class LazyViewSet(object):
+    """A stand-in for a viewset registered by dot path with a lazy router,
+    which is not imported until a request is first dispatched to it or
+    another viewset of the same router (or until it is warmed up).
+
+    Routes are generated from the information given here instead: the
+    base name, the lookup field, and the type of its values ("int",
+    "uuid" or None).  Once imported, the viewset is checked against it.
+    Any other attribute is taken from the viewset, importing it if
+    necessary.
+    """
+    kwarg_converters = None
+
+    def __init__(self, path, base_name, lookup_field='pk', lookup_type=None):
+        self.path = path
+        self.base_name = base_name
+        self.lookup_field = lookup_field
+        self.lookup_type = lookup_type
+        self._callbacks = []
+        self._viewset = None
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __repr__(self):
+        return '<LazyViewSet: %s>' % self.path
+
+    def as_view(self, actions, **initkwargs):
+        """Return a view which imports the viewset when first called,
+        then dispatches to it as `as_view` on the viewset would.
+        """
+        views = []
+
+        def view(request, *args, **kwargs):
+            if not views:
+                views.append(self._get_view(actions, initkwargs))
+            return views[0](request, *args, **kwargs)
+
+        # Like DRF's views, leave CSRF checks to the view's authentication.
+        view.csrf_exempt = True
+        return view
+
+    def resolve(self):
+        """Import and return the viewset, calling any callbacks waiting
+        for it the first time.
+        """
+        if self._viewset is None:
+            module_name, class_name = self.path.rsplit('.', 1)
+            self._viewset = getattr(import_module(module_name), class_name)
+
+            # If a callback fails (for instance, because the viewset does
+            # not match its routes), fail again next time.
+            try:
+                for callback in list(self._callbacks):
+                    callback(self._viewset)
+            except Exception:
+                self._viewset = None
+                raise
+            self._callbacks = []
+        return self._viewset
+
+    def when_resolved(self, callback):
+        """Call the given callback with the viewset once it has been
+        imported, or now if it already has been.
+        """
+        if self._viewset is None:
+            self._callbacks.append(callback)
+        else:
+            callback(self._viewset)
+
+    def _get_view(self, actions, initkwargs):
+        """Return the view for the given actions of the viewset.
+
+        The actions and initkwargs are those of every route, so any the
+        viewset does not support are left out, as the router would have
+        done had it imported the viewset.
+        """
+        viewset = self.resolve()
+        actions = dict([(method, action) for method, action in actions.items()
+                        if hasattr(viewset, action)])
+        if not actions:
+            def view(request, *args, **kwargs):
+                raise Http404
+            return view
+        initkwargs = dict([(key, value) for key, value in initkwargs.items()
+                           if key == 'suffix' or hasattr(viewset, key)])
+        return viewset.as_view(actions, **initkwargs)
+
 
 class Router(routers.DefaultRouter):
     """DefaultRouter subclass that is slightly smarter about precisely
@@ -21,6 +132,11 @@ class Router(routers.DefaultRouter):
     """
     def __init__(self, parent=None, parent_prefix=None,
                        *args, **kwargs):
+        # If this router is lazy, viewsets registered by dot path are not
+        # imported until they are needed; see `LazyViewSet`.  Child
+        # routers are lazy if their parent is.
+        self.lazy = kwargs.pop('lazy', getattr(parent, 'lazy', False))
+
         if not parent:
             ModelSerializer._router = self
         super(Router, self).__init__(*args, **kwargs)
@@ -89,34 +205,53 @@ class Router(routers.DefaultRouter):
         # and let the chips fall where they may.
         return super(Router, self).get_default_base_name(viewset)
 
+    def get_lookup_converter(self, viewset, lookup_prefix=''):
+        """Return a two-tuple of the lookup kwarg for the given viewset
+        and a callable that converts its captured value from the URL to
+        a native value, or None if no conversion is possible.
+        """
+        lookup_field = self._get_lookup_field(viewset, lookup_prefix)
+        lookup_type = self._get_lookup_type(viewset, lookup_field)
+        if lookup_type is None:
+            return None
+        return lookup_field, lookup_types[lookup_type][1]
+
+    def get_lookup_converters(self, recursive_prefix=''):
+        """Return a dictionary mapping the lookup kwargs captured from
+        the URLs of this router's ancestors to callables that convert them
+        to native values.
+        """
+        # If this router is not a child of another router, there are no
+        # ancestral lookups.
+        if not self.parent:
+            return {}
+
+        # Get the converters for the parent's lookup, and its ancestors'.
+        lookup_prefix = self._get_lookup_prefix(recursive_prefix)
+        answer = self.parent.get_lookup_converters(lookup_prefix)
+        converter = self.parent.get_lookup_converter(self.parent_viewset,
+            lookup_prefix=lookup_prefix,
+        )
+        if converter:
+            answer[converter[0]] = converter[1]
+
+        # Done; return the answer.
+        return answer
+
     def get_lookup_regex(self, viewset, lookup_prefix=''):
         """Return a regular expression that correctly checks
         for a UUID as a PK value.
         """
-        # Create a class that definitely will not be a superclass
-        # of whatever we might get on our isinstance check later.
-        #
-        # This gets around the fact that we can't guarantee that
-        # models.UUIDField will exist, since django-pgfields might not
-        # be installed.
-        class NotSuper(object):
-            pass
-
         # Determine the appropriate lookup field.
-        lookup_field = getattr(viewset, 'lookup_field', 'pk')
-        if lookup_prefix:
-            lookup_field = '%s__%s' % (lookup_prefix, lookup_field)
+        lookup_field = self._get_lookup_field(viewset, lookup_prefix)
 
         # Determine the appropriate regex.
         lookup_fragment = base_regex.pattern
-        model = getattr(viewset, 'model', None)
-        if model and (lookup_field == 'pk' or lookup_field.endswith('__pk')):
-            pk_field = viewset.model._meta.pk
-            if isinstance(pk_field, models.AutoField):
-                lookup_fragment = integer_regex.pattern
-            if isinstance(pk_field, getattr(models, 'UUIDField', NotSuper)):
-                lookup_fragment = uuid_regex.pattern
-        if hasattr(viewset, 'lookup_regex'):
+        lookup_type = self._get_lookup_type(viewset, lookup_field)
+        if lookup_type:
+            lookup_fragment = lookup_types[lookup_type][0].pattern
+        if not isinstance(viewset, LazyViewSet) and \
+                                        hasattr(viewset, 'lookup_regex'):
             lookup_fragment = viewset.lookup_regex
 
         # Generate the regex to return.
@@ -137,11 +272,7 @@ class Router(routers.DefaultRouter):
         # We need to determine the appropriate singular noun of the parent,
         # because we need to replace `pk` with `noun__pk` in the regex
         # to avoid duplicating the backreference name.
-        lookup_prefix = getattr(self.parent_viewset, 'base_name',
-            self.get_default_base_name(self.parent_viewset),
-        )
-        if recursive_prefix:
-            lookup_prefix = '%s__%s' % (recursive_prefix, lookup_prefix)
+        lookup_prefix = self._get_lookup_prefix(recursive_prefix)
 
         # This router is the child of another router; that means
         # that it must be prefixed with the detail route from the
@@ -167,6 +298,17 @@ class Router(routers.DefaultRouter):
             ))
         return answer
 
+    def get_method_map(self, viewset, method_map):
+        """Return a mapping of HTTP methods to the actions of the given
+        viewset in the given mapping which the viewset implements.
+
+        Which actions a lazy viewset implements can not be known without
+        importing it, so all of them are returned; see `LazyViewSet`.
+        """
+        if isinstance(viewset, LazyViewSet):
+            return dict(method_map)
+        return super(Router, self).get_method_map(viewset, method_map)
+
     def get_routes(self, viewset):
         """Return a list of routers.Route namedtuples that correspond
         to the routes for the given viewset.
@@ -207,6 +349,18 @@ class Router(routers.DefaultRouter):
             # Append the route to the answer.
             answer.append(route)
 
+        # If the viewset knows how to convert the kwargs captured from the
+        # URL, tell it how to do so.
+        if hasattr(viewset, 'kwarg_converters'):
+            converters = self.get_lookup_converters()
+            converter = self.get_lookup_converter(viewset)
+            if converter:
+                converters[converter[0]] = converter[1]
+            for i, route in enumerate(answer):
+                initkwargs = copy(route.initkwargs)
+                initkwargs['kwarg_converters'] = converters
+                answer[i] = route._replace(initkwargs=initkwargs)
+
         # Done!
         return answer
 
@@ -253,13 +407,19 @@ class Router(routers.DefaultRouter):
                 return viewset
         raise KeyError('No prefix `%s` has been registered.' % needle)
 
-    def register(self, prefix, viewset, base_name=None):
+    def register(self, prefix, viewset, base_name=None, **lazy_kwargs):
         """Register a viewset to this router, at the given URL prefix,
         and with the given base name if one is provided.
+
+        If this router is lazy and the viewset is given as a dot path,
+        the base name is required, and the `lookup_field` and
+        `lookup_type` of the viewset may be given; see `LazyViewSet`.
         """
         # The viewset may be specified as a string rather than
-        # a ViewSet object; resolve it into an object.
-        viewset = self._resolve_viewset(viewset)
+        # a ViewSet object; resolve it into an object, or into a stand-in
+        # for the object if this router is lazy.
+        viewset = self._resolve_viewset(viewset, base_name=base_name,
+                                        **lazy_kwargs)
 
         # The prefix may be specified in a nested format.  If so, parse
         # it out and register and return a child router.
@@ -280,26 +440,236 @@ class Router(routers.DefaultRouter):
             # Take the penultimate router, and find the viewset that is
             # the direct parent of this one.
             parent_viewset = routers[-2].get_viewset_by_prefix(penult_prefix)
-            if not hasattr(parent_viewset, 'children'):
-                parent_viewset.children = {}
-            parent_viewset.children[final_prefix] = viewset
+            _when_resolved(parent_viewset, lambda parent_viewset:
+                _add_child(parent_viewset, final_prefix, viewset),
+            )
 
             # Perform this registration against the child router.
             return routers[-1].register(final_prefix, viewset,
                                         base_name=base_name)
 
         # Perform standard registration.
-        return super(Router, self).register(prefix, viewset, base_name)
+        answer = super(Router, self).register(prefix, viewset, base_name)
+
+        # If this viewset is nested beneath another, the parent's output
+        # includes this viewset's objects, so changes to them must also
+        # invalidate the parent's cached responses.
+        if self.parent_viewset:
+            _when_resolved(viewset, lambda viewset:
+                _when_resolved(self.parent_viewset, lambda parent_viewset:
+                    self._add_dependency(viewset, parent_viewset),
+                ),
+            )
 
-    def _resolve_viewset(self, viewset):
+        # If any of the viewset's responses are cached, changes to its
+        # objects (or to those of the viewsets it is nested beneath) must
+        # invalidate them from now on, not only from the first request
+        # which is cached.
+        _when_resolved(viewset, self._watch_cache_models)
+
+        # Once a lazy viewset has been imported, make sure that the routes
+        # generated for it are the routes it needs.  Then import the rest,
+        # as the relationships between them (and so which cached responses
+        # changes must invalidate) are only known once they all are.
+        if isinstance(viewset, LazyViewSet):
+            viewset.when_resolved(lambda resolved:
+                self._check_lazy_viewset(viewset, resolved),
+            )
+            viewset.when_resolved(lambda resolved:
+                self._get_root().resolve_viewsets(),
+            )
+
+        # Done; return the answer.
+        return answer
+
+    def resolve_viewsets(self):
+        """Import every viewset registered lazily with this router or its
+        children.
+        """
+        for prefix, viewset, base_name in self.registry:
+            if isinstance(viewset, LazyViewSet):
+                viewset.resolve()
+        for prefix, child in sorted(self.children.items()):
+            child.resolve_viewsets()
+
+    def _add_dependency(self, viewset, parent_viewset):
+        """Record that changes to the given viewset's objects must also
+        invalidate the cached responses of the given parent viewset.
+        """
+        model = self._get_model(viewset)
+        parent_model = self._get_model(parent_viewset)
+        if model and parent_model:
+            cache.add_dependency(model, parent_model)
+
+    def _watch_cache_models(self, viewset):
+        """If the given viewset has methods whose cached responses are
+        invalidated by changes (see `cache_response`), watch its model and
+        the models of every viewset it is nested beneath.
+        """
+        # Sanity check: If no responses are cached, or none are
+        # invalidated, there is nothing to watch.
+        if not any([getattr(getattr(viewset, name, None), 'cache_invalidate',
+                            False) for name in dir(viewset)]):
+            return
+
+        # Watch the viewset's own model, and those of its ancestors once
+        # each of them has been imported.
+        viewsets = [viewset]
+        router = self
+        while router.parent:
+            viewsets.append(router.parent_viewset)
+            router = router.parent
+        for viewset in viewsets:
+            _when_resolved(viewset, self._watch_model)
+
+    def _watch_model(self, viewset):
+        """Watch the model of the given viewset, if it has one."""
+        model = self._get_model(viewset)
+        if model is not None:
+            cache.watch(model)
+
+    def _check_lazy_viewset(self, lazy_viewset, viewset):
+        """Raise ImproperlyConfigured if the routes generated for the
+        given lazy viewset, from what it was told when it was registered,
+        differ from those the imported viewset needs.
+        """
+        # Lookups must be captured, and converted, in the same way.
+        lookup_field = self._get_lookup_field(viewset)
+        if lookup_field != lazy_viewset.lookup_field or \
+                self.get_lookup_regex(viewset) != \
+                self.get_lookup_regex(lazy_viewset):
+            raise ImproperlyConfigured(
+                '%s was registered with lookup field `%s` and lookup type '
+                '`%s`, which do not match the viewset.' % (
+                lazy_viewset.path, lazy_viewset.lookup_field,
+                lazy_viewset.lookup_type,
+            ))
+
+        # If the viewset is the parent of a child router, its base name
+        # is part of the lookup kwargs of its children, and must match.
+        if any([child.parent_viewset is lazy_viewset
+                for child in self.children.values()]):
+            base_name = getattr(viewset, 'base_name', None) or \
+                        self.get_default_base_name(viewset)
+            if base_name != lazy_viewset.base_name:
+                raise ImproperlyConfigured(
+                    '%s was registered with base name `%s`, but its child '
+                    'routes require `%s`.' % (
+                    lazy_viewset.path, lazy_viewset.base_name, base_name,
+                ))
+
+        # Routes added by decorators can not be known without importing
+        # the viewset.
+        names = set([route.name for route in self.routes])
+        extra = [route for route in self.get_routes(viewset)
+                 if route.name not in names]
+        if extra:
+            raise ImproperlyConfigured(
+                '%s has routes added by decorators (%s), which requires '
+                'registering it with a router which is not lazy.' % (
+                lazy_viewset.path, ', '.join(sorted([
+                    action for route in extra
+                    for action in route.mapping.values()
+                ])),
+            ))
+
+    def _get_model(self, viewset):
+        """Return the model of the given viewset's objects, or None if it
+        can not be determined.
+        """
+        model = getattr(viewset, 'model', None)
+        if model is None:
+            model = getattr(getattr(viewset, 'queryset', None), 'model', None)
+        if model is None:
+            meta = getattr(getattr(viewset, 'serializer_class', None),
+                           'Meta', None)
+            model = getattr(meta, 'model', None)
+        return model
+
+    def _get_lookup_field(self, viewset, lookup_prefix=''):
+        """Return the name of the kwarg that the given viewset's lookup
+        is captured as, prefixed by `lookup_prefix` if one is provided.
+        """
+        lookup_field = getattr(viewset, 'lookup_field', 'pk')
+        if lookup_prefix:
+            lookup_field = '%s__%s' % (lookup_prefix, lookup_field)
+        return lookup_field
+
+    def _get_lookup_pk_field(self, viewset, lookup_field):
+        """Return the primary key field of the viewset's model if the
+        given lookup field corresponds to it, None otherwise.
+        """
+        model = getattr(viewset, 'model', None)
+        if model and (lookup_field == 'pk' or lookup_field.endswith('__pk')):
+            return model._meta.pk
+        return None
+
+    def _get_lookup_prefix(self, recursive_prefix=''):
+        """Return the prefix used for the parent viewset's lookup kwarg
+        in this router's URLs.
+        """
+        lookup_prefix = getattr(self.parent_viewset, 'base_name', None)
+        if lookup_prefix is None:
+            lookup_prefix = self.get_default_base_name(self.parent_viewset)
+        if recursive_prefix:
+            lookup_prefix = '%s__%s' % (recursive_prefix, lookup_prefix)
+        return lookup_prefix
+
+    def _get_root(self):
+        """Return the router which this router is a descendent of, or this
+        router if it is not a child of another.
+        """
+        router = self
+        while router.parent:
+            router = router.parent
+        return router
+
+    def _get_lookup_type(self, viewset, lookup_field):
+        """Return the type of the values of the given lookup field of the
+        given viewset: "int" or "uuid" if it is the primary key and that
+        is an integer or a UUID, None otherwise.
+        """
+        if isinstance(viewset, LazyViewSet):
+            return viewset.lookup_type
+
+        # Sanity check: If the viewset provides its own lookup regex,
+        # we can not know what it captures.
+        if hasattr(viewset, 'lookup_regex'):
+            return None
+
+        # Determine the type from the primary key field.
+        pk_field = self._get_lookup_pk_field(viewset, lookup_field)
+        if isinstance(pk_field, getattr(models, 'UUIDField', _NotSuper)):
+            return 'uuid'
+        if isinstance(pk_field, models.AutoField):
+            return 'int'
+        return None
+
+    def _resolve_viewset(self, viewset, base_name=None, **lazy_kwargs):
         """If a viewset has been provided as a dot-path in a string, return
         the corresponding object.
+
+        If this router is lazy, return a `LazyViewSet` instead, which
+        imports the object only when it is needed.
         """
         # Sanity check: If we got a bytes string (an easy mistake to make
         # in Python 2), convert it to a text string.
         if isinstance(viewset, six.binary_type):
             viewset = viewset.decode('utf-8')
 
+        # If this router is lazy, do not import the viewset yet.
+        if isinstance(viewset, six.text_type) and self.lazy:
+            if not base_name:
+                raise ValueError('A base name is required to register %s '
+                                 'with a lazy router.' % viewset)
+            return LazyViewSet(viewset, base_name, **lazy_kwargs)
+
+        # Sanity check: Lookup details are only needed for lazy viewsets.
+        if lazy_kwargs:
+            raise TypeError('`%s` may only be given when registering a '
+                            'viewset with a lazy router.' %
+                            '`, `'.join(sorted(lazy_kwargs.keys())))
+
         # If we got a text string, resolve the viewset and get the actual
         # class.
         if isinstance(viewset, six.text_type):
@@ -313,3 +683,22 @@ class Router(routers.DefaultRouter):
             # Return the class.
             return getattr(module, class_name)
         return viewset
+
+
+def _add_child(parent_viewset, prefix, viewset):
+    """Record the given viewset as the child of the given parent viewset,
+    at the given prefix.
+    """
+    if not hasattr(parent_viewset, 'children'):
+        parent_viewset.children = {}
+    parent_viewset.children[prefix] = viewset
+
+
+def _when_resolved(viewset, callback):
+    """Call the given callback with the given viewset once it has been
+    imported, if it is a `LazyViewSet`, or now otherwise.
+    """
+    if isinstance(viewset, LazyViewSet):
+        viewset.when_resolved(callback)
+    else:
+        callback(viewset)
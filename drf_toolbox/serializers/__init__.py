@@ -1,4 +1,13 @@
 from __future__ import absolute_import, unicode_literals
-from rest_framework.serializers import *
-from drf_toolbox.serializers.base import *
-from drf_toolbox.serializers.fields import *
+from drf_toolbox.utils import lazy
+
+
+# This package provides everything that REST Framework's serializers
+# module does, along with DRF Toolbox's serializers and fields.  They are
+# imported when they are first used, so that importing a single module
+# within this package (such as a field module) does not import them all.
+lazy.install(__name__, fallbacks=(
+    'rest_framework.serializers',
+    'drf_toolbox.serializers.base',
+    'drf_toolbox.serializers.fields',
+))
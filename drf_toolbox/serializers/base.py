@@ -4,6 +4,7 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.urlresolvers import NoReverseMatch
 from django.db.models.fields import FieldDoesNotExist
+from drf_toolbox import profiling
 from drf_toolbox.compat import models, django_pgfields_installed
 from drf_toolbox.serializers.fields import api, postgres, related
 from importlib import import_module
@@ -70,11 +71,16 @@ class BaseModelSerializer(serializers.ModelSerializer):
 
         # If this field is a JSONField, then use the simple JSONField
         # serialization class.
+        #
+        # The model field's JSON text is passed through untouched if the
+        # field is listed in the serializer's `Meta.raw_json_fields`.
         if isinstance(model_field, models.JSONField):
             return postgres.JSONField(
                 default={},
                 help_text=model_field.help_text,
                 label=model_field.verbose_name,
+                raw=model_field.name in getattr(self.Meta,
+                                                'raw_json_fields', ()),
                 read_only=not model_field.editable,
                 required=not model_field.blank,
             )
@@ -95,6 +101,83 @@ class BaseModelSerializer(serializers.ModelSerializer):
         # Okay, this isn't a special field; run the superclass implementation.
         return super(BaseModelSerializer, self).get_field(model_field)
 
+    def to_native(self, obj):
+        """Serialize the given object into primitives.
+
+        If serialization is being profiled, have the profile record each
+        of this serializer's fields.
+        """
+        profile = profiling.get_profile()
+        if profile is not None:
+            profile.instrument(self)
+        return super(BaseModelSerializer, self).to_native(obj)
+
+    def get_raw_json_fields(self):
+        """Return a dictionary of JSON model fields for which this serializer
+        passes the JSON text through untouched, mapping each field name to
+        the attribute name under which the text is expected.
+        """
+        # If django-pgfields is not installed, there are no such fields.
+        if not django_pgfields_installed:
+            return {}
+
+        # Determine which of our fields want raw JSON.
+        answer = {}
+        for field_name, field in self.fields.items():
+            if not isinstance(field, postgres.JSONField) or not field.raw:
+                continue
+            source = field.source or field_name
+            try:
+                model_field = self.opts.model._meta.get_field(source)
+            except FieldDoesNotExist:
+                continue
+            if isinstance(model_field, models.JSONField):
+                answer[source] = field.get_raw_attname(source)
+        return answer
+
+    def get_deferrable_fields(self):
+        """Return a list of names of model fields which are expensive to
+        load (the array, JSON, and composite fields from django-pgfields),
+        and which this serializer never reads.
+
+        These fields may safely be deferred when loading model instances
+        for this serializer.  If the serializer has method fields, or
+        fields whose source is not a model field, nothing is deferrable.
+        """
+        # If django-pgfields is not installed, there are no such fields.
+        if not django_pgfields_installed:
+            return []
+
+        # Determine which model attributes the serializer fields read.
+        # A source of `*` means that the whole object is read, in which
+        # case we can not defer anything.
+        #
+        # Method fields, and sources which are not model fields (such as
+        # properties), may read any attribute of the object; we can not
+        # tell which, so we do not defer anything in those cases either.
+        # Loading a deferred field costs a query for every object.
+        sources = set()
+        for field_name, field in self.fields.items():
+            if isinstance(field, api.APIEndpointField):
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                return []
+            source = field.source or field_name
+            if source == '*':
+                return []
+            source = source.split('.')[0]
+            try:
+                self.opts.model._meta.get_field_by_name(source)
+            except FieldDoesNotExist:
+                return []
+            sources.add(source)
+
+        # Return the expensive fields that are not read.
+        heavy_classes = (models.ArrayField, models.CompositeField,
+                         models.JSONField)
+        return [f.name for f in self.opts.model._meta.concrete_fields
+                if isinstance(f, heavy_classes) and f.name not in sources]
+
 
 class ModelSerializer(BaseModelSerializer):
     """A model serializer which prints both endpoints and
@@ -103,6 +186,12 @@ class ModelSerializer(BaseModelSerializer):
     _default_view_name = '%(model_name)s-detail'
     _options_class = serializers.HyperlinkedModelSerializerOptions
 
+    # Whether saving an existing instance should write only the fields
+    # that have changed since it was loaded.  This is off by default: a
+    # model whose `save` method computes the value of a field (such as a
+    # slug) would otherwise have that value silently discarded.
+    track_changed_fields = False
+
     class Meta:
         depth = 1
 
@@ -237,16 +326,87 @@ class ModelSerializer(BaseModelSerializer):
         rel_field.parent_serializer = self
         return rel_field
 
+    def restore_object(self, attrs, instance=None):
+        """Restore the model instance.
+
+        If an existing instance is being updated, record its field values
+        before any changes are applied, so that `save_object` is able to
+        write only the fields that actually changed.
+        """
+        if (self.track_changed_fields and instance is not None and
+                                          instance.pk is not None):
+            instance._loaded_values = self._get_loaded_values(instance)
+        return super(ModelSerializer, self).restore_object(attrs,
+            instance=instance,
+        )
+
     def save_object(self, obj, **kwargs):
         """Save the provided model instance.
 
         If initial data was provided when this serializer was instantiated,
         set the appropriate fields on the model instance before saving.
+        Model instances in the initial data are used as they are.
+
+        If the instance was loaded from the database, save only the fields
+        whose values changed; if nothing changed, the write is skipped
+        entirely.
         """
         for key, value in self._initial.items():
-            setattr(obj, key, self._find_field(key).from_native(value))
+            if not isinstance(value, models.Model):
+                value = self._find_field(key).from_native(value)
+            setattr(obj, key, value)
+
+        # If we know what the instance looked like when it was loaded,
+        # restrict the save to the fields that have changed since.
+        loaded_values = obj.__dict__.pop('_loaded_values', None)
+        if (loaded_values is not None and not kwargs.get('force_insert') and
+                                          'update_fields' not in kwargs):
+            kwargs['update_fields'] = self._get_changed_fields(obj,
+                                                               loaded_values)
         return super(ModelSerializer, self).save_object(obj, **kwargs)
 
+    def _get_changed_fields(self, obj, loaded_values):
+        """Return a list of names of fields on the given model instance
+        whose values differ from `loaded_values`.
+
+        Values are compared by equality, so a mutable value (such as the
+        dictionary in a JSONField) that is modified in place, rather than
+        reassigned, is not detected as a change.
+        """
+        answer = []
+        for field in obj._meta.concrete_fields:
+            # Sanity check: Fields which are still deferred can not have
+            # been changed.
+            if field.primary_key or field.attname not in obj.__dict__:
+                continue
+
+            # If the field was deferred when the instance was loaded but
+            # has since been set, or if its value differs, it has changed.
+            value = obj.__dict__[field.attname]
+            if (field.attname not in loaded_values or
+                                loaded_values[field.attname] != value):
+                answer.append(field.name)
+
+        # If anything changed, fields such as `modified` that are set
+        # automatically on every save must also be written.
+        if answer:
+            for field in obj._meta.concrete_fields:
+                if (getattr(field, 'auto_now', False) and
+                                field.name not in answer):
+                    answer.append(field.name)
+
+        # Done; return the answer.
+        return answer
+
+    def _get_loaded_values(self, instance):
+        """Return a dictionary of the current values of the non-deferred,
+        non-primary-key fields on the given model instance, keyed by
+        attribute name.
+        """
+        return dict([(f.attname, instance.__dict__[f.attname])
+                     for f in instance._meta.concrete_fields
+                     if not f.primary_key and f.attname in instance.__dict__])
+
     def _find_field(self, key):
         """Return the field with the given field name.
         If the field does not exist, raise KeyError.
@@ -128,10 +128,19 @@ class APIEndpointsField(APIEndpointField):
 
         # If there are any child endpoints we should honor, add them
         # to the `answer` dictionary, in alphabetical order.
+        #
+        # If the number of objects in each child collection has been
+        # provided, include it alongside the URL.
         if self._honor_child_endpoints:
+            child_counts = self.context.get('child_counts', {})
             for ce in sorted(self.context.get('child_endpoints', [])):
                 child_url = '%s/%s/' % (url.rstrip('/'), ce)
                 answer[ce] = self._apply_format(child_url)
+                if ce in child_counts:
+                    answer[ce] = collections.OrderedDict((
+                        ('url', answer[ce]),
+                        ('count', child_counts[ce].get(obj.pk, 0)),
+                    ))
 
         # Done; return the final answer.
         return answer
@@ -1,11 +1,54 @@
 from __future__ import absolute_import, unicode_literals
+from django.core.exceptions import ValidationError
 from drf_toolbox.compat import django_pgfields_installed
 from drf_toolbox.serializers.widgets import JSONWidget
+from drf_toolbox.utils.json import JSONEncoder, RawJSON
 from rest_framework import serializers
+from rest_framework.fields import is_simple_callable
+import json
+import operator
 import six
 import uuid
 
 
+# Types which are left untouched by `serializers.Field.to_native`.
+_to_native_identity_types = frozenset(six.integer_types + (
+    bool, float, six.text_type, type(None),
+))
+
+# Types which are left untouched by the `from_native` method of certain
+# primitive serializer fields.
+_from_native_identity_types = {
+    serializers.BooleanField: frozenset((bool,)),
+    serializers.CharField: frozenset((six.text_type, str, type(None))),
+    serializers.FloatField: frozenset((float, type(None))),
+    serializers.IntegerField: frozenset(six.integer_types + (type(None),)),
+}
+
+
+def _all_of_types(values, types):
+    """Return True if every item in `values` is exactly of one of the
+    given types, False otherwise.
+    """
+    if types is None or not isinstance(values, (list, tuple)):
+        return False
+    return set(map(type, values)).issubset(types)
+
+
+def _unbound(method):
+    """Return the function underlying the given (possibly unbound)
+    method.
+    """
+    return getattr(method, '__func__', method)
+
+
+# DRF's stock `field_to_native` implementations.
+_stock_field_to_native = (
+    _unbound(serializers.Field.field_to_native),
+    _unbound(serializers.WritableField.field_to_native),
+)
+
+
 if django_pgfields_installed:
     __all__ = ('ArrayField', 'CompositeField', 'JSONField', 'UUIDField')
     
@@ -13,43 +56,165 @@ if django_pgfields_installed:
     class ArrayField(serializers.WritableField):
         """A REST Framework serialization field for handling arrays,
         serializing into Python lists.
+
+        If `min_length` or `max_length` are provided, arrays with fewer
+        or more items are rejected before any items are converted.
         """
         type_label = 'list'
+        default_error_messages = {
+            'max_length': 'Ensure this list has at most %(limit_value)d '
+                          'items (it has %(show_value)d).',
+            'min_length': 'Ensure this list has at least %(limit_value)d '
+                          'items (it has %(show_value)d).',
+        }
 
-        def __init__(self, of, **kwargs):
+        def __init__(self, of, max_length=None, min_length=None, **kwargs):
             self.of = of
+            self.max_length = max_length
+            self.min_length = min_length
             super(ArrayField, self).__init__(**kwargs)
 
+            # Determine whether the item field's conversions leave lists of
+            # certain types untouched, so whole lists can skip per-item
+            # conversion.
+            #
+            # `to_native` is an identity for these types unless the item
+            # field overrides it; `from_native` is an identity for certain
+            # types on certain primitive fields only.
+            self._to_native_types = None
+            if _unbound(type(of).to_native) is _unbound(
+                                        serializers.Field.to_native):
+                self._to_native_types = _to_native_identity_types
+            self._from_native_types = _from_native_identity_types.get(
+                type(of), None,
+            )
+
         def from_native(self, value):
             """Iterate over each item in the value, run it through the
-            field's `from_native` method, and return the result.
+            field's `from_native` method and validators, and return
+            the result.
             """
-            return [self.of.from_native(i) for i in value]
+            # A null array has no items to convert, and no size to check.
+            if value is None:
+                return None
+
+            # Check the size of the array before doing any work.
+            if self.max_length is not None and len(value) > self.max_length:
+                self._raise_size_error('max_length', value)
+            if self.min_length is not None and len(value) < self.min_length:
+                self._raise_size_error('min_length', value)
+
+            # If conversion would leave every item untouched, just copy
+            # the list; otherwise, convert each item.
+            if _all_of_types(value, self._from_native_types):
+                answer = list(value)
+            else:
+                answer = [self.of.from_native(i) for i in value]
+
+            # Run the item field's validators, if it has any, reporting
+            # every invalid item at once.
+            if self.of.validators:
+                errors = []
+                for index, item in enumerate(answer):
+                    try:
+                        self.of.run_validators(item)
+                    except ValidationError as ex:
+                        errors += ['Item %d: %s' % (index, message)
+                                   for message in ex.messages]
+                if errors:
+                    raise ValidationError(errors)
+
+            # Done; return the answer.
+            return answer
 
         def to_native(self, value):
             """Iterate over each item in the value, run it through the
             field's `to_native` method, and return the result.
             """
+            if value is None:
+                return None
+            if _all_of_types(value, self._to_native_types):
+                return list(value)
             return [self.of.to_native(i) for i in value]
 
+        def _raise_size_error(self, limit, value):
+            """Raise ValidationError for an array whose size is outside
+            the given limit.
+            """
+            raise ValidationError(self.error_messages[limit] % {
+                'limit_value': getattr(self, limit),
+                'show_value': len(value),
+            })
+
 
     class JSONField(serializers.WritableField):
         """A REST Framework serialization field for handling JSON fields,
         serializing them into an appropriate Python object.
+
+        If `raw` is set, and the model instance carries the column's JSON
+        text (see `get_raw_attname`) instead of the decoded column, the text
+        is passed through to the drf_toolbox JSON renderers untouched.
         """
         type_label = 'object'
         widget = JSONWidget
 
+        def __init__(self, raw=False, **kwargs):
+            self.raw = raw
+            super(JSONField, self).__init__(**kwargs)
+
+        @staticmethod
+        def get_raw_attname(source):
+            """Return the attribute name under which the JSON text of the
+            given model field is expected.
+            """
+            return '%s_raw_json' % source
+
+        def field_to_native(self, obj, field_name):
+            """Return the JSON text of the column as a pre-encoded fragment,
+            if it is available and the response is being rendered by
+            a drf_toolbox JSON renderer.  Otherwise, return the column's
+            value as usual.
+            """
+            # The raw text is only used if the column itself has not been
+            # loaded or assigned, so that it is never out of date.
+            source = self.source or field_name
+            attrs = getattr(obj, '__dict__', {})
+            raw_attname = self.get_raw_attname(source)
+            if (not self.raw or self.write_only or source in attrs or
+                                raw_attname not in attrs):
+                return super(JSONField, self).field_to_native(obj, field_name)
+
+            # Return the text, decoding it if the renderer can not accept
+            # a pre-encoded fragment.
+            text = attrs[raw_attname]
+            if text is None:
+                return None
+            if self._renderer_accepts_raw_json():
+                return RawJSON(text)
+            return json.loads(text)
+
         def from_native(self, value):
             return value
 
         def to_native(self, value):
             return value
 
+        def _renderer_accepts_raw_json(self):
+            """Return True if the renderer selected for this request is
+            able to output RawJSON fragments, False otherwise.
+            """
+            request = getattr(self, 'context', {}).get('request', None)
+            renderer = getattr(request, 'accepted_renderer', None)
+            encoder_class = getattr(renderer, 'encoder_class', object)
+            return issubclass(encoder_class, JSONEncoder)
+
 
     class CompositeField(serializers.WritableField):
         """A REST Framework serialization field for handling composite fields,
         serializing them into a Python dictionary and back.
+
+        How to convert each subfield is worked out once, when the field is
+        created, rather than for every value.
         """
         suppress_form_parsing = True
         type_label = 'dict'
@@ -58,6 +223,7 @@ if django_pgfields_installed:
             self.fields = fields
             self.instance_class = instance_class
             super(CompositeField, self).__init__(**kwargs)
+            self._build_plans()
 
         def from_native(self, value):
             """Convert the dictionary into the appropriate composite instance
@@ -65,19 +231,110 @@ if django_pgfields_installed:
             """
             kwargs = {}
             for name, subval in value.items():
-                subfield = self.fields[name]
-                subfield.field_from_native(value, {}, name, kwargs)
+                try:
+                    subfield, key, identity_types, validate = \
+                                            self._from_native_plan[name]
+                except KeyError:
+                    raise ValidationError('Unknown field: `%s`.' % name)
+
+                # Subfields with unusual needs get the full treatment.
+                if key is None:
+                    subfield.field_from_native(value, {}, name, kwargs)
+                    continue
+
+                # Convert the value, unless it already has the right type.
+                if type(subval) in identity_types:
+                    native = subval
+                else:
+                    native = subfield.from_native(subval)
+                if validate:
+                    subfield.validate(native)
+                    subfield.run_validators(native)
+                kwargs[key] = native
             return self.instance_class(**kwargs)
 
         def to_native(self, value):
             """Iterate over each of the sub-fields in the CompositeField and
             transform them appropriately.
             """
+            # Sanity check: Empty values and dictionaries get the full
+            # treatment from every subfield.
+            if value is None or isinstance(value, dict):
+                return dict([(name, subfield.field_to_native(value, name))
+                             for name, subfield in self.fields.items()])
+
             answer = {}
-            for name, subfield in self.fields.items():
-                answer[name] = subfield.field_to_native(value, name)
+            for name, getter, convert, identity_types in self._to_native_plan:
+                # Subfields with unusual needs get the full treatment.
+                if getter is None:
+                    answer[name] = convert(value, name)
+                    continue
+
+                # Convert the value, unless conversion would leave it
+                # untouched.
+                subvalue = getter(value)
+                if type(subvalue) in identity_types:
+                    answer[name] = subvalue
+                    continue
+                if is_simple_callable(subvalue):
+                    subvalue = subvalue()
+                answer[name] = convert(subvalue)
             return answer
 
+        def _build_plans(self):
+            """Work out how to convert each subfield in each direction,
+            and store the plans on this field.
+
+            Subfields using DRF's stock `field_to_native` and
+            `field_from_native` are converted directly, skipping conversion
+            entirely for values which it would leave untouched.  Any other
+            subfields (such as those with dotted sources) fall back to their
+            `field_to_native` and `field_from_native` methods.
+            """
+            self._to_native_plan = []
+            self._from_native_plan = {}
+            for name, subfield in self.fields.items():
+                source = subfield.source or name
+                subclass = type(subfield)
+                simple_source = source != '*' and '.' not in source
+
+                # Work out how to convert this subfield's value to
+                # a native value.
+                write_only = getattr(subfield, 'write_only', False)
+                if (simple_source and not write_only and
+                        _unbound(subclass.field_to_native) in
+                            _stock_field_to_native):
+                    identity_types = frozenset()
+                    if _unbound(subclass.to_native) is _unbound(
+                                            serializers.Field.to_native):
+                        identity_types = _to_native_identity_types
+                    self._to_native_plan.append((name,
+                        operator.attrgetter(source),
+                        subfield.to_native,
+                        identity_types,
+                    ))
+                else:
+                    self._to_native_plan.append((name, None,
+                        subfield.field_to_native, None,
+                    ))
+
+                # Work out how to convert a native value back into this
+                # subfield's value.
+                if (simple_source and not subfield.read_only and
+                        _unbound(subclass.field_from_native) is _unbound(
+                            serializers.WritableField.field_from_native)):
+                    validate = bool(
+                        subfield.required or subfield.validators or
+                        _unbound(subclass.validate) is not _unbound(
+                            serializers.WritableField.validate)
+                    )
+                    self._from_native_plan[name] = (subfield, source,
+                        _from_native_identity_types.get(subclass, frozenset()),
+                        validate,
+                    )
+                else:
+                    self._from_native_plan[name] = (subfield, None, None, None)
+
 
     class UUIDField(serializers.CharField):
         """A REST Framework serialization field for handling UUID fields,
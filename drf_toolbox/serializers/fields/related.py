@@ -17,6 +17,10 @@ class RelatedField(serializers.RelatedField):
     default_lookup_field = 'pk'
     read_only = False
 
+    # Cache of serializer classes for related objects; see
+    # `_create_serializer_class`.
+    _serializer_classes = {}
+
     def __init__(self, seen_models, **kwargs):
         self._seen_models = set(seen_models)
         self._fields = kwargs.pop('fields', [])
@@ -118,20 +122,32 @@ class RelatedField(serializers.RelatedField):
         """Create a serializer class for this related field,
         and save it on this class instance.
 
-        Return True if a new class was created, False otherwise.
+        Serializer classes are shared by every related field with the
+        same model, fields and exclusions, so that each is only created
+        once per process.
+
+        Return True if a new class was saved on this instance, False
+        otherwise.
         """
-        # Save a serializer for the related model on this object
-        # if and only if there isn't one already.
-        if not hasattr(self, '_serializer_class'):
-            class Serializer(api_settings.DEFAULT_MODEL_SERIALIZER_CLASS):
+        # Sanity check: If there is a serializer on this object already,
+        # there's nothing to do.
+        if hasattr(self, '_serializer_class'):
+            return False
+
+        # Retrieve the shared serializer class for the related model,
+        # creating it if this is the first time it is needed.
+        base_class = api_settings.DEFAULT_MODEL_SERIALIZER_CLASS
+        key = (model_class, base_class, _freeze(self._fields),
+               _freeze(self._exclude))
+        if key not in self._serializer_classes:
+            class Serializer(base_class):
                 class Meta:
                     model = model_class
                     fields = self._fields
                     exclude = self._exclude
-            self._serializer_class = Serializer
-            return True
-
-        return False
+            self._serializer_classes[key] = Serializer
+        self._serializer_class = self._serializer_classes[key]
+        return True
 
     def _get_serializer(self, obj):
         """Return a serializer object corresponding to this related
@@ -148,3 +164,16 @@ class RelatedField(serializers.RelatedField):
         # Return an instance of the serializer class.
         return self._serializer_class(obj, seen_models=self._seen_models,
                                            context=context)
+
+
+def _freeze(value):
+    """Return a hashable equivalent of the given `fields` or `exclude`
+    option, which may be a list, tuple or dictionary of them.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted([(k, _freeze(v)) for k, v in value.items()]))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    if isinstance(value, (list, tuple)):
+        return tuple([_freeze(i) for i in value])
+    return value
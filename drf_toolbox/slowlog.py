@@ -0,0 +1,195 @@
+from __future__ import absolute_import, unicode_literals
+from django.conf import settings
+from drf_toolbox.serializers.fields import related
+from drf_toolbox.utils import json
+from rest_framework import serializers
+from timeit import default_timer
+import collections
+import logging
+import random
+import six
+import threading
+
+
+__all__ = ('RateLimiter', 'count_rows', 'get_field_tree', 'get_threshold',
+           'sample', 'watch')
+
+
+logger = logging.getLogger('drf_toolbox.slowlog')
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+class RateLimiter(object):
+    """Allow at most `limit` events in each period of `period` seconds."""
+    def __init__(self, limit, period=60.0):
+        self.limit = limit
+        self.period = period
+        self._count = 0
+        self._lock = threading.Lock()
+        self._window = None
+
+    def allow(self):
+        """Return True if another event is allowed in this period, and
+        count it; return False otherwise.
+        """
+        with self._lock:
+            now = default_timer()
+            if self._window is None or now - self._window >= self.period:
+                self._count = 0
+                self._window = now
+            if self._count >= self.limit:
+                return False
+            self._count += 1
+            return True
+
+
+def count_rows(data, tree, path='self', counts=None):
+    """Return an ordered dictionary mapping each level of the given
+    serialized data to the number of objects serialized at that level,
+    such as `{'self': 20, 'normal': 20}`.
+
+    The nested levels are those in the given field tree (see
+    `get_field_tree`).  Paginated data is counted by its results.
+    """
+    if counts is None:
+        counts = collections.OrderedDict()
+        if isinstance(data, dict) and isinstance(data.get('results'), list):
+            data = data['results']
+
+    # Count the objects at this level.
+    if not isinstance(data, (list, tuple)):
+        data = [data]
+    objects = [obj for obj in data if isinstance(obj, dict)]
+    counts[path] = counts.get(path, 0) + len(objects)
+
+    # Count the objects at each level nested beneath it.
+    for name, subtree in tree.items():
+        if not isinstance(subtree, dict):
+            continue
+        subpath = name if path == 'self' else '%s.%s' % (path, name)
+        counts.setdefault(subpath, 0)
+        for obj in objects:
+            if obj.get(name) is not None:
+                count_rows(obj[name], subtree, subpath, counts)
+
+    # Done; return the answer.
+    return counts
+
+
+def get_field_tree(serializer):
+    """Return an ordered dictionary mapping the name of each of the given
+    serializer's fields to the name of its class or, for related fields
+    and nested serializers, to the field tree of the nested serializer.
+    """
+    tree = collections.OrderedDict()
+    for name, field in serializer.fields.items():
+        if isinstance(field, related.RelatedField):
+            nested = field._get_serializer(field.queryset.model())
+            tree[name] = get_field_tree(nested)
+        elif isinstance(field, serializers.BaseSerializer):
+            tree[name] = get_field_tree(field)
+        else:
+            tree[name] = type(field).__name__
+    return tree
+
+
+def get_threshold(view):
+    """Return the number of seconds beyond which requests to the given
+    view are logged as slow, or None if they are never logged.
+    """
+    threshold = getattr(view, 'slow_request_threshold', None)
+    if threshold is None:
+        threshold = getattr(settings, 'DRF_TOOLBOX_SLOW_REQUEST_THRESHOLD',
+                            None)
+    return threshold
+
+
+def sample(threshold):
+    """Return True if the current request should be watched for
+    slowness, given its threshold.
+
+    Requests are sampled at the rate given by the
+    `DRF_TOOLBOX_SLOW_REQUEST_SAMPLE_RATE` setting (by default, 0.1), so
+    that only some requests bear the cost of counting queries and timing
+    each phase.
+    """
+    if threshold is None:
+        return False
+    rate = getattr(settings, 'DRF_TOOLBOX_SLOW_REQUEST_SAMPLE_RATE', 0.1)
+    return random.random() < rate
+
+
+def watch(view, request, response, threshold):
+    """Log the given request if it takes longer than the given number of
+    seconds to handle and render.
+
+    If the response has not been rendered yet, do this once it has
+    been, so that rendering is included.  At most
+    `DRF_TOOLBOX_SLOW_REQUEST_RATE_LIMIT` requests (by default, 10) are
+    logged per minute by each process.
+    """
+    if hasattr(response, 'add_post_render_callback') and \
+                                        not response.is_rendered:
+        response.add_post_render_callback(
+            lambda response: watch(view, request, response, threshold),
+        )
+        return
+
+    # Sanity check: If the request was not slow, or we have logged too
+    # many recently, do nothing.
+    duration = default_timer() - view.timings.started
+    if duration < threshold or not _get_limiter().allow():
+        return
+
+    # Describe the request, taking care that failing to do so never
+    # breaks the response.
+    try:
+        record = _describe(view, request, response, duration)
+    except Exception:
+        logger.exception('Could not describe slow request to %s.',
+                         request.path)
+        return
+    logger.warning('Slow request: %s', json.dumps(record),
+                   extra={'slow_request': record})
+
+
+def _describe(view, request, response, duration):
+    """Return a dictionary describing the given slow request."""
+    match = getattr(request, 'resolver_match', None)
+    timings = view.timings
+    record = collections.OrderedDict([
+        ('view', timings.name),
+        ('method', request.method),
+        ('path', request.path),
+        ('route', match.url_name if match else None),
+        ('kwargs', dict([(key, six.text_type(value))
+                         for key, value in view.kwargs.items()])),
+        ('status', response.status_code),
+        ('duration', round(duration * 1000, 1)),
+        ('timings', collections.OrderedDict([
+            (phase, round(phase_duration * 1000, 1))
+            for phase, phase_duration in timings.durations.items()
+        ])),
+        ('queries', timings.queries.get('queryset')),
+    ])
+
+    # Describe the serializer, and how many objects were serialized at
+    # each level.
+    serializer = view.get_serializer()
+    record['serializer'] = type(serializer).__name__
+    record['fields'] = get_field_tree(serializer)
+    record['rows'] = count_rows(getattr(response, 'data', None),
+                                record['fields'])
+    return record
+
+
+def _get_limiter():
+    """Return the rate limiter for slow request logs."""
+    global _limiter
+    limit = getattr(settings, 'DRF_TOOLBOX_SLOW_REQUEST_RATE_LIMIT', 10)
+    with _limiter_lock:
+        if _limiter is None or _limiter.limit != limit:
+            _limiter = RateLimiter(limit)
+        return _limiter
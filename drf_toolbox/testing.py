@@ -0,0 +1,263 @@
+from __future__ import absolute_import, unicode_literals
+from django.core.urlresolvers import RegexURLResolver
+from django.db import transaction
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.utils import timezone
+from drf_toolbox import queries
+from drf_toolbox.compat import models
+from drf_toolbox.routers import LazyViewSet
+import re
+import six
+import uuid
+
+
+__all__ = ('QueryCountTestCase', 'get_endpoints', 'make_query_count_tests')
+
+
+class QueryCountTestCase(TestCase):
+    """Base class for the test cases created by `make_query_count_tests`.
+
+    Each test requests a single endpoint twice, with a different number
+    of objects in the database each time (see `page_sizes`), and asserts
+    that both requests perform the same number of queries.
+    """
+    router = None
+    page_sizes = (2, 5)
+
+    def setUp(self):
+        super(QueryCountTestCase, self).setUp()
+        self.rf = RequestFactory()
+        self._index = 0
+
+    def assertQueryCountConstant(self, parents, prefix, viewset, action):
+        """Assert that a GET request to the given action of the given
+        viewset, nested beneath the given parents, performs the same
+        number of queries regardless of how many objects there are.
+        """
+        counts = []
+        for size in self.page_sizes:
+            sid = transaction.savepoint()
+            try:
+                path, counter = self._request(parents, prefix, viewset,
+                                              action, size)
+            finally:
+                transaction.savepoint_rollback(sid)
+
+            # If this request performed more queries than the first, fail,
+            # naming the fields responsible.
+            if counts and len(counter) > counts[0]:
+                self.fail('GET %s performed %d queries with %d objects, '
+                          'but %d with %d objects. Excess queries: %s.' % (
+                    path, counts[0], self.page_sizes[0], len(counter), size,
+                    queries.describe_queries(counter.queries[counts[0]:]),
+                ))
+            counts.append(len(counter))
+
+    def create_object(self, model, **kwargs):
+        """Create and return an instance of the given model, with the
+        given field values.
+
+        Any other field that requires a value is given one generated by
+        `get_field_value`, and any other required foreign key is given a
+        new related object.  Override this method for models which need
+        more specific values.
+        """
+        self._index += 1
+        for field in model._meta.concrete_fields:
+            if field.name in kwargs or field.attname in kwargs:
+                continue
+            if isinstance(field, models.AutoField) or field.null or \
+                                                    field.has_default():
+                continue
+            if field.rel:
+                kwargs[field.name] = self.create_object(field.rel.to)
+                continue
+            kwargs[field.name] = self.get_field_value(field, self._index)
+        return model._default_manager.create(**kwargs)
+
+    def get_field_value(self, field, index):
+        """Return a value for the given model field, which is unique for
+        each index.
+        """
+        if field.choices:
+            return field.choices[0][0]
+        if isinstance(field, models.BooleanField):
+            return False
+        if isinstance(field, models.DateTimeField):
+            return timezone.now()
+        if isinstance(field, models.DateField):
+            return timezone.now().date()
+        if isinstance(field, models.TimeField):
+            return timezone.now().time()
+        if isinstance(field, models.EmailField):
+            return 'user%d@example.com' % index
+        if isinstance(field, (models.DecimalField, models.FloatField,
+                              models.IntegerField)):
+            return index
+        if isinstance(field, getattr(models, 'UUIDField', ())):
+            return uuid.uuid4()
+        return field.to_python('%s%d' % (field.name[:4], index))
+
+    def _create_fixtures(self, parents, model, count):
+        """Create a chain of parent objects, one for each of the given
+        parents, and the given number of objects of the given model
+        beneath the innermost.
+
+        Return a two-tuple of the list of parent objects and the list of
+        objects.
+        """
+        parent_objects = []
+        for _, parent_viewset in parents:
+            parent_model = _get_model(parent_viewset)
+            kwargs = {}
+            if parent_objects:
+                fk = self._get_foreign_key(parent_model, parent_objects[-1])
+                kwargs[fk.name] = parent_objects[-1]
+            parent_objects.append(self.create_object(parent_model, **kwargs))
+
+        # Create the objects themselves.
+        kwargs = {}
+        if parent_objects:
+            fk = self._get_foreign_key(model, parent_objects[-1])
+            kwargs[fk.name] = parent_objects[-1]
+        objects = [self.create_object(model, **kwargs)
+                   for i in range(0, count)]
+
+        # Done; return the answer.
+        return parent_objects, objects
+
+    def _get_foreign_key(self, model, parent):
+        """Return the single foreign key from the given model to the
+        given parent object's model, skipping the test if there is not
+        exactly one.
+        """
+        fks = [field for field in model._meta.concrete_fields
+               if field.rel and field.rel.to is type(parent)]
+        if len(fks) != 1:
+            self.skipTest('%s does not have exactly one foreign key to %s.'
+                          % (model.__name__, type(parent).__name__))
+        return fks[0]
+
+    def _request(self, parents, prefix, viewset, action, size):
+        """Create fixtures of the given size, and perform a GET request to
+        the given action of the given viewset.
+
+        Return a two-tuple of the path requested and a QueryCounter of
+        the queries the request performed.
+        """
+        parent_objects, objects = self._create_fixtures(parents,
+            _get_model(viewset),
+            size,
+        )
+
+        # Build the path.
+        segments = []
+        for (parent_prefix, parent_viewset), obj in zip(parents,
+                                                        parent_objects):
+            segments += [parent_prefix, _get_lookup_value(parent_viewset,
+                                                          obj)]
+        segments.append(prefix)
+        if action == 'retrieve':
+            segments.append(_get_lookup_value(viewset, objects[0]))
+        elif action != 'list':
+            segments.append(action)
+        path = '/%s/' % '/'.join([six.text_type(s) for s in segments])
+
+        # Ask for a page as large as the fixtures, if possible.
+        data = {}
+        if action != 'retrieve' and getattr(viewset, 'paginate_by_param',
+                                            None):
+            data[viewset.paginate_by_param] = size
+
+        # Perform the request, counting its queries.
+        resolver = RegexURLResolver(r'^/', self.router.get_urls())
+        callback, args, kwargs = resolver.resolve(path)
+        request = self.rf.get(path, data, HTTP_ACCEPT='application/json')
+        with queries.QueryCounter() as counter:
+            response = callback(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        self.assertEqual(response.status_code, 200,
+                         'GET %s returned %d.' % (path,
+                                                  response.status_code))
+
+        # Done; return the answer.
+        return path, counter
+
+
+def get_endpoints(router, parents=()):
+    """Yield a three-tuple of the parents, prefix and viewset of every
+    viewset registered with the given router or its children.
+
+    The parents are a tuple of two-tuples of the prefix and viewset of
+    each viewset the viewset is nested beneath, outermost first.  Viewsets
+    registered lazily are imported.
+    """
+    for prefix, viewset, base_name in router.registry:
+        yield parents, prefix, _resolve(viewset)
+    for prefix, child in sorted(router.children.items()):
+        parent = (prefix, _resolve(child.parent_viewset))
+        for endpoint in get_endpoints(child, parents + (parent,)):
+            yield endpoint
+
+
+def make_query_count_tests(router, page_sizes=(2, 5),
+                           base=QueryCountTestCase):
+    """Return a test case class with a test for every list, detail and
+    GET base action route of every viewset registered with the given
+    router, which asserts that the number of queries the route performs
+    does not grow with the number of objects.
+
+    Assign the result to a name in a test module to have it run::
+
+        QueryCountTests = make_query_count_tests(router)
+    """
+    attrs = {'page_sizes': page_sizes, 'router': router}
+    for parents, prefix, viewset in get_endpoints(router):
+        # Determine the actions to test.
+        actions = [action for action in ('list', 'retrieve')
+                   if hasattr(viewset, action)]
+        for name in sorted(dir(viewset)):
+            method = getattr(viewset, name)
+            if 'GET' in [m.upper() for m in
+                         getattr(method, 'base_http_methods', ())]:
+                actions.append(name)
+
+        # Create a test for each action.
+        name = '_'.join([p for p, _ in parents] + [prefix])
+        for action in actions:
+            test_name = re.sub(r'[^0-9A-Za-z_]', '_',
+                               'test_%s_%s' % (name, action))
+            attrs[str(test_name)] = _make_test(parents, prefix, viewset,
+                                               action)
+
+    # Done; return the test case class.
+    return type(str('QueryCountTests'), (base,), attrs)
+
+
+def _get_lookup_value(viewset, obj):
+    return getattr(obj, getattr(viewset, 'lookup_field', 'pk'))
+
+
+def _get_model(viewset):
+    model = getattr(viewset, 'model', None)
+    if model is None:
+        model = viewset.queryset.model
+    return model
+
+
+def _resolve(viewset):
+    if isinstance(viewset, LazyViewSet):
+        return viewset.resolve()
+    return viewset
+
+
+def _make_test(parents, prefix, viewset, action):
+    def test(self):
+        self.assertQueryCountConstant(parents, prefix, viewset, action)
+    test.__doc__ = 'Establish that the number of queries performed by ' \
+                   '`%s.%s` does not grow with the number of objects.' % (
+        viewset.__name__, action,
+    )
+    return test
@@ -0,0 +1,125 @@
+from __future__ import absolute_import, unicode_literals
+from django.conf import settings
+from importlib import import_module
+from timeit import default_timer
+import collections
+import threading
+
+
+__all__ = ('MemoryStats', 'RenderTimingMixin', 'RequestTimings', 'get_stats')
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+class MemoryStats(object):
+    """A stats backend which keeps everything it is sent in memory, for
+    use in tests and development.
+
+    Any other backend (such as a statsd client) must provide the same
+    `timing` and `incr` methods, and may be used by setting
+    `DRF_TOOLBOX_STATS_BACKEND` to the dot path of its class.
+    """
+    def __init__(self):
+        self.counts = collections.defaultdict(int)
+        self.timings = collections.defaultdict(list)
+
+    def incr(self, stat, count=1):
+        """Increase the given counter by the given amount."""
+        self.counts[stat] += count
+
+    def timing(self, stat, value):
+        """Record a duration, in milliseconds, for the given stat."""
+        self.timings[stat].append(value)
+
+
+class RenderTimingMixin(object):
+    """Mixin for renderers, which records how long rendering takes
+    when the view is recording the timings of its requests.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        timings = getattr(renderer_context.get('view'), 'timings', None)
+        if timings is None:
+            return super(RenderTimingMixin, self).render(data,
+                accepted_media_type, renderer_context,
+            )
+
+        # Render, timing how long it takes.  Renderers may render with
+        # other renderers; in that case, the outermost sets the duration
+        # last.
+        start = default_timer()
+        try:
+            return super(RenderTimingMixin, self).render(data,
+                accepted_media_type, renderer_context,
+            )
+        finally:
+            timings.add('render', default_timer() - start)
+
+
+class RequestTimings(object):
+    """The durations of each phase of handling a single request, and the
+    number of queries performed during each.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.durations = collections.OrderedDict()
+        self.queries = {}
+        self.started = default_timer()
+
+    def add(self, phase, duration, queries=None):
+        """Record the duration, in seconds, of the given phase, and the
+        number of queries performed during it if known.
+        """
+        self.durations[phase] = duration
+        if queries is not None:
+            self.queries[phase] = queries
+
+    def finish(self, response):
+        """Record the total duration of the request, add a Server-Timing
+        header to the given response, and send the timings to the stats
+        backend.
+
+        If the response has not been rendered yet, do this once it has
+        been, so that the render phase is included.
+        """
+        if hasattr(response, 'add_post_render_callback') and \
+                                            not response.is_rendered:
+            response.add_post_render_callback(self.finish)
+            return
+
+        # Record the total, and report everything.
+        self.add('total', default_timer() - self.started)
+        response['Server-Timing'] = self.get_header()
+        stats = get_stats()
+        if stats is not None:
+            for phase, duration in self.durations.items():
+                stats.timing('%s.%s' % (self.name, phase), duration * 1000)
+            for phase, count in self.queries.items():
+                stats.incr('%s.%s.queries' % (self.name, phase), count)
+
+    def get_header(self):
+        """Return the value of the Server-Timing header for these
+        timings, with durations in milliseconds.
+        """
+        entries = []
+        for phase, duration in self.durations.items():
+            entry = '%s;dur=%.1f' % (phase, duration * 1000)
+            if phase in self.queries:
+                entry += ';desc="%d queries"' % self.queries[phase]
+            entries.append(entry)
+        return ', '.join(entries)
+
+
+def get_stats():
+    """Return the stats backend in use, or None if there is none."""
+    global _stats
+    path = getattr(settings, 'DRF_TOOLBOX_STATS_BACKEND', None)
+    if not path:
+        return None
+    with _stats_lock:
+        if _stats is None or _stats[0] != path:
+            module_name, class_name = path.rsplit('.', 1)
+            _stats = (path, getattr(import_module(module_name), class_name)())
+        return _stats[1]
@@ -1,7 +1,77 @@
 from __future__ import absolute_import, unicode_literals
-from drf_toolbox.renderers.json import JSONEncoder
+from calendar import timegm
+from datetime import datetime
 from functools import wraps
+from rest_framework.utils import encoders
+import binascii
 import json
+import os
+import re
+
+
+# Placeholders for pre-encoded JSON fragments take this form; the nonce
+# ensures that they can not collide with ordinary strings.
+_raw_json_nonce = binascii.hexlify(os.urandom(16)).decode('ascii')
+_raw_json_placeholder = '__raw_json_%s_{index}__' % _raw_json_nonce
+_raw_json_regex = re.compile(r'"__raw_json_%s_([0-9]+)__"' % _raw_json_nonce)
+
+
+class RawJSON(object):
+    """A fragment of text which is already encoded as JSON, and which
+    JSONEncoder should include in its output verbatim.
+    """
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+    def __repr__(self):
+        return 'RawJSON(%r)' % self.text
+
+
+class JSONEncoder(encoders.JSONEncoder):
+    """json.JSONEncoder subclass which understands how to serialize
+    some non-standard objects.
+    """
+    def __init__(self, *args, **kwargs):
+        super(JSONEncoder, self).__init__(*args, **kwargs)
+        self._raw_json = []
+
+    def default(self, obj):
+        """Serialize `obj` into a UNIX timestamp if it is a datetime
+        object, and call the superclass method otherwise.
+
+        RawJSON objects are serialized into a placeholder string, which
+        is replaced with the fragment by `iterencode`.
+        """
+        if isinstance(obj, datetime):
+            return timegm(obj.utctimetuple())
+        if isinstance(obj, RawJSON):
+            self._raw_json.append(obj.text)
+            return _raw_json_placeholder.format(
+                index=len(self._raw_json) - 1,
+            )
+        return super(JSONEncoder, self).default(obj)
+
+    def iterencode(self, obj, _one_shot=False):
+        """Encode the given object, yielding each string representation
+        as available.
+
+        Substitute any RawJSON fragments for their placeholders.
+        """
+        self._raw_json = []
+        chunks = super(JSONEncoder, self).iterencode(obj, _one_shot)
+        for chunk in chunks:
+            if self._raw_json:
+                chunk = _raw_json_regex.sub(self._substitute_raw_json, chunk)
+            yield chunk
+
+    def _substitute_raw_json(self, match):
+        """Return the RawJSON fragment for the given placeholder match."""
+        try:
+            return self._raw_json[int(match.group(1))]
+        except IndexError:
+            return match.group(0)
 
 
 @wraps(json.dump)
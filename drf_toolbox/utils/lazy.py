@@ -0,0 +1,90 @@
+from __future__ import absolute_import, unicode_literals
+from importlib import import_module
+import sys
+import types
+
+
+__all__ = ('LazyModule', 'install')
+
+
+class LazyModule(types.ModuleType):
+    """A module whose names are imported from the modules that provide
+    them when they are first looked up, rather than when the module
+    itself is imported.
+
+    `exports` maps each name to the module that provides it.  Any other
+    public name is looked up in each of the `fallbacks` modules in turn,
+    as if each had been star-imported, the last taking precedence.
+    """
+    def __init__(self, name, exports=None, fallbacks=()):
+        super(LazyModule, self).__init__(str(name))
+        self._exports = dict(exports or {})
+        self._fallbacks = tuple(fallbacks)
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(self.__all__))
+
+    def __getattr__(self, name):
+        # This is only called for names which are not already set on
+        # the module.  Dunder names other than `__all__` are looked up
+        # by the import machinery, and are never exported.
+        if name == '__all__':
+            value = self._get_all()
+        elif name.startswith('__'):
+            raise AttributeError(name)
+        elif name in self._exports:
+            value = getattr(import_module(self._exports[name]), name)
+        else:
+            value = self._get_fallback(name)
+
+        # Set the name on the module, so that subsequent lookups are
+        # ordinary attribute lookups.
+        setattr(self, name, value)
+        return value
+
+    def _get_all(self):
+        """Return every name this module exports, importing each of the
+        fallback modules to find out what they export.
+        """
+        answer = set(self._exports)
+        for fallback in self._fallbacks:
+            answer.update(_get_public_names(import_module(fallback)))
+        return tuple(sorted(answer))
+
+    def _get_fallback(self, name):
+        """Return the value of the given name from the last fallback
+        module which exports it, raising AttributeError if none do.
+        """
+        if not name.startswith('_'):
+            for fallback in reversed(self._fallbacks):
+                module = import_module(fallback)
+                if name in _get_public_names(module):
+                    return getattr(module, name)
+        raise AttributeError("'module' object has no attribute '%s'" % name)
+
+
+def install(name, exports=None, fallbacks=()):
+    """Replace the module with the given name (usually the caller's
+    `__name__`) with a LazyModule, keeping everything already set on it.
+
+    This is the equivalent of a module-level `__getattr__`, which is not
+    available on every supported version of Python: the import machinery
+    returns whatever is in `sys.modules` once a module has been executed.
+    """
+    module = sys.modules[name]
+    lazy = LazyModule(name, exports=exports, fallbacks=fallbacks)
+    lazy.__dict__.update(module.__dict__)
+
+    # Keep a reference to the original module; on Python 2, the globals
+    # of a module are cleared when it is garbage collected.
+    lazy._module = module
+    sys.modules[name] = lazy
+    return lazy
+
+
+def _get_public_names(module):
+    """Return the names a star import of the given module would import."""
+    try:
+        return module.__all__
+    except AttributeError:
+        return [key for key in module.__dict__ if not key.startswith('_')]
@@ -1,16 +1,94 @@
 from __future__ import absolute_import, unicode_literals
 from copy import copy
+from django.core.cache import cache
+from django.core.exceptions import FieldError, ValidationError
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Count, Max
+from django.db.models.fields import FieldDoesNotExist
+from django.db.models.query import QuerySet
+from django.db.models.sql.datastructures import EmptyResultSet
+from django.http import Http404, HttpResponseNotModified
+from django.utils import timezone
 from django.utils.functional import cached_property
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from drf_toolbox import pagination, profiling, queries, slowlog, timing
+from drf_toolbox.cache import invalidate
 from drf_toolbox.compat import django_pgfields_installed, models
-from drf_toolbox.serializers import ModelSerializer
-from rest_framework import parsers, viewsets
+from drf_toolbox.decorators import base_action
+from drf_toolbox.serializers import BaseModelSerializer, ModelSerializer
+from drf_toolbox.utils import json
+from rest_framework import parsers, status, viewsets
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from timeit import default_timer
+import calendar
+import collections
+import datetime
+import hashlib
+import re
+import six
 
 
 class ModelViewSet(viewsets.ModelViewSet):
     """ModelViewSet subclass that knows how to filter a queryset by
     unexpected keyword arguments.
     """
+    # Whether expensive model fields that the serializer never reads
+    # should be deferred when loading objects; see
+    # `BaseModelSerializer.get_deferrable_fields`.
+    defer_unread_fields = False
+
+    # Whether `api_endpoints` should include the number of objects in
+    # each child collection; see `get_child_counts`.
+    child_endpoint_counts = False
+
+    # Whether GET requests should be answered with 304 Not Modified when
+    # the client's cached copy is still current; see `list` and `retrieve`.
+    # The `modified_field` is the model's `auto_now` DateTimeField unless
+    # specified.
+    conditional_get = False
+    modified_field = None
+
+    # How paginated list endpoints count their objects: exactly, from a
+    # cache (for `count_cache_timeout` seconds), or from the database's
+    # estimate (counting exactly if the estimate is below
+    # `count_estimate_threshold`); see `get_count`.
+    count_strategy = 'exact'
+    count_cache_timeout = 60
+    count_estimate_threshold = 1000
+
+    # A dictionary mapping kwargs captured from the URL to callables that
+    # convert them to native values; this is provided by the router.
+    kwarg_converters = None
+
+    # A dictionary mapping actions (such as `list`) to the greatest number
+    # of queries a request to each may perform, and whether to "log" or
+    # "raise" when a request performs more (by default, the
+    # `DRF_TOOLBOX_QUERY_BUDGET_MODE` setting, or "log"); see `dispatch`.
+    query_budgets = None
+    query_budget_mode = None
+
+    # Whether to record how long each phase of handling a request takes
+    # (queries, serialization and rendering), reporting it in a
+    # Server-Timing header and to the stats backend; see `dispatch`.
+    server_timing = False
+    timings = None
+
+    # Whether to profile the serialization of each field, reporting the
+    # number of calls, time and queries of each in the
+    # `X-Serialization-Profile` header; see `dispatch`.  This is expensive,
+    # and intended for debugging.
+    profile_serialization = False
+
+    # The number of seconds beyond which sampled requests are logged as
+    # slow, or None to use the `DRF_TOOLBOX_SLOW_REQUEST_THRESHOLD`
+    # setting (by default, not to log them); see `drf_toolbox.slowlog`.
+    slow_request_threshold = None
+
+    # Cache of how to load objects for each viewset and serializer
+    # class; see `_get_loading_plan`.
+    _loading_plans = {}
+
     @cached_property
     def parser_classes(self):
         answer = list(api_settings.DEFAULT_PARSER_CLASSES)
@@ -50,6 +128,45 @@ class ModelViewSet(viewsets.ModelViewSet):
         # Done; return the answer.
         return answer
 
+    def filter_queryset(self, queryset):
+        """Filter the queryset using the configured filter backends, and
+        then adjust which columns are loaded to suit the serializer.
+
+        Expensive fields that the serializer never reads are deferred, and
+        JSON fields that the serializer passes through untouched are loaded
+        as text instead.
+        """
+        queryset = super(ModelViewSet, self).filter_queryset(queryset)
+        if not django_pgfields_installed:
+            return queryset
+
+        # Sanity check: The plan only applies to querysets of the
+        # serializer's model.
+        plan = self._get_loading_plan()
+        if getattr(queryset, 'model', None) is not plan['model']:
+            return queryset
+
+        # Load the text of raw JSON fields instead of the fields themselves.
+        deferred = []
+        if plan['raw_json']:
+            qn = connections[queryset.db].ops.quote_name
+            select = {}
+            for field_name, attname in plan['raw_json'].items():
+                model_field = plan['model']._meta.get_field(field_name)
+                select[attname] = '%s.%s::text' % (
+                    qn(plan['model']._meta.db_table),
+                    qn(model_field.column),
+                )
+                deferred.append(field_name)
+            queryset = queryset.extra(select=select)
+
+        # Defer any other fields that are never read.
+        if self.defer_unread_fields:
+            deferred += plan['defer']
+        if deferred:
+            return queryset.defer(*deferred)
+        return queryset
+
     def get_queryset(self):
         """Return the appropriate queryset.  If we have unexpected keyword
         arguments from the URL, use those as keyword arguments to `.filter()`.
@@ -58,19 +175,306 @@ class ModelViewSet(viewsets.ModelViewSet):
         qs = super(ModelViewSet, self).get_queryset()
 
         # Get the keyword arguments and values, if any.
-        # 
-        # Ignore the viewset's `lookup_field` kwarg if it's sent; this
-        # corresponds to the exact object being asked for, and is handled
-        # later in DRF's processing.
-        filter_kwargs = copy(getattr(self, 'kwargs', {}))
-        filter_kwargs.pop(getattr(self, 'lookup_field', 'pk'), None)
-        filter_kwargs.pop('format', None)
+        filter_kwargs = self._get_filter_kwargs()
+
+        # If we are nested under a parent viewset, filter directly on the
+        # foreign key to the parent rather than joining through the
+        # whole chain of ancestors.
+        parent_lookup = self._get_parent_lookup()
+        if parent_lookup:
+            filter_kwargs = {parent_lookup[0].name: self.get_parent_object()}
+
         if filter_kwargs:
             return qs.filter(**filter_kwargs)
 
         # Return the superclass implementation as is.
         return qs
 
+    def dispatch(self, request, *args, **kwargs):
+        """Dispatch the request to the appropriate handler.
+
+        If the action has a query budget, count the queries performed
+        while handling the request, and complain if there are too many.
+
+        If `server_timing` is set, record the time spent executing queries
+        and the time spent otherwise handling the request (which, for
+        most actions, is serialization), along with the time spent
+        rendering if a DRF Toolbox renderer is used.
+
+        If `profile_serialization` is set, profile the serialization of
+        each field; see `drf_toolbox.profiling`.
+
+        If the request is sampled for slow request logging, record the
+        same timings, and log the request if it is slow; see
+        `drf_toolbox.slowlog`.
+        """
+        action = getattr(self, 'action_map', {}).get(request.method.lower())
+        budget = (self.query_budgets or {}).get(action)
+        threshold = slowlog.get_threshold(self)
+        sampled = slowlog.sample(threshold)
+        if budget is None and not self.server_timing and \
+                            not self.profile_serialization and not sampled:
+            return super(ModelViewSet, self).dispatch(request, *args,
+                                                      **kwargs)
+
+        # Handle the request, counting its queries.
+        name = '%s.%s' % (type(self).__name__, action)
+        if self.server_timing or sampled:
+            self.timings = timing.RequestTimings(name)
+        with queries.QueryCounter(sources=budget is not None) as counter:
+            if self.profile_serialization:
+                with profiling.SerializationProfile() as profile:
+                    response = super(ModelViewSet, self).dispatch(request,
+                        *args, **kwargs
+                    )
+                response[profiling.HEADER] = profile.get_header()
+            else:
+                response = super(ModelViewSet, self).dispatch(request,
+                                                              *args, **kwargs)
+
+        # Report the timings, once the response has been rendered.
+        if self.timings is not None:
+            elapsed = default_timer() - self.timings.started
+            self.timings.add('queryset', counter.duration, len(counter))
+            self.timings.add('serialize', elapsed - counter.duration)
+            if sampled:
+                slowlog.watch(self, request, response, threshold)
+            if self.server_timing:
+                self.timings.finish(response)
+
+        # Enforce the query budget, if any.
+        if budget is not None:
+            queries.enforce_budget(counter, budget,
+                mode=self.query_budget_mode,
+                name=name,
+            )
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        """Convert any kwargs captured from the URL to native values
+        before handling the request, so that querysets and serializers
+        receive integers and UUIDs rather than strings.
+        """
+        if self.kwarg_converters:
+            self.kwargs = copy(self.kwargs)
+            for key, convert in self.kwarg_converters.items():
+                if key not in self.kwargs:
+                    continue
+                try:
+                    self.kwargs[key] = convert(self.kwargs[key])
+                except ValueError:
+                    raise Http404
+        return super(ModelViewSet, self).initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Return the final response object.
+
+        If `conditional_get` is set and the response to a GET request has
+        no ETag yet, give it one derived from the rendered content, and
+        answer with 304 Not Modified if the client already has it.
+        """
+        response = super(ModelViewSet, self).finalize_response(request,
+            response, *args, **kwargs
+        )
+        if (not self.conditional_get or response.status_code != 200 or
+                request.method not in ('GET', 'HEAD') or
+                response.has_header('ETag') or
+                not isinstance(response, Response)):
+            return response
+
+        # Render the response, and derive the ETag from the result.
+        response.render()
+        etag = '"%s"' % hashlib.md5(response.content).hexdigest()
+        if self._is_not_modified(request, etag):
+            response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """Return a list of objects.
+
+        If `conditional_get` is set and the model has a modified field,
+        first determine the number of objects and when the most recent
+        was modified, and answer with 304 Not Modified if the client's
+        copy is still current.
+        """
+        modified_field = self._get_modified_field()
+        if not modified_field:
+            return super(ModelViewSet, self).list(request, *args, **kwargs)
+
+        # Determine the validators for this list.  The loading plan
+        # applied by `filter_queryset` is of no use for an aggregate.
+        queryset = super(ModelViewSet, self).filter_queryset(
+            self.get_queryset(),
+        )
+        aggregate = queryset.aggregate(count=Count('pk'),
+                                       modified=Max(modified_field.name))
+
+        # Last-Modified is deliberately omitted: deleting an object does
+        # not change the most recent modification time.
+        etag = self._get_etag(request, aggregate['count'],
+                                       aggregate['modified'])
+        return self._get_conditional_response(request, etag, None,
+            lambda: super(ModelViewSet, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return a single object.
+
+        If `conditional_get` is set and the model has a modified field,
+        answer with 304 Not Modified before serializing the object if the
+        client's copy is still current.
+        """
+        modified_field = self._get_modified_field()
+        if not modified_field:
+            return super(ModelViewSet, self).retrieve(request, *args,
+                                                      **kwargs)
+
+        # Determine the validators for this object.
+        self.object = self.get_object()
+        modified = getattr(self.object, modified_field.attname)
+        etag = self._get_etag(request, self.object.pk, modified)
+        return self._get_conditional_response(request, etag, modified,
+            lambda: Response(self.get_serializer(self.object).data),
+        )
+
+    def get_cache_models(self):
+        """Return the models whose changes invalidate the responses
+        cached for this viewset: its own model, and the models of any
+        parent objects identified by the URL.
+        """
+        model = self._get_model()
+        answer = [model] if model is not None else []
+
+        # Add the parent model and any of its ancestors.
+        parent_lookup = self._get_parent_lookup()
+        if parent_lookup:
+            fk, parent_kwargs = parent_lookup
+            answer.append(fk.rel.to)
+            for key in sorted(parent_kwargs):
+                related_model = fk.rel.to
+                for field_name in key.split('__')[:-1]:
+                    field = related_model._meta.get_field(field_name)
+                    related_model = field.rel.to
+                    if related_model not in answer:
+                        answer.append(related_model)
+
+        # Done; return the answer.
+        return answer
+
+    def get_child_counts(self, objects):
+        """Return a dictionary mapping the prefix of each child viewset
+        to a dictionary of the number of objects in that child collection,
+        keyed by the primary key of each of the given objects.
+
+        One grouped query is made per child viewset, regardless of the
+        number of objects.  Child viewsets whose model does not have
+        exactly one foreign key to this viewset's model are omitted.
+
+        The objects counted are those the child viewset would list for
+        the current request: its `get_queryset` and `filter_queryset` are
+        used, so any scoping they apply (such as to the requesting user)
+        applies to the counts too.
+        """
+        answer = {}
+        pks = [obj.pk for obj in objects]
+        if not pks:
+            return answer
+
+        for prefix, child_viewset in getattr(self, 'children', {}).items():
+            # Determine the foreign key from the child model to
+            # this viewset's model.
+            fk = self._get_child_foreign_key(child_viewset)
+            if fk is None:
+                continue
+
+            # Count the children of every object at once, as the child
+            # viewset would list them for this request.
+            child = child_viewset(action='list', args=(), kwargs={},
+                                  format_kwarg=None,
+                                  request=getattr(self, 'request', None))
+            queryset = child.filter_queryset(child.get_queryset())
+            rows = queryset.filter(**{'%s__in' % fk.name: pks}).order_by() \
+                           .values(fk.name).annotate(count=Count('pk'))
+            counts = dict([(row[fk.name], row['count']) for row in rows])
+            answer[prefix] = dict([(pk, counts.get(pk, 0)) for pk in pks])
+
+        # Done; return the answer.
+        return answer
+
+    def get_count(self, queryset):
+        """Return the number of objects in the given queryset, according
+        to this viewset's `count_strategy`.
+        """
+        # Sanity check: An empty query has no objects, and need not be
+        # counted, cached or estimated.
+        try:
+            sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+        except EmptyResultSet:
+            return 0
+
+        # Exact counts are just that.
+        if self.count_strategy == 'exact':
+            return queryset.count()
+
+        # Cached counts are keyed by the query being counted, which
+        # reflects every filter that has been applied to it.
+        if self.count_strategy == 'cached':
+            key = 'drf_toolbox:count:%s' % hashlib.md5(
+                repr((queryset.db, sql, params)).encode('utf-8'),
+            ).hexdigest()
+            answer = cache.get(key)
+            if answer is None:
+                answer = queryset.count()
+                cache.set(key, answer, self.count_cache_timeout)
+            return answer
+
+        # Estimated counts come from the query planner, if the database
+        # provides one; small estimates are not worth the inaccuracy.
+        if self.count_strategy == 'estimated':
+            estimate = self._estimate_count(queryset.db, sql, params)
+            if estimate is None or estimate < self.count_estimate_threshold:
+                return queryset.count()
+            return estimate
+
+        # This is not a strategy we know about; complain.
+        raise ValueError('Unknown count strategy: `%s`.' %
+                         self.count_strategy)
+
+    def get_parent_object(self):
+        """Return the object corresponding to the parent viewset, as
+        identified by the kwargs captured from the URL, or None if this
+        viewset is not nested.
+
+        The parent and all of its ancestors are loaded together, with a
+        single query, the first time this is called for a request; the
+        ancestors are available as attributes of the parent without any
+        further queries.  If the chain of objects identified by the URL
+        does not exist, raise Http404.
+        """
+        if not hasattr(self, '_parent_object'):
+            self._parent_object = None
+            parent_lookup = self._get_parent_lookup()
+            if parent_lookup:
+                self._parent_object = self._load_parent_object(*parent_lookup)
+        return self._parent_object
+
+    def paginate_queryset(self, queryset, page_size=None):
+        """Paginate a queryset if required, either returning a page object,
+        or `None` if pagination is not configured for this view.
+
+        Unless this viewset counts objects exactly, the number of objects
+        is obtained from `get_count`, and as it may be approximate, it is
+        only reported: which pages exist is determined by the objects
+        themselves (see `drf_toolbox.pagination.ApproximatePaginator`).
+        """
+        if self.count_strategy != 'exact' and isinstance(queryset, QuerySet):
+            queryset = pagination.CountedQuerySet(queryset, self.get_count)
+            self.paginator_class = pagination.ApproximatePaginator
+        return super(ModelViewSet, self).paginate_queryset(queryset,
+            page_size=page_size,
+        )
+
     def get_serializer(self, instance=None, data=None, files=None, many=False,
                              partial=False):
         """ Return the serializer instance that should be used for validating
@@ -101,7 +505,15 @@ class ModelViewSet(viewsets.ModelViewSet):
 
             # This should correspond to a field on the serializer;
             # mark it as read only and set its value in data.
+            #
+            # If the parent object has already been loaded, use it
+            # rather than its primary key, so that it need not be loaded
+            # again when the object is saved.
             initial[field_name] = lookup_value
+            if getattr(self, '_parent_object', None) is not None:
+                parent_lookup = self._get_parent_lookup()
+                if parent_lookup and parent_lookup[0].name == field_name:
+                    initial[field_name] = self._parent_object
 
         # Sanity check: If we have a non-empty `initial` value, verify
         # that the serializer class understands how to accept it.
@@ -112,6 +524,20 @@ class ModelViewSet(viewsets.ModelViewSet):
                 'to be used with a nested viewset.'
             )
 
+        # If we are asked to, count the objects in each child collection
+        # for every object being serialized.  Serializers which validate
+        # input do not need the counts.
+        if (self.child_endpoint_counts and instance is not None and
+                                data is None and files is None):
+            context['child_counts'] = self.get_child_counts(
+                instance if many else [instance],
+            )
+
+        # Attach the parent object to the objects being serialized, so
+        # that it is not loaded again for each of them.
+        if instance is not None:
+            self._attach_parent_object(instance if many else [instance])
+
         # Now complete the superclass implementation.
         serializer = serializer_class(instance,
             data=data, files=files, initial=initial, many=many,
@@ -128,6 +554,20 @@ class ModelViewSet(viewsets.ModelViewSet):
         # Return the serializer.
         return serializer
 
+    def get_pagination_serializer(self, page):
+        """Return a serializer instance to use with paginated data.
+
+        If `child_endpoint_counts` is set, the number of objects in each
+        child collection is counted for the whole page.
+        """
+        self._attach_parent_object(page.object_list)
+        serializer = super(ModelViewSet, self).get_pagination_serializer(page)
+        if self.child_endpoint_counts:
+            serializer.context['child_counts'] = self.get_child_counts(
+                page.object_list,
+            )
+        return serializer
+
     def get_serializer_context(self):
         answer = super(ModelViewSet, self).get_serializer_context()
         answer['child_endpoints'] = list(getattr(self, 'children', {}).keys())
@@ -151,3 +591,524 @@ class ModelViewSet(viewsets.ModelViewSet):
 
         # Done; return the new context.
         return answer
+
+    def _get_child_foreign_key(self, child_viewset):
+        """Return the foreign key from the given child viewset's model to
+        this viewset's model, or None if there is not exactly one.
+        """
+        model = self._get_model()
+        child_model = getattr(child_viewset, 'model', None)
+        if child_model is None:
+            child_model = getattr(child_viewset.queryset, 'model', None)
+        if model is None or child_model is None:
+            return None
+
+        # Find the foreign keys to this viewset's model.
+        fks = [field for field in child_model._meta.fields
+               if isinstance(field, models.ForeignKey) and
+                  field.rel.to is model]
+        if len(fks) != 1:
+            return None
+        return fks[0]
+
+    def _get_conditional_response(self, request, etag, last_modified,
+                                        get_response):
+        """Return 304 Not Modified if the client's copy, as described by
+        its conditional request headers, matches the given validators.
+        Otherwise, return the response from `get_response`.
+
+        In either case, the validators are set on the response.
+        """
+        # Sanity check: If the object has never been modified, we can
+        # not say anything about when it was.
+        if last_modified is not None:
+            if timezone.is_naive(last_modified):
+                last_modified = timezone.make_aware(last_modified,
+                    timezone.get_default_timezone(),
+                )
+            last_modified = calendar.timegm(last_modified.utctimetuple())
+
+        # Get the response, and set the validators on it.
+        if self._is_not_modified(request, etag, last_modified):
+            response = HttpResponseNotModified()
+        else:
+            response = get_response()
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def _get_etag(self, request, *values):
+        """Return a weak ETag for the representation of the given values
+        at this URL, for this user, in the accepted media type.
+        """
+        key = repr((
+            request.get_full_path(),
+            getattr(request, 'accepted_media_type', None),
+            getattr(request.user, 'pk', None),
+            values,
+        ))
+        return 'W/"%s"' % hashlib.md5(key.encode('utf-8')).hexdigest()
+
+    def _get_filter_kwargs(self):
+        """Return the kwargs captured from the URL that do not identify the
+        exact object being asked for (typically those identifying parent
+        objects).
+        """
+        # Ignore the viewset's `lookup_field` kwarg if it's sent; this
+        # corresponds to the exact object being asked for, and is handled
+        # later in DRF's processing.
+        filter_kwargs = copy(getattr(self, 'kwargs', {}))
+        filter_kwargs.pop(getattr(self, 'lookup_field', 'pk'), None)
+        filter_kwargs.pop('format', None)
+        return filter_kwargs
+
+    def _get_model(self):
+        """Return the model of this viewset's objects, or None if it can
+        not be determined without building the queryset.
+        """
+        model = getattr(self, 'model', None)
+        if model is None:
+            model = getattr(getattr(self, 'queryset', None), 'model', None)
+        return model
+
+    def _get_modified_field(self):
+        """Return the model field recording when each object was last
+        modified, or None if there is none or `conditional_get` is not set.
+        """
+        model = self._get_model()
+        if not self.conditional_get or model is None:
+            return None
+
+        # If the field was specified, use it.
+        if self.modified_field:
+            return model._meta.get_field(self.modified_field)
+
+        # Otherwise, look for the model's `auto_now` DateTimeField.
+        fields = [field for field in model._meta.fields
+                  if isinstance(field, models.DateTimeField) and
+                     getattr(field, 'auto_now', False)]
+        if len(fields) != 1:
+            return None
+        return fields[0]
+
+    def _attach_parent_object(self, objects):
+        """Set the parent object (see `get_parent_object`) as the value
+        of the foreign key to it on each of the given objects, so that
+        reading the foreign key does not load the parent again.
+        """
+        parent_lookup = self._get_parent_lookup()
+        if not parent_lookup:
+            return
+        fk = parent_lookup[0]
+        parent = self.get_parent_object()
+        for obj in objects:
+            if (isinstance(obj, fk.model) and
+                                getattr(obj, fk.attname) == parent.pk):
+                setattr(obj, fk.get_cache_name(), parent)
+
+    def _get_parent_lookup(self):
+        """Return a two-tuple of the foreign key to the parent object,
+        and the lookups that identify the parent object (and its
+        ancestors) relative to the parent model.
+
+        If the kwargs captured from the URL do not identify a parent object
+        through a foreign key on this viewset's model, return None.
+        """
+        filter_kwargs = self._get_filter_kwargs()
+        model = self._get_model()
+
+        # Sanity check: Every kwarg must traverse the same relationship,
+        # and one of them must identify the parent object itself.
+        field_names = set([key.split('__')[0] for key in filter_kwargs])
+        if model is None or len(field_names) != 1:
+            return None
+        field_name = field_names.pop()
+        if '%s__pk' % field_name not in filter_kwargs:
+            return None
+
+        # Sanity check: The relationship must be a foreign key on the model.
+        try:
+            model_field = model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            return None
+        if not isinstance(model_field, models.ForeignKey):
+            return None
+
+        # Done; return the field and the lookups relative to the
+        # parent model.
+        prefix_length = len(field_name) + 2
+        return model_field, dict([(key[prefix_length:], value)
+                                 for key, value in filter_kwargs.items()])
+
+    def _load_parent_object(self, model_field, parent_kwargs):
+        """Load and return the parent object identified by the given
+        foreign key and lookups, along with all of its ancestors, in a
+        single query.
+
+        If no such object exists, raise Http404.
+        """
+        parent_model = model_field.rel.to
+        queryset = parent_model._default_manager.filter(**parent_kwargs)
+
+        # Select every ancestor along with the parent.
+        related = set()
+        for key in parent_kwargs:
+            path = key.split('__')[:-1]
+            if path:
+                related.add('__'.join(path))
+        if related:
+            queryset = queryset.select_related(*sorted(related))
+
+        # Load the parent.
+        try:
+            return queryset.get()
+        except parent_model.DoesNotExist:
+            raise Http404
+
+    def _estimate_count(self, db, sql, params):
+        """Return the query planner's estimate of the number of rows the
+        given query will return, or None if no estimate is available.
+
+        Only PostgreSQL provides estimates at present.
+        """
+        connection = connections[db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        # The first line of the plan describes the top-level node,
+        # including its row estimate.
+        cursor = connection.cursor()
+        try:
+            cursor.execute('EXPLAIN %s' % sql, params)
+            plan = cursor.fetchone()[0]
+        finally:
+            cursor.close()
+        match = re.search(r'rows=([0-9]+)', plan)
+        if not match:
+            return None
+        return int(match.group(1))
+
+    def _is_not_modified(self, request, etag, last_modified=None):
+        """Return True if the client's copy, as described by its
+        conditional request headers, matches the given validators.
+        """
+        # If-None-Match takes precedence over If-Modified-Since.
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return '*' in etags or parse_etags(etag)[0] in etags
+
+        # Fall back to If-Modified-Since.
+        if last_modified is None:
+            return False
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+        )
+        return (if_modified_since is not None and
+                last_modified <= if_modified_since)
+
+    def _get_loading_plan(self):
+        """Return a dictionary describing how objects should be loaded for
+        the serializer in use: its `model`, the expensive fields it never
+        reads (`defer`), and the JSON fields it passes through untouched
+        (`raw_json`).
+
+        This depends only on the serializer class, so it is only worked
+        out once per viewset and serializer class.  Some serializer classes
+        (such as DRF's `DefaultSerializer`) are created afresh on every
+        call to `get_serializer_class`, so the cache is keyed on the
+        serializer's name and model rather than on the class itself.
+        """
+        serializer_class = self.get_serializer_class()
+        model = getattr(serializer_class.Meta, 'model', None)
+        key = (type(self), serializer_class.__module__,
+               serializer_class.__name__, model)
+        if key not in self._loading_plans:
+            plan = {'model': model, 'defer': [], 'raw_json': {}}
+            if issubclass(serializer_class, BaseModelSerializer):
+                serializer = serializer_class()
+                plan['defer'] = serializer.get_deferrable_fields()
+                plan['raw_json'] = serializer.get_raw_json_fields()
+            self._loading_plans[key] = plan
+        return self._loading_plans[key]
+
+
+class BulkModelMixin(object):
+    """Mixin for ModelViewSet subclasses that adds a `bulk` base action,
+    which partially updates (PATCH) or deletes (DELETE) many objects
+    in a single request.
+
+    Objects may be identified by primary key:
+        PATCH   {"1": {"foo": 3}, "2": {"foo": 3, "bar": 4}}
+        DELETE  [1, 2, 3]
+
+    ...or by a filter:
+        PATCH   {"filter": {"bar": 4}, "update": {"foo": 3}}
+        DELETE  {"filter": {"bar": 4}}
+
+    Changes are applied with queryset `update()` and `delete()` calls,
+    in a single transaction, against the queryset from `get_queryset`, so
+    nested URL keyword arguments are honored.  Cached responses which
+    depend on the model are invalidated afterwards.  Note that `pre_save`
+    and object-level permission checks are not run for bulk operations.
+
+    Filters may only refer to serializer fields backed by model fields,
+    using the lookups in `bulk_filter_lookups`, and must not be empty.
+    """
+    # The lookups which may be used in filters.
+    bulk_filter_lookups = ('exact', 'in', 'isnull', 'gt', 'gte', 'lt', 'lte')
+
+    @base_action(['PATCH', 'DELETE'])
+    def bulk(self, request, *args, **kwargs):
+        """Partially update or delete many objects at once, depending on
+        the HTTP method.
+        """
+        if request.method == 'DELETE':
+            return self.bulk_destroy(request, *args, **kwargs)
+        return self.bulk_partial_update(request, *args, **kwargs)
+
+    def bulk_partial_update(self, request, *args, **kwargs):
+        """Apply the changes in the request to the identified objects,
+        and return a summary of how many objects were updated.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer(partial=True)
+        data = request.DATA
+
+        # Determine which changes go to which objects.
+        #
+        # If we got primary keys, group together the objects that are to
+        # receive identical changes, so that each distinct set of changes
+        # costs only one UPDATE statement.
+        try:
+            if not isinstance(data, dict):
+                raise ValidationError('Expected a dictionary.')
+            if 'filter' in data:
+                updates = [(self._get_bulk_filter(serializer, data['filter']),
+                            data.get('update', {}))]
+            else:
+                groups = collections.OrderedDict()
+                for pk, changes in data.items():
+                    key = json.dumps(changes, sort_keys=True)
+                    groups.setdefault(key, (changes, []))[1].append(pk)
+                updates = [({'pk__in': pks}, changes)
+                           for changes, pks in groups.values()]
+
+            # Convert the changes to native values.  This is done once
+            # per group rather than once per object.
+            updates = [(filter_kwargs, self._get_bulk_changes(serializer, c))
+                       for filter_kwargs, c in updates]
+        except ValidationError as ex:
+            return self._bulk_error_response(ex)
+
+        # Apply the updates.
+        count = 0
+        try:
+            with transaction.atomic(using=queryset.db):
+                for filter_kwargs, changes in updates:
+                    if changes:
+                        count += queryset.filter(**filter_kwargs).update(
+                            **changes
+                        )
+        except (FieldError, IntegrityError, TypeError, ValueError) as ex:
+            error = ValidationError(six.text_type(ex))
+            return self._bulk_error_response(error)
+
+        # `update()` sends no signals, so invalidate cached responses
+        # explicitly.
+        if count:
+            invalidate(queryset.model)
+
+        # Done; return a summary.
+        return Response({'updated': count})
+
+    def bulk_destroy(self, request, *args, **kwargs):
+        """Delete the identified objects, and return a summary of how
+        many objects were deleted.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        data = request.DATA
+
+        # Determine which objects should be deleted.
+        try:
+            if isinstance(data, dict) and 'filter' in data:
+                serializer = self.get_serializer()
+                filter_kwargs = self._get_bulk_filter(serializer,
+                                                      data['filter'])
+            elif isinstance(data, (list, tuple)):
+                filter_kwargs = {'pk__in': list(data)}
+            else:
+                raise ValidationError('Expected a list of primary keys, '
+                                      'or a dictionary with a `filter` key.')
+        except ValidationError as ex:
+            return self._bulk_error_response(ex)
+
+        # Delete the objects.
+        try:
+            with transaction.atomic(using=queryset.db):
+                queryset = queryset.filter(**filter_kwargs)
+                count = queryset.count()
+                queryset.delete()
+        except (FieldError, IntegrityError, TypeError, ValueError) as ex:
+            error = ValidationError(six.text_type(ex))
+            return self._bulk_error_response(error)
+
+        # Invalidate cached responses, whether or not the model is
+        # watched for deletions.
+        if count:
+            invalidate(queryset.model)
+
+        # Done; return a summary.
+        return Response({'deleted': count})
+
+    def _bulk_error_response(self, ex):
+        """Return a 400 response describing the given ValidationError."""
+        if hasattr(ex, 'error_dict'):
+            return Response(ex.message_dict,
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({'non_field_errors': ex.messages},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    def _get_bulk_changes(self, serializer, changes):
+        """Return a dictionary of model field names and native values,
+        suitable for sending to `update()`, from the given dictionary of
+        changes.  Raise ValidationError if any changes are invalid.
+        """
+        if not isinstance(changes, dict):
+            raise ValidationError('Expected a dictionary of changes.')
+
+        answer = {}
+        errors = {}
+        for field_name, value in changes.items():
+            # Sanity check: Only simple, writable fields can be updated
+            # in bulk.
+            field = serializer.fields.get(field_name, None)
+            if (field is None or field.read_only or field.source == '*' or
+                                getattr(field, 'many', False)):
+                errors[field_name] = ['This field cannot be updated in bulk.']
+                continue
+
+            # Convert and validate the value.
+            try:
+                native = field.from_native(value)
+                field.validate(native)
+                field.run_validators(native)
+            except ValidationError as ex:
+                errors[field_name] = ex.messages
+                continue
+            answer[field.source or field_name] = native
+
+        # If we got any errors, complain.
+        if errors:
+            raise ValidationError(errors)
+
+        # `update()` does not honor `auto_now`, so set those fields
+        # explicitly.
+        if answer:
+            for model_field in serializer.opts.model._meta.fields:
+                if (not getattr(model_field, 'auto_now', False) or
+                                model_field.name in answer):
+                    continue
+                if isinstance(model_field, models.DateTimeField):
+                    answer[model_field.name] = timezone.now()
+                else:
+                    answer[model_field.name] = datetime.date.today()
+
+        # Done; return the answer.
+        return answer
+
+    def _get_bulk_filter(self, serializer, filter_kwargs):
+        """Return the given filter as keyword arguments to `.filter()`,
+        raising ValidationError if it is empty, or if it refers to
+        anything other than a model field exposed by the serializer, or
+        uses a lookup not in `bulk_filter_lookups`.
+
+        Keys are serializer field names, optionally followed by a lookup
+        (such as `bar__gt`); they are mapped to the field's source.
+        Relations may not be traversed.
+        """
+        if not isinstance(filter_kwargs, dict):
+            raise ValidationError('The filter must be a dictionary.')
+        if not filter_kwargs:
+            raise ValidationError('The filter must not be empty.')
+
+        answer = {}
+        for key, value in filter_kwargs.items():
+            field_name, _, lookup = key.partition('__')
+
+            # Sanity check: The field must be one that the serializer
+            # exposes, and that corresponds directly to a model field.
+            field = serializer.fields.get(field_name, None)
+            source = getattr(field, 'source', None) or field_name
+            if (field is None or getattr(field, 'write_only', False) or
+                                '.' in source or not lookup and '__' in key):
+                raise ValidationError('Unknown filter field: `%s`.' % key)
+            try:
+                serializer.opts.model._meta.get_field(source)
+            except FieldDoesNotExist:
+                raise ValidationError('Unknown filter field: `%s`.' % key)
+
+            # Sanity check: Only the permitted lookups may be used.
+            if lookup and lookup not in self.bulk_filter_lookups:
+                raise ValidationError('Unsupported filter lookup: `%s`.' %
+                                      key)
+            answer['%s__%s' % (source, lookup) if lookup else source] = value
+
+        # Done; return the answer.
+        return answer
+
+
+class KeysetPaginationMixin(object):
+    """Mixin for ModelViewSet subclasses that paginates list results by
+    keyset (cursor) rather than by page number.
+
+    Each page is retrieved with a single query filtering on the values of
+    `keyset_ordering` (by default, the primary key), so retrieving a page
+    deep into a large collection is as cheap as retrieving the first.
+    Pages are identified by an opaque cursor in the `cursor` query
+    parameter, and the `next` and `previous` links in the response carry
+    the appropriate cursors.  No count is provided.
+
+    The fields in `keyset_ordering` may be prefixed with `-` for descending
+    order, must not be null, and replace any other ordering on the
+    queryset.  The primary key is appended if it is not already last.
+    """
+    cursor_kwarg = 'cursor'
+    keyset_ordering = ('pk',)
+    pagination_serializer_class = pagination.KeysetPaginationSerializer
+
+    def get_pagination_serializer(self, page):
+        """Return a serializer instance to use with paginated data, whose
+        links carry cursors in the `cursor_kwarg` query parameter.
+        """
+        serializer = super(KeysetPaginationMixin,
+                           self).get_pagination_serializer(page)
+        serializer.context['cursor_kwarg'] = self.cursor_kwarg
+        return serializer
+
+    def paginate_queryset(self, queryset, page_size=None):
+        """Paginate a queryset if required, either returning a KeysetPage
+        or `None` if pagination is not configured for this view.
+        """
+        # Sanity check: The deprecated page size style can not be
+        # supported here; defer to the superclass.
+        if page_size is not None:
+            return super(KeysetPaginationMixin, self).paginate_queryset(
+                queryset, page_size=page_size,
+            )
+
+        # If pagination is not configured, simply return None.
+        page_size = self.get_paginate_by()
+        if not page_size:
+            return None
+
+        # Retrieve the page.
+        paginator = pagination.KeysetPaginator(queryset, page_size,
+            ordering=self.keyset_ordering,
+        )
+        cursor = self.request.QUERY_PARAMS.get(self.cursor_kwarg)
+        try:
+            return paginator.page(cursor)
+        except pagination.InvalidCursor as ex:
+            raise Http404(six.text_type(ex))
@@ -0,0 +1,107 @@
+from __future__ import absolute_import, unicode_literals
+from django.conf import settings
+from django.core import urlresolvers
+from drf_toolbox import slowlog
+from drf_toolbox.routers import LazyViewSet
+from drf_toolbox.serializers import ModelSerializer
+from drf_toolbox.viewsets import ModelViewSet
+import logging
+
+
+__all__ = ('warm_up',)
+
+
+logger = logging.getLogger('drf_toolbox.warmup')
+
+
+def warm_up(routers=None, urlconf=None):
+    """Do the work that would otherwise slow down the first requests
+    handled by a process, and return the list of viewsets warmed up.
+
+    For every viewset registered with the given routers (by default, the
+    root DRF Toolbox router) or their children, importing any registered
+    lazily, work out how its objects are loaded, and build its serializer
+    and the serializers of related objects nested within it.  Then build
+    each router's URL patterns, and compile and index every URL pattern
+    in the given URLconf (by default, `ROOT_URLCONF`).
+
+    No queries are performed, so this is safe to call before forking
+    worker processes (for instance, from a WSGI module loaded by a
+    server which preloads the application), in which case the workers
+    share the warmed state.
+    """
+    # Import the URLconf first, as it usually creates the routers.
+    if urlconf is None:
+        urlconf = getattr(settings, 'ROOT_URLCONF', None)
+    resolver = None
+    if urlconf is not None:
+        resolver = urlresolvers.get_resolver(urlconf)
+        resolver.url_patterns
+
+    # Warm up every viewset, then build the URL patterns for every router.
+    if routers is None:
+        routers = [getattr(ModelSerializer, '_router', None)]
+    answer = []
+    for router in [r for r in routers if r is not None]:
+        for viewset in _get_viewsets(router):
+            if _warm_up_viewset(viewset):
+                answer.append(viewset)
+        for pattern in router.urls:
+            pattern.regex
+
+    # Compile every URL pattern, and build the indexes used to resolve
+    # and reverse URLs.
+    if resolver is not None:
+        _warm_up_resolver(resolver)
+        resolver.reverse_dict
+
+    # Done; return the answer.
+    return answer
+
+
+def _get_viewsets(router):
+    """Yield every viewset registered with the given router or its
+    children, importing any which were registered lazily.
+    """
+    for prefix, viewset, base_name in router.registry:
+        if isinstance(viewset, LazyViewSet):
+            viewset = viewset.resolve()
+        yield viewset
+    for prefix, child in sorted(router.children.items()):
+        for viewset in _get_viewsets(child):
+            yield viewset
+
+
+def _warm_up_resolver(resolver):
+    """Compile the regular expression of every URL pattern within the
+    given resolver.
+    """
+    for pattern in resolver.url_patterns:
+        pattern.regex
+        if isinstance(pattern, urlresolvers.RegexURLResolver):
+            _warm_up_resolver(pattern)
+
+
+def _warm_up_viewset(viewset):
+    """Work out how the given viewset loads its objects, and build its
+    serializer, including related serializers.
+
+    Return True if the viewset was warmed up; log a warning and return
+    False if it could not be (for instance, because it chooses its
+    serializer based on the request).
+    """
+    # Sanity check: Only DRF Toolbox viewsets have anything to warm up.
+    if not issubclass(viewset, ModelViewSet):
+        return False
+
+    # Instantiate the viewset as `as_view` would, but without a request.
+    view = viewset(action=None, args=(), format_kwarg=None, kwargs={},
+                   request=None)
+    try:
+        view._get_loading_plan()
+        slowlog.get_field_tree(view.get_serializer())
+    except Exception:
+        logger.warning('Could not warm up %s.', viewset.__name__,
+                       exc_info=True)
+        return False
+    return True
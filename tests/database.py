@@ -0,0 +1,46 @@
+from __future__ import absolute_import, unicode_literals
+from django.core.management.color import no_style
+from django.db import connection
+import unittest
+
+
+def create_tables(models):
+    """Create the database tables for the given models, in order."""
+    style = no_style()
+    known_models = set()
+    cursor = connection.cursor()
+    for model in models:
+        statements, _ = connection.creation.sql_create_model(model, style,
+                                                              known_models)
+        for statement in statements:
+            cursor.execute(statement)
+        known_models.add(model)
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Base class for tests which use the (in-memory) test database.
+
+    The tables for the models in `models` are created the first time
+    they are needed, and emptied after each test.
+    """
+    models = ()
+
+    # The models whose tables have been created, shared by every test.
+    _created_models = set()
+
+    def setUp(self):
+        super(DatabaseTestCase, self).setUp()
+        create_tables([model for model in self.models
+                       if model not in self._created_models])
+        self._created_models.update(self.models)
+        self.addCleanup(self._empty_tables)
+
+    def _empty_tables(self):
+        """Delete every row from the tables of the models in `models`,
+        without cascading to the tables of any other models.
+        """
+        cursor = connection.cursor()
+        for model in reversed(self.models):
+            cursor.execute('DELETE FROM %s' % connection.ops.quote_name(
+                model._meta.db_table,
+            ))
@@ -0,0 +1,22 @@
+from __future__ import absolute_import, unicode_literals
+from rest_framework import mixins, viewsets as drf_viewsets
+from rest_framework.decorators import link
+from tests import views
+
+
+class NormalViewSet(views.NormalViewSet):
+    base_name = 'normal'
+
+
+class ChildViewSet(views.ChildViewSet):
+    pass
+
+
+class ListOnlyViewSet(mixins.ListModelMixin, drf_viewsets.GenericViewSet):
+    model = views.NormalViewSet.model
+
+
+class LinkViewSet(views.NormalViewSet):
+    @link()
+    def bacon(self, request, pk=None):
+        pass
@@ -55,6 +55,26 @@ class CreatedModel(models.Model):
         app_label = 'tests'
 
 
+class ModifiedModel(models.Model):
+    foo = models.IntegerField()
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class SluggedModel(models.Model):
+    name = models.CharField(max_length=50)
+    slug = models.CharField(max_length=50)
+
+    def save(self, *args, **kwargs):
+        self.slug = self.name.lower().replace(' ', '-')
+        return super(SluggedModel, self).save(*args, **kwargs)
+
+    class Meta:
+        app_label = 'tests'
+
+
 if django_pgfields_installed:
     with mock.patch.multiple(models.CompositeField,
                              create_type=mock.DEFAULT,
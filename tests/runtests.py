@@ -16,9 +16,16 @@ def load_tests(loader, standard_tests, throwaway):
     )
 
 
-# Configure basic settings.
+# Configure basic settings.  Tests which need a database use an
+# in-memory one (see `tests.database`).
 settings.configure(
     ALLOWED_HOSTS=['testserver'],
+    DATABASES={
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+    },
     REST_FRAMEWORK={
         'DEFAULT_MODEL_SERIALIZER_CLASS': 
             'drf_toolbox.serializers.ModelSerializer',
@@ -0,0 +1,165 @@
+from __future__ import absolute_import, unicode_literals
+from benchmarks.base import Benchmark, median, median_interval
+from benchmarks.base import run_benchmark, self_timed
+from benchmarks.compare import compare
+import unittest
+
+
+class MedianTests(unittest.TestCase):
+    """A set of tests to establish that medians and their confidence
+    intervals are calculated correctly.
+    """
+    def test_median(self):
+        self.assertEqual(median([3, 1, 2]), 2)
+        self.assertEqual(median([4, 1, 3, 2]), 2.5)
+
+    def test_interval_few_values(self):
+        """Establish that with too few values for the requested
+        confidence, the interval spans all of them.
+        """
+        self.assertEqual(median_interval([5, 1, 3, 2, 4]), (1, 5))
+
+    def test_interval(self):
+        """Establish that the interval is narrowed to the appropriate
+        order statistics as values are added.
+        """
+        self.assertEqual(median_interval(range(0, 10)), (1, 8))
+        self.assertEqual(median_interval(range(0, 20)), (5, 14))
+        self.assertEqual(median_interval(range(0, 20), confidence=0.5),
+                         (7, 12))
+
+
+class RunBenchmarkTests(unittest.TestCase):
+    """A set of tests to establish that benchmarks are timed
+    as expected.
+    """
+    def test_self_timed(self):
+        """Establish that a self-timed benchmark is called once per
+        timing, and that the timings it returns are recorded.
+        """
+        timings = iter([9.0, 1.0, 2.0, 3.0])
+
+        class SelfTimedBenchmark(Benchmark):
+            def bench_foo(self):
+                return self_timed(lambda: next(timings))
+
+        answer = run_benchmark(SelfTimedBenchmark(), 'bench_foo', {},
+                               repeat=3)
+        self.assertEqual(answer['times'], [1.0, 2.0, 3.0])
+        self.assertEqual(answer['median'], 2.0)
+        self.assertEqual(answer['number'], 1)
+        self.assertEqual(answer['queries'], 0)
+        self.assertIsNone(answer['threshold'])
+
+    def test_self_timed_min_time(self):
+        """Establish that a self-timed benchmark is called until its
+        timings add up to `repeat * min_time` seconds, up to a limit.
+        """
+        class SelfTimedBenchmark(Benchmark):
+            threshold = 50.0
+
+            def bench_foo(self, duration):
+                return self_timed(lambda: duration)
+
+        for duration, count in ((0.1, 3), (0.04, 8), (0.001, 15)):
+            answer = run_benchmark(SelfTimedBenchmark(), 'bench_foo',
+                                   {'duration': duration},
+                                   min_time=0.1, repeat=3)
+            self.assertEqual(len(answer['times']), count)
+            self.assertEqual(answer['threshold'], 50.0)
+
+
+class CompareTests(unittest.TestCase):
+    """A set of tests to establish that benchmark results are compared
+    against the baseline as expected.
+    """
+    def _results(self, times, queries=1, **environment):
+        return {
+            'benchmarks': {'foo': {'queries': queries, 'times': times}},
+            'environment': environment,
+        }
+
+    def test_unchanged(self):
+        """Establish that identical results do not regress."""
+        results = self._results([1.0, 1.1, 1.2, 1.3, 1.4])
+        self.assertEqual(compare(results, results), ([], []))
+
+    def test_slower(self):
+        """Establish that consistently slower timings are
+        a regression.
+        """
+        regressions, _ = compare(self._results([1.0, 1.1, 1.2, 1.3, 1.4]),
+                                 self._results([2.0, 2.1, 2.2, 2.3, 2.4]))
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('83.3% slower', regressions[0])
+
+    def test_slower_within_threshold(self):
+        """Establish that slower timings within the threshold are not
+        a regression.
+        """
+        self.assertEqual(compare(self._results([1.0, 1.0, 1.0]),
+                                 self._results([1.2, 1.2, 1.2])), ([], []))
+
+    def test_slower_overlapping(self):
+        """Establish that slower timings whose confidence interval
+        overlaps with the baseline's are not a regression.
+        """
+        self.assertEqual(compare(self._results([1.0, 1.0, 3.0]),
+                                 self._results([2.0, 2.0, 2.0])), ([], []))
+
+    def test_slower_own_threshold(self):
+        """Establish that a benchmark's own threshold is used in place
+        of the one given.
+        """
+        baseline = self._results([1.0, 1.0, 1.0])
+        current = self._results([1.4, 1.4, 1.4])
+        self.assertEqual(len(compare(baseline, current)[0]), 1)
+        current['benchmarks']['foo']['threshold'] = 50.0
+        self.assertEqual(compare(baseline, current), ([], []))
+
+    def test_missing(self):
+        """Establish that benchmarks in the baseline which should have
+        been run, but were not, are a regression.
+        """
+        baseline = self._results([1.0])
+        baseline['benchmarks']['bar'] = {'queries': 0, 'times': [1.0]}
+        current = self._results([1.0])
+        self.assertEqual(compare(baseline, current),
+                         (['bar: in the baseline, but not run.'], []))
+        self.assertEqual(compare(baseline, current, pattern='foo'),
+                         ([], []))
+
+    def test_missing_other_environment(self):
+        """Establish that benchmarks missing from results recorded in a
+        different environment are only noted.
+        """
+        baseline = self._results([1.0], python='2.7')
+        baseline['benchmarks']['bar'] = {'queries': 0, 'times': [1.0]}
+        regressions, notes = compare(baseline,
+                                     self._results([1.0], python='3.3'))
+        self.assertEqual(regressions, [])
+        self.assertEqual(notes[1], 'bar: in the baseline, but not run.')
+
+    def test_queries(self):
+        """Establish that any change in the number of queries is
+        a regression, regardless of timing.
+        """
+        for queries in (1, 3):
+            regressions, _ = compare(self._results([1.0], queries=2),
+                                     self._results([1.0], queries=queries))
+            self.assertEqual(regressions, [
+                'foo: %d queries, expected 2.' % queries,
+            ])
+
+    def test_notes(self):
+        """Establish that new benchmarks and different environments are
+        noted, but are not regressions.
+        """
+        baseline = self._results([1.0], python='2.7')
+        current = self._results([1.0], python='3.3')
+        current['benchmarks']['bar'] = {'queries': 0, 'times': [1.0]}
+        regressions, notes = compare(baseline, current)
+        self.assertEqual(regressions, [])
+        self.assertEqual(len(notes), 2)
+        self.assertIn('python=2.7', notes[0])
+        self.assertEqual(notes[1], 'bar: not in the baseline.')
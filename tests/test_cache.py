@@ -0,0 +1,331 @@
+from __future__ import absolute_import, unicode_literals
+from django.core.cache import cache as django_cache
+from django.db.models import signals
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+from drf_toolbox import cache
+from drf_toolbox.decorators import base_action, cache_response
+from drf_toolbox.routers import Router
+from drf_toolbox.viewsets import BulkModelMixin, ModelViewSet
+from rest_framework.response import Response
+from tests import models as test_models
+from tests.compat import mock
+from tests.database import DatabaseTestCase
+from tests.views import GrandchildViewSet, NormalViewSet
+import json
+import unittest
+
+
+class SluggedViewSet(ModelViewSet):
+    model = test_models.SluggedModel
+
+    @cache_response(60)
+    def list(self, request, *args, **kwargs):
+        return super(SluggedViewSet, self).list(request, *args, **kwargs)
+
+
+class CachedChildViewSet(ModelViewSet):
+    model = test_models.ChildModel
+
+    @cache_response(60)
+    def list(self, request, *args, **kwargs):
+        return super(CachedChildViewSet, self).list(request, *args,
+                                                    **kwargs)
+
+
+class ResponseCacheTests(unittest.TestCase):
+    """A set of tests to establish that responses are cached and
+    invalidated as expected.
+    """
+    def setUp(self):
+        django_cache.clear()
+        self.calls = []
+        calls = self.calls
+
+        class ViewSet(NormalViewSet):
+            @base_action(['GET', 'POST'], cache_timeout=60)
+            def special(self, request):
+                calls.append(request.method)
+                return Response({'calls': len(calls)})
+
+            @cache_response(60)
+            def retrieve(self, request, *args, **kwargs):
+                calls.append(request.method)
+                return Response({'pk': kwargs['pk']}, status=202)
+
+        self.view = ViewSet.as_view({'get': 'special', 'post': 'special'})
+        self.detail_view = ViewSet.as_view({'get': 'retrieve'})
+        self.rf = RequestFactory()
+
+    def _get(self, path='/normal/special/', view=None, **headers):
+        headers.setdefault('HTTP_ACCEPT', 'application/json')
+        response = (view or self.view)(self.rf.get(path, **headers))
+        return json.loads(response.content.decode('utf-8'))
+
+    def test_cached(self):
+        """Establish that a second GET request is answered from
+        the cache.
+        """
+        self.assertEqual(self._get(), {'calls': 1})
+        self.assertEqual(self._get(), {'calls': 1})
+        self.assertEqual(self.calls, ['GET'])
+
+    def test_varies(self):
+        """Establish that requests with different query strings or
+        media types are cached separately.
+        """
+        self._get()
+        self._get('/normal/special/?foo=bar')
+        self._get(HTTP_ACCEPT='application/json; indent=4')
+        self.assertEqual(len(self.calls), 3)
+
+    def test_not_cached(self):
+        """Establish that POST requests and unsuccessful responses are
+        not cached.
+        """
+        for i in range(0, 2):
+            self.view(self.rf.post('/normal/special/',
+                                   HTTP_ACCEPT='application/json'))
+            self.detail_view(self.rf.get('/normal/1/',
+                                         HTTP_ACCEPT='application/json'),
+                             pk=1)
+        self.assertEqual(self.calls, ['POST', 'GET', 'POST', 'GET'])
+
+    def test_invalidate(self):
+        """Establish that saving an instance of the viewset's model
+        invalidates cached responses.
+        """
+        self._get()
+        signals.post_save.send(sender=test_models.NormalModel,
+                               instance=test_models.NormalModel(id=1),
+                               created=False)
+        self.assertEqual(self._get(), {'calls': 2})
+
+    def test_base_action_route_kwargs(self):
+        """Establish that `cache_timeout` is not passed on to the route."""
+        @base_action(['GET'], cache_timeout=60, foo='bar')
+        def special(self, request):
+            pass
+        self.assertEqual(special.base_http_methods, ['GET'])
+        self.assertEqual(special.kwargs, {'foo': 'bar'})
+
+    def test_get_cache_models(self):
+        """Establish that nested viewsets depend on their own model and
+        those of all of their ancestors.
+        """
+        vs = GrandchildViewSet(kwargs={'child__pk': 1,
+                                       'child__normal__pk': 2})
+        self.assertEqual(vs.get_cache_models(), [
+            test_models.GrandchildModel,
+            test_models.ChildModel,
+            test_models.NormalModel,
+        ])
+
+
+class BulkInvalidationTests(DatabaseTestCase):
+    """A set of tests to establish that bulk updates and deletes, which
+    send no signals for each object, invalidate cached responses, and
+    that other such changes can be made to do so with `invalidate`.
+    """
+    models = (test_models.NormalModel, test_models.ChildModel,
+              test_models.GrandchildModel, test_models.RelatedModel)
+
+    class ViewSet(BulkModelMixin, ModelViewSet):
+        model = test_models.NormalModel
+
+        @cache_response(60)
+        def list(self, request, *args, **kwargs):
+            return super(BulkInvalidationTests.ViewSet, self).list(
+                request, *args, **kwargs
+            )
+
+    def setUp(self):
+        super(BulkInvalidationTests, self).setUp()
+        django_cache.clear()
+        for i in range(0, 2):
+            test_models.NormalModel.objects.create(foo=0, bar=i, baz=i,
+                                                   bacon=i)
+        self.rf = RequestFactory()
+        self.list_view = self.ViewSet.as_view({'get': 'list'})
+        self.bulk_view = self.ViewSet.as_view({'patch': 'bulk',
+                                               'delete': 'bulk'})
+
+    def _list(self):
+        response = self.list_view(self.rf.get('/normal/',
+                                              HTTP_ACCEPT='application/json'))
+        return [row['foo'] for row in
+                json.loads(response.content.decode('utf-8'))]
+
+    def _bulk(self, method, data):
+        request = getattr(self.rf, method)('/normal/bulk/',
+            data=json.dumps(data),
+            content_type='application/json',
+            HTTP_ACCEPT='application/json',
+        )
+        response = self.bulk_view(request)
+        self.assertEqual(response.status_code, 200)
+
+    def test_bulk_update(self):
+        self.assertEqual(self._list(), [0, 0])
+        self._bulk('patch', {'filter': {'bar': 1}, 'update': {'foo': 5}})
+        self.assertEqual(self._list(), [0, 5])
+
+    def test_bulk_destroy(self):
+        """Establish that bulk deletes invalidate cached responses even
+        if no signals are sent for the deleted objects (as is the case
+        when Django can delete them without loading them).
+        """
+        self.assertEqual(self._list(), [0, 0])
+        with mock.patch.object(signals.post_delete, 'send'):
+            self._bulk('delete', {'filter': {'bar': 1}})
+        self.assertEqual(self._list(), [0])
+
+    def test_invalidate(self):
+        """Establish that changes which send no signals, such as queryset
+        updates, are reflected once `invalidate` is called for the model.
+        """
+        self.assertEqual(self._list(), [0, 0])
+        test_models.NormalModel.objects.filter(bar=1).update(foo=5)
+        self.assertEqual(self._list(), [0, 0])
+        cache.invalidate(test_models.NormalModel)
+        self.assertEqual(self._list(), [0, 5])
+
+
+class RegistrationWatchTests(DatabaseTestCase):
+    """A set of tests to establish that changes invalidate cached
+    responses from the moment their viewsets are registered, rather than
+    from the first GET request.
+    """
+    models = (test_models.SluggedModel,)
+
+    def setUp(self):
+        super(RegistrationWatchTests, self).setUp()
+        django_cache.clear()
+
+        # Start from a state in which nothing is watched.
+        patcher = mock.patch.object(cache, '_watched', set())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self._unwatch()
+        self.addCleanup(self._unwatch)
+
+    def _unwatch(self):
+        for signal in (signals.post_save, signals.post_delete):
+            signal.disconnect(sender=test_models.SluggedModel,
+                              dispatch_uid='drf_toolbox.cache.tests.'
+                                           'SluggedModel')
+
+    def _save_invalidates(self):
+        """Save a new object, and return True if doing so changed the
+        generation of its model (discarding any responses cached under
+        the old one, in this process or any other), False otherwise.
+        """
+        before = cache.get_generations([test_models.SluggedModel])
+        test_models.SluggedModel.objects.create(name='Foo')
+        return cache.get_generations([test_models.SluggedModel]) != before
+
+    def test_register(self):
+        """Establish that a save made before any GET request invalidates
+        the cached responses of a registered viewset.
+        """
+        router = Router()
+        router.register('slugged', SluggedViewSet)
+        self.assertTrue(self._save_invalidates())
+
+    def test_register_lazy(self):
+        """Establish that the models of a lazily registered viewset are
+        watched once it has been imported.
+        """
+        router = Router(lazy=True)
+        router.register('slugged', 'tests.test_cache.SluggedViewSet',
+                        base_name='slugged', lookup_type='int')
+        self.assertFalse(self._save_invalidates())
+        router.resolve_viewsets()
+        self.assertTrue(self._save_invalidates())
+
+    def test_register_nested(self):
+        """Establish that the models of the viewsets that a caching
+        viewset is nested beneath are watched too.
+        """
+        router = Router()
+        router.register('normal', NormalViewSet)
+        with mock.patch.object(cache, 'watch') as watch:
+            router.register('normal/child', CachedChildViewSet)
+        watch.assert_any_call(test_models.ChildModel)
+        watch.assert_any_call(test_models.NormalModel)
+
+    def test_register_uncached(self):
+        """Establish that the models of viewsets which cache nothing are
+        not watched.
+        """
+        router = Router()
+        with mock.patch.object(cache, 'watch') as watch:
+            router.register('normal', NormalViewSet)
+        self.assertFalse(watch.called)
+
+
+class RecordingBus(cache.LocalBus):
+    """An invalidation bus which records the messages published to it."""
+    def __init__(self):
+        super(RecordingBus, self).__init__()
+        self.messages = []
+
+    def publish(self, labels):
+        self.messages.append(labels)
+        super(RecordingBus, self).publish(labels)
+
+
+class InvalidationGraphTests(unittest.TestCase):
+    """A set of tests to establish that changes to nested objects
+    invalidate their ancestors, as determined by the router.
+    """
+    def setUp(self):
+        django_cache.clear()
+        for patcher in (mock.patch.dict(cache._ancestors, clear=True),
+                        mock.patch.object(cache, '_bus', None)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_router_dependencies(self):
+        """Establish that registering nested viewsets records their
+        models as dependencies of their ancestors' models.
+        """
+        router = Router()
+        router.register('normal', 'tests.views.NormalViewSet')
+        router.register('normal/child', 'tests.views.ChildViewSet')
+        router.register('normal/child/grandchild',
+                        'tests.views.GrandchildViewSet')
+        self.assertEqual(cache.get_ancestors(test_models.GrandchildModel),
+                         ['tests.ChildModel', 'tests.NormalModel'])
+        self.assertEqual(cache.get_ancestors(test_models.ChildModel),
+                         ['tests.NormalModel'])
+        self.assertEqual(cache.get_ancestors(test_models.NormalModel), [])
+
+    def test_invalidate_ancestors(self):
+        """Establish that invalidating a model changes the generations
+        of its ancestors, but not of its descendants.
+        """
+        cache.add_dependency(test_models.ChildModel, test_models.NormalModel)
+        models = (test_models.ChildModel, test_models.NormalModel,
+                  test_models.GrandchildModel)
+        before = cache.get_generations(models)
+        cache.invalidate(test_models.ChildModel)
+        after = cache.get_generations(models)
+        self.assertNotEqual(before[0], after[0])
+        self.assertNotEqual(before[1], after[1])
+        self.assertEqual(before[2], after[2])
+
+    @override_settings(
+        DRF_TOOLBOX_INVALIDATION_BUS='tests.test_cache.RecordingBus',
+    )
+    def test_pluggable_bus(self):
+        """Establish that a bus may be specified in settings, and that
+        invalidations are published to it as model labels.
+        """
+        cache.add_dependency(test_models.ChildModel, test_models.NormalModel)
+        signals.post_delete.send(sender=test_models.ChildModel,
+                                 instance=test_models.ChildModel(id=1))
+        bus = cache.get_bus()
+        self.assertEqual(type(bus).__name__, 'RecordingBus')
+        self.assertEqual(bus.messages,
+                         [['tests.ChildModel', 'tests.NormalModel']])
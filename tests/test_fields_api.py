@@ -57,6 +57,23 @@ class APIEndpointTests(unittest.TestCase):
             'bar': 'http://testserver/normal/%s/bar/' % m.id,
         })
 
+    def test_child_endpoint_counts(self):
+        """Establish that if `child_counts` is present on the request's
+        context, that the counted endpoints include their counts.
+        """
+        m = NormalModel(id=42)
+        with mock.patch.dict(self.aef.context, child_endpoints={'foo', 'bar'},
+                             child_counts={'foo': {42: 3}}):
+            endpoints = self.aef.field_to_native(m, 'irrelevant')
+        self.assertEqual(endpoints, {
+            'self': 'http://testserver/normal/%s/' % m.id,
+            'foo': {
+                'url': 'http://testserver/normal/%s/foo/' % m.id,
+                'count': 3,
+            },
+            'bar': 'http://testserver/normal/%s/bar/' % m.id,
+        })
+
     def test_unhonored_child_endpoints(self):
         """Establish that if a field is initialized and child endpoints
         are not yet present, that we do not honor them if they show up
@@ -1,7 +1,7 @@
 from __future__ import absolute_import, unicode_literals
 from datetime import datetime, date, time, timedelta
-from drf_toolbox.renderers.json import JSONEncoder
 from drf_toolbox.utils import json
+from drf_toolbox.utils.json import JSONEncoder, RawJSON
 from sdict import adict
 import decimal
 import pytz
@@ -104,3 +104,30 @@ class JSONTests(unittest.TestCase):
                 yield 5
                 yield 6
         self.assertEqual(json.dumps(Foo()), '[4, 5, 6]')
+
+    def test_dumps_raw_json(self):
+        """Establish that RawJSON fragments are included in the output
+        verbatim.
+        """
+        d = {'a': RawJSON('{"b": [1, 2]}'), 'c': [RawJSON('null'), 'd']}
+        self.assertEqual(
+            json.dumps(d, sort_keys=True),
+            '{"a": {"b": [1, 2]}, "c": [null, "d"]}',
+        )
+
+    def test_dump_raw_json(self):
+        """Establish that RawJSON fragments are included verbatim when
+        dumping to a file-like object.
+        """
+        f = six.StringIO()
+        json.dump([RawJSON('{"b": 1}'), RawJSON('[2]')], f)
+        self.assertEqual(f.getvalue(), '[{"b": 1}, [2]]')
+
+    def test_dumps_placeholder_lookalike(self):
+        """Establish that a string which looks like a RawJSON placeholder,
+        but does not correspond to a fragment, is left alone.
+        """
+        encoder = JSONEncoder()
+        placeholder = encoder.default(RawJSON('1')).replace('_0__', '_9__')
+        self.assertEqual(json.dumps([RawJSON('1'), placeholder]),
+                         '[1, "%s"]' % placeholder)
@@ -0,0 +1,76 @@
+from __future__ import absolute_import, unicode_literals
+from drf_toolbox import renderers, serializers
+from drf_toolbox.renderers import json as json_renderers
+from drf_toolbox.serializers import base
+from drf_toolbox.utils import lazy
+from rest_framework import serializers as drf_serializers
+from tests.compat import mock
+import sys
+import types
+import unittest
+
+
+class LazyModuleTests(unittest.TestCase):
+    """A set of tests to establish that lazy modules import the names
+    they export when they are first looked up.
+    """
+    def setUp(self):
+        self.module = lazy.LazyModule('tests.lazy_module',
+            exports={'JSONRenderer': 'drf_toolbox.renderers.json'},
+            fallbacks=('rest_framework.serializers',
+                       'drf_toolbox.serializers.base'),
+        )
+
+    def test_exports(self):
+        """Establish that exported names are looked up in the module
+        that provides them, and then set on the lazy module.
+        """
+        self.assertNotIn('JSONRenderer', self.module.__dict__)
+        self.assertIs(self.module.JSONRenderer, json_renderers.JSONRenderer)
+        self.assertIn('JSONRenderer', self.module.__dict__)
+
+    def test_fallbacks(self):
+        """Establish that other names are looked up in the fallback
+        modules, the last taking precedence.
+        """
+        self.assertIs(self.module.ModelSerializer, base.ModelSerializer)
+        self.assertIs(self.module.CharField, drf_serializers.CharField)
+
+    def test_missing(self):
+        """Establish that names which are private, or which no module
+        exports, raise AttributeError.
+        """
+        for name in ('Bogus', '_get_declared_fields', '__wrapped__'):
+            with self.assertRaises(AttributeError):
+                getattr(self.module, name)
+
+    def test_all(self):
+        self.assertIn('JSONRenderer', self.module.__all__)
+        self.assertIn('ModelSerializer', self.module.__all__)
+        self.assertIn('CharField', dir(self.module))
+        self.assertNotIn('_get_declared_fields', self.module.__all__)
+
+    def test_install(self):
+        """Establish that installing a lazy module replaces the module
+        in `sys.modules`, keeping what was already set on it.
+        """
+        module = types.ModuleType(str('tests.lazy_module'))
+        module.foo = 'bar'
+        with mock.patch.dict(sys.modules, {'tests.lazy_module': module}):
+            answer = lazy.install('tests.lazy_module',
+                exports={'JSONRenderer': 'drf_toolbox.renderers.json'},
+            )
+            self.assertIs(sys.modules['tests.lazy_module'], answer)
+        self.assertIsInstance(answer, lazy.LazyModule)
+        self.assertEqual(answer.foo, 'bar')
+        self.assertIs(answer.JSONRenderer, json_renderers.JSONRenderer)
+
+    def test_packages(self):
+        """Establish that the renderers and serializers packages still
+        provide everything they did.
+        """
+        self.assertIs(renderers.JSONRenderer, json_renderers.JSONRenderer)
+        self.assertTrue(hasattr(renderers, 'APIRenderer'))
+        self.assertIs(serializers.ModelSerializer, base.ModelSerializer)
+        self.assertTrue(hasattr(serializers, 'RelatedField'))
+        self.assertIs(serializers.Serializer, drf_serializers.Serializer)
@@ -0,0 +1,153 @@
+from __future__ import absolute_import, unicode_literals
+from django.http import Http404
+from django.test.client import RequestFactory
+from drf_toolbox import pagination
+from drf_toolbox.viewsets import KeysetPaginationMixin, ModelViewSet
+from rest_framework.request import Request
+from tests import models as test_models
+from tests.compat import mock
+import unittest
+
+
+class KeysetPaginatorTests(unittest.TestCase):
+    """A set of tests to establish that the keyset paginator retrieves
+    the expected pages and produces usable cursors.
+    """
+    def setUp(self):
+        self.queryset = mock.MagicMock()
+        self.queryset.model = test_models.NormalModel
+        self.objects = [test_models.NormalModel(id=i, foo=i % 2)
+                        for i in range(1, 6)]
+
+    def _set_results(self, queryset, results):
+        queryset.__getitem__.return_value = results
+
+    def test_first_page(self):
+        """Establish that the first page is ordered by primary key,
+        and has a next cursor but no previous cursor.
+        """
+        ordered = self.queryset.order_by.return_value
+        self._set_results(ordered, self.objects[0:3])
+        paginator = pagination.KeysetPaginator(self.queryset, 2)
+        page = paginator.page()
+        self.queryset.order_by.assert_called_once_with('pk')
+        ordered.__getitem__.assert_called_once_with(slice(None, 3))
+        self.assertEqual(page.object_list, self.objects[0:2])
+        self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+        self.assertEqual(paginator.decode_cursor(page.next_cursor),
+                         (True, [2]))
+
+    def test_next_page(self):
+        """Establish that a next cursor filters on the primary key of
+        the last object seen.
+        """
+        paginator = pagination.KeysetPaginator(self.queryset, 2)
+        filtered = self.queryset.order_by.return_value.filter.return_value
+        self._set_results(filtered, self.objects[2:4])
+        page = paginator.page(paginator.encode_cursor(True, [2]))
+        q = self.queryset.order_by.return_value.filter.call_args[0][0]
+        self.assertEqual(q.children, [('pk__gt', 2)])
+        self.assertEqual(page.object_list, self.objects[2:4])
+        self.assertFalse(page.has_next())
+        self.assertEqual(paginator.decode_cursor(page.previous_cursor),
+                         (False, [3]))
+
+    def test_previous_page(self):
+        """Establish that a previous cursor retrieves objects in reverse,
+        and returns them in the expected order.
+        """
+        paginator = pagination.KeysetPaginator(self.queryset, 2)
+        filtered = self.queryset.order_by.return_value.filter.return_value
+        self._set_results(filtered, [self.objects[1], self.objects[0]])
+        page = paginator.page(paginator.encode_cursor(False, [3]))
+        self.queryset.order_by.assert_called_once_with('-pk')
+        q = self.queryset.order_by.return_value.filter.call_args[0][0]
+        self.assertEqual(q.children, [('pk__lt', 3)])
+        self.assertEqual(page.object_list, self.objects[0:2])
+        self.assertFalse(page.has_previous())
+        self.assertEqual(paginator.decode_cursor(page.next_cursor),
+                         (True, [2]))
+
+    def test_ordering(self):
+        """Establish that the primary key is appended to the ordering,
+        and that the keyset filter accounts for ties.
+        """
+        paginator = pagination.KeysetPaginator(self.queryset, 2,
+            ordering=('-foo',),
+        )
+        self.assertEqual(paginator.ordering, ('-foo', '-pk'))
+        filtered = self.queryset.order_by.return_value.filter.return_value
+        self._set_results(filtered, [])
+        paginator.page(paginator.encode_cursor(True, [1, 3]))
+        self.queryset.order_by.assert_called_once_with('-foo', '-pk')
+        q = self.queryset.order_by.return_value.filter.call_args[0][0]
+        self.assertEqual(q.connector, 'OR')
+        self.assertEqual(len(q.children), 2)
+
+    def test_invalid_cursor(self):
+        """Establish that cursors which can not be decoded raise
+        InvalidCursor.
+        """
+        paginator = pagination.KeysetPaginator(self.queryset, 2)
+        for cursor in ('!!!', 'Zm9v', paginator.encode_cursor(True, [1, 2]),
+                       paginator.encode_cursor(True, ['foo'])):
+            with self.assertRaises(pagination.InvalidCursor):
+                paginator.page(cursor)
+
+
+class KeysetPaginationTests(unittest.TestCase):
+    """A set of tests to establish that keyset pagination is correctly
+    integrated with viewsets.
+    """
+    class ViewSet(KeysetPaginationMixin, ModelViewSet):
+        model = test_models.NormalModel
+        paginate_by = 2
+
+    def _get_viewset(self, path):
+        request = Request(RequestFactory().get(path))
+        return self.ViewSet(request=request, kwargs={}, format_kwarg='format')
+
+    def test_paginate_queryset_not_configured(self):
+        """Establish that no page is returned if pagination is not
+        configured.
+        """
+        vs = self._get_viewset('/normal/')
+        vs.paginate_by = None
+        self.assertIsNone(vs.paginate_queryset(mock.MagicMock()))
+
+    def test_paginate_queryset_invalid_cursor(self):
+        """Establish that an invalid cursor raises Http404."""
+        vs = self._get_viewset('/normal/?cursor=foo')
+        queryset = mock.MagicMock()
+        queryset.model = test_models.NormalModel
+        with self.assertRaises(Http404):
+            vs.paginate_queryset(queryset)
+
+    def test_pagination_serializer(self):
+        """Establish that the pagination serializer provides hyperlinks
+        to the next and previous pages.
+        """
+        vs = self._get_viewset('/normal/?cursor=abc&foo=bar')
+        page = pagination.KeysetPage([], next_cursor='n')
+        serializer = pagination.KeysetPaginationSerializer(instance=page,
+            context={'request': vs.request},
+        )
+        self.assertEqual(serializer.data['next'],
+                         'http://testserver/normal/?cursor=n&foo=bar')
+        self.assertIsNone(serializer.data['previous'])
+        self.assertNotIn('count', serializer.data)
+
+    def test_cursor_kwarg(self):
+        """Establish that the links in the pagination serializer use
+        the viewset's `cursor_kwarg`.
+        """
+        vs = self._get_viewset('/normal/?after=abc')
+        vs.cursor_kwarg = 'after'
+        page = pagination.KeysetPage([], next_cursor='n',
+                                     previous_cursor='p')
+        serializer = vs.get_pagination_serializer(page)
+        self.assertEqual(serializer.data['next'],
+                         'http://testserver/normal/?after=n')
+        self.assertEqual(serializer.data['previous'],
+                         'http://testserver/normal/?after=p')
@@ -0,0 +1,86 @@
+from __future__ import absolute_import, unicode_literals
+from django.test.client import RequestFactory
+from drf_toolbox import profiling
+from drf_toolbox.management.commands import profile_serializer
+from tests import models as test_models, serializers as test_serializers
+from tests.compat import mock
+import six
+import unittest
+
+
+class SerializationProfileTests(unittest.TestCase):
+    """A set of tests to establish that serialization profiles record
+    each field, including those of nested serializers.
+    """
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.child = test_models.ChildModel(id=7,
+            normal=test_models.NormalModel(id=42, bacon=3),
+        )
+
+    def test_nested_fields(self):
+        """Establish that fields of serializers nested within related
+        fields are recorded beneath the related field.
+        """
+        serializer = test_serializers.ChildSerializer(
+            [self.child, self.child], many=True,
+            context={'request': self.request},
+        )
+        with profiling.SerializationProfile() as profile:
+            data = serializer.data
+        self.assertEqual(data[0]['normal']['bacon'], 3)
+        self.assertEqual(profile.fields['normal'][0], 2)
+        self.assertEqual(profile.fields['normal.bacon'][0], 2)
+        self.assertIn('normal.api_endpoint', profile.fields)
+        for calls, duration, queries in profile.fields.values():
+            self.assertEqual(queries, 0)
+
+    def test_inactive(self):
+        """Establish that fields instrumented by a profile are not
+        recorded once it is no longer active.
+        """
+        serializer = test_serializers.NormalSerializer(
+            self.child.normal, context={'request': self.request},
+        )
+        with profiling.SerializationProfile() as profile:
+            serializer.data
+        self.assertIsNone(profiling.get_profile())
+        serializer.fields['bacon'].field_to_native(self.child.normal,
+                                                   'bacon')
+        self.assertEqual(profile.fields['bacon'][0], 1)
+
+    def test_header_and_report(self):
+        profile = profiling.SerializationProfile()
+        profile.fields['normal'] = [2, 0.004, 2]
+        profile.fields['normal.bacon'] = [2, 0.001, 0]
+        self.assertEqual(profile.get_header(),
+            'normal;calls=2;dur=4.0;queries=2, '
+            'normal.bacon;calls=2;dur=1.0;queries=0',
+        )
+        lines = profile.get_report().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[1].split(),
+                         ['normal', '2', '4.000', '2.000', '2'])
+
+
+class ProfileSerializerCommandTests(unittest.TestCase):
+    """A set of tests to establish that the `profile_serializer`
+    management command reports on a sample queryset.
+    """
+    def test_command(self):
+        normal = test_models.NormalModel(id=42, bacon=3)
+        manager = mock.MagicMock()
+        manager.all.return_value.__getitem__.return_value = [normal]
+        stdout = six.StringIO()
+        with mock.patch.object(test_models.NormalModel, '_default_manager',
+                               manager):
+            profile_serializer.Command().execute(
+                'tests.serializers.NormalSerializer',
+                limit=10, host='testserver', stdout=stdout,
+            )
+        manager.all.return_value.__getitem__.assert_called_once_with(
+            slice(None, 10),
+        )
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(lines[0].split()[0], 'Field')
+        self.assertIn('bacon', [line.split()[0] for line in lines])
@@ -0,0 +1,125 @@
+from __future__ import absolute_import, unicode_literals
+from django.test.utils import override_settings
+from drf_toolbox.queries import QueryBudgetExceeded, QueryCounter
+from drf_toolbox.queries import enforce_budget
+from rest_framework import serializers
+from tests import serializers as test_serializers
+from tests.compat import mock
+import unittest
+
+
+class FakeConnection(object):
+    """A stand-in for a database connection, whose debug cursors are the
+    raw cursors they are given.
+    """
+    use_debug_cursor = True
+
+    def make_debug_cursor(self, cursor):
+        return cursor
+
+
+class QueryField(serializers.Field):
+    """A field which performs a query when serialized."""
+    def field_to_native(self, obj, field_name):
+        obj.execute('SELECT 2')
+
+
+class QueryCounterTests(unittest.TestCase):
+    """A set of tests to establish that QueryCounter records queries,
+    and what caused them, as expected.
+    """
+    def setUp(self):
+        self.connection = FakeConnection()
+        patcher = mock.patch('drf_toolbox.queries.connections')
+        patcher.start().all.return_value = [self.connection]
+        self.addCleanup(patcher.stop)
+
+    def _get_cursor(self):
+        return self.connection.make_debug_cursor(mock.MagicMock())
+
+    def test_count(self):
+        """Establish that queries are recorded while the counter is
+        active, and only then.
+        """
+        with QueryCounter() as counter:
+            cursor = self._get_cursor()
+            cursor.execute('SELECT 1')
+            cursor.executemany('INSERT 1', [(1,), (2,)])
+        self._get_cursor().execute('SELECT 3')
+        self.assertEqual(len(counter), 2)
+        self.assertEqual(counter.queries, [('SELECT 1', None),
+                                           ('INSERT 1', None)])
+
+    def test_restored(self):
+        """Establish that the connection's cursors are restored once the
+        counter is done with.
+        """
+        self.connection.use_debug_cursor = None
+        with QueryCounter():
+            self.assertTrue(self.connection.use_debug_cursor)
+            self.assertIn('make_debug_cursor', self.connection.__dict__)
+        self.assertIsNone(self.connection.use_debug_cursor)
+        self.assertNotIn('make_debug_cursor', self.connection.__dict__)
+
+    def test_nested(self):
+        """Establish that nested counters each record every query
+        performed while they are active.
+        """
+        with QueryCounter() as outer:
+            with QueryCounter() as inner:
+                self._get_cursor().execute('SELECT 1')
+            self._get_cursor().execute('SELECT 2')
+        self.assertEqual(len(inner), 1)
+        self.assertEqual(len(outer), 2)
+
+    def test_source(self):
+        """Establish that queries performed while serializing a field
+        are attributed to that field.
+        """
+        field = QueryField()
+        field.parent = test_serializers.NormalSerializer()
+        with QueryCounter() as counter:
+            field.field_to_native(self._get_cursor(), 'foo')
+        self.assertEqual(counter.queries, [
+            ('SELECT 2', 'NormalSerializer.foo (QueryField)'),
+        ])
+
+
+class EnforceBudgetTests(unittest.TestCase):
+    """A set of tests to establish that query budgets are enforced
+    as expected.
+    """
+    def setUp(self):
+        self.counter = QueryCounter()
+        self.counter.queries = [
+            ('SELECT 1', None),
+            ('SELECT 2', 'ChildSerializer.normal (RelatedField)'),
+            ('SELECT 3', 'ChildSerializer.normal (RelatedField)'),
+        ]
+
+    def test_within_budget(self):
+        with mock.patch('drf_toolbox.queries.logger') as logger:
+            enforce_budget(self.counter, 3, 'ChildViewSet.list')
+            self.assertFalse(logger.warning.called)
+
+    def test_log(self):
+        """Establish that exceeding the budget is logged by default,
+        naming the source of each excess query.
+        """
+        with mock.patch('drf_toolbox.queries.logger') as logger:
+            enforce_budget(self.counter, 1, 'ChildViewSet.list')
+            logger.warning.assert_called_once_with(
+                'ChildViewSet.list performed 3 queries, exceeding its '
+                'budget of 1. Excess queries: 2 from ChildSerializer.normal '
+                '(RelatedField).'
+            )
+
+    def test_raise(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            enforce_budget(self.counter, 2, 'ChildViewSet.list',
+                           mode='raise')
+
+    @override_settings(DRF_TOOLBOX_QUERY_BUDGET_MODE='raise')
+    def test_raise_setting(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            enforce_budget(self.counter, 0, 'ChildViewSet.list')
@@ -1,12 +1,20 @@
 from __future__ import absolute_import, unicode_literals
-from drf_toolbox import routers, serializers
+from django.core.exceptions import ImproperlyConfigured
+from django.core.urlresolvers import RegexURLResolver
+from django.http import Http404
+from django.test.client import RequestFactory
+from drf_toolbox import cache, routers, serializers
 from drf_toolbox.compat import models, django_pgfields_installed
 from drf_toolbox.decorators import base_action
+from drf_toolbox.viewsets import BulkModelMixin, ModelViewSet
 from rest_framework import viewsets
+from tests import models as test_models
 from tests.compat import mock
 from tests.views import NormalViewSet
 import six
+import sys
 import unittest
+import uuid
 
 
 class RouterTests(unittest.TestCase):
@@ -171,6 +179,31 @@ class RouterTests(unittest.TestCase):
             if '<format>' in urlpattern.regex.pattern:
                 self.assertFalse(pattern.endswith(r'/\.(?P<format>[a-z]+)$'))
 
+    def test_router_urls_bulk(self):
+        """Establish that a viewset using the bulk mixin gets a base route
+        for bulk PATCH and DELETE requests.
+        """
+        class PhonyModelVI(models.Model):
+            class Meta:
+                app_label = 'tests'
+
+        class PhonyViewSetVI(BulkModelMixin, ModelViewSet):
+            model = PhonyModelVI
+
+        # Create the router and register our viewset.
+        with mock.patch('drf_toolbox.routers.ModelSerializer'):
+            router = routers.Router()
+        router.register('phony', PhonyViewSetVI)
+
+        # Establish that the bulk route is present and bound as expected.
+        routes = [i for i in router.get_routes(PhonyViewSetVI)
+                  if i.url == r'^{prefix}/bulk{trailing_slash}$']
+        self.assertEqual(len(routes), 1)
+        self.assertEqual(routes[0].mapping,
+                         {'patch': 'bulk', 'delete': 'bulk'})
+        self.assertIn(r'^phony/bulk/$',
+                      [i.regex.pattern for i in router.urls])
+
     def test_parent_mismatch(self):
         """Establish that instantiating a Router with only one of
         `parent` and `parent_prefix` raises ValueError.
@@ -271,6 +304,54 @@ class RouterTests(unittest.TestCase):
             )),
         ])
 
+    def test_child_routes_kwarg_converters(self):
+        """Establish that routes for nested viewsets tell the viewset how
+        to convert every lookup kwarg captured from the URL.
+        """
+        router = routers.Router()
+        router.register('normal', 'tests.views.NormalViewSet')
+        router.register('normal/child', 'tests.views.ChildViewSet')
+        child_router = router.children['normal']
+        routes = child_router.get_routes(child_router.registry[0][1])
+        for route in routes:
+            self.assertEqual(route.initkwargs['kwarg_converters'], {
+                'normalmodel__pk': int,
+                'pk': int,
+            })
+
+    @unittest.skipUnless(django_pgfields_installed,
+                         'django-pgfields is not installed.')
+    def test_routes_kwarg_converters_uuid(self):
+        """Establish that UUID primary keys captured from the URL are
+        converted using the shared UUID parser.
+        """
+        class PhonyModelVII(models.Model):
+            id = models.UUIDField(auto_add=True, primary_key=True)
+            class Meta:
+                app_label = 'tests'
+
+        class PhonyViewSetVII(ModelViewSet):
+            model = PhonyModelVII
+
+        with mock.patch('drf_toolbox.routers.ModelSerializer'):
+            router = routers.Router()
+        routes = router.get_routes(PhonyViewSetVII)
+        self.assertEqual(routes[0].initkwargs['kwarg_converters'], {
+            'pk': uuid.UUID,
+        })
+
+    def test_routes_kwarg_converters_custom_lookup_regex(self):
+        """Establish that lookups using a custom regex are not
+        converted.
+        """
+        class PhonyViewSetVIII(ModelViewSet):
+            model = test_models.NormalModel
+            lookup_regex = '[a-z]+'
+
+        router = routers.Router()
+        routes = router.get_routes(PhonyViewSetVIII)
+        self.assertEqual(routes[0].initkwargs['kwarg_converters'], {})
+
     def test_get_viewset_by_prefix_fail(self):
         """Establish that if we attempt to get a viewset by prefix and the
         prefix is not actually registered on the router, that we raise
@@ -279,3 +360,107 @@ class RouterTests(unittest.TestCase):
         router = routers.Router()
         with self.assertRaises(KeyError):
             router.get_viewset_by_prefix('nope')
+
+
+class LazyRouterTests(unittest.TestCase):
+    """A set of tests to establish that lazy routers route viewsets
+    registered by dot path without importing them until needed.
+    """
+    def setUp(self):
+        sys.modules.pop('tests.lazy_views', None)
+        self.router = routers.Router(lazy=True)
+        self.router.register('normal', 'tests.lazy_views.NormalViewSet',
+                             base_name='normal', lookup_type='int')
+        self.router.register('normal/child', 'tests.lazy_views.ChildViewSet',
+                             base_name='child', lookup_type='int')
+        self.resolver = RegexURLResolver(r'^/', self.router.urls)
+
+    def test_urls_without_import(self):
+        """Establish that URL patterns are built from the information
+        given at registration, without importing the viewsets.
+        """
+        self.assertNotIn('tests.lazy_views', sys.modules)
+        patterns = [p.regex.pattern for p in self.router.urls]
+        self.assertIn(r'^normal/(?P<pk>[0-9]+)/$', patterns)
+        self.assertIn(r'^normal/(?P<normal__pk>[0-9]+)/child/'
+                      r'(?P<pk>[0-9]+)/$', patterns)
+        self.assertTrue(self.router.children['normal'].lazy)
+
+    def test_dispatch(self):
+        """Establish that the viewset is imported when a request is first
+        dispatched to it, and that the viewset is then set up as it would
+        have been if it had been registered eagerly.
+        """
+        callback, args, kwargs = self.resolver.resolve('/normal/42/child/')
+        self.assertTrue(callback.csrf_exempt)
+        with mock.patch.object(cache, 'add_dependency') as add_dependency:
+            with mock.patch('rest_framework.views.APIView.dispatch') as d:
+                d.return_value = 'response'
+                self.assertEqual(callback(RequestFactory().get('/'),
+                                          *args, **kwargs), 'response')
+        from tests import lazy_views
+        self.assertEqual(d.call_args[1], {'normal__pk': '42'})
+        add_dependency.assert_called_once_with(test_models.ChildModel,
+                                               test_models.NormalModel)
+
+        # The parent is imported too, and knows about its child.
+        normal = self.router.get_viewset_by_prefix('normal').resolve()
+        self.assertIs(normal, lazy_views.NormalViewSet)
+        self.assertEqual(list(normal.children.keys()), ['child'])
+
+    def test_unsupported_actions(self):
+        """Establish that actions the viewset does not implement are
+        not routed to it.
+        """
+        router = routers.Router(lazy=True)
+        router.register('list', 'tests.lazy_views.ListOnlyViewSet',
+                        base_name='list', lookup_type='int')
+        resolver = RegexURLResolver(r'^/', router.urls)
+        callback, args, kwargs = resolver.resolve('/list/')
+        response = callback(RequestFactory().post('/list/'), *args, **kwargs)
+        self.assertEqual(response.status_code, 405)
+        callback, args, kwargs = resolver.resolve('/list/1/')
+        with self.assertRaises(Http404):
+            callback(RequestFactory().get('/list/1/'), *args, **kwargs)
+
+    def test_lookup_mismatch(self):
+        """Establish that a viewset whose lookup does not match what it
+        was registered with is rejected, every time it is needed.
+        """
+        self.router.register('other', 'tests.lazy_views.NormalViewSet',
+                             base_name='other')
+        viewset = self.router.get_viewset_by_prefix('other')
+        for i in range(0, 2):
+            with self.assertRaises(ImproperlyConfigured):
+                viewset.resolve()
+
+    def test_base_name_mismatch(self):
+        """Establish that a parent viewset whose base name does not
+        match what it was registered with is rejected.
+        """
+        router = routers.Router(lazy=True)
+        router.register('child', 'tests.lazy_views.ChildViewSet',
+                        base_name='kid', lookup_type='int')
+        router.register('child/normal', 'tests.lazy_views.NormalViewSet',
+                        base_name='normal', lookup_type='int')
+        with self.assertRaises(ImproperlyConfigured):
+            router.get_viewset_by_prefix('child').resolve()
+
+    def test_decorated_routes(self):
+        self.router.register('link', 'tests.lazy_views.LinkViewSet',
+                             base_name='link', lookup_type='int')
+        with self.assertRaises(ImproperlyConfigured):
+            self.router.get_viewset_by_prefix('link').resolve()
+
+    def test_base_name_required(self):
+        with self.assertRaises(ValueError):
+            self.router.register('foo', 'tests.lazy_views.NormalViewSet')
+
+    def test_eager_lookup_type(self):
+        """Establish that lookup details may not be given for viewsets
+        which are not registered lazily.
+        """
+        router = routers.Router()
+        with self.assertRaises(TypeError):
+            router.register('normal', 'tests.views.NormalViewSet',
+                            lookup_type='int')
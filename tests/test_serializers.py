@@ -6,12 +6,14 @@ from django.test.client import RequestFactory
 from drf_toolbox.compat import django_pgfields_installed, models
 from drf_toolbox.serializers import (fields, BaseModelSerializer,
                                      ModelSerializer, RelatedField)
+from drf_toolbox.renderers.json import JSONRenderer, RawJSON
 from drf_toolbox.serializers.fields import api
 from drf_toolbox import viewsets
 from rest_framework import serializers
 from rest_framework.relations import HyperlinkedIdentityField
 from tests import models as test_models, serializers as test_serializers
 from tests.compat import mock
+from tests.database import DatabaseTestCase
 import unittest
 import six
 import uuid
@@ -347,6 +349,128 @@ class SerializerSuite(unittest.TestCase):
                 get.assert_called_once_with(pk=42)
         self.assertEqual(cm.normal, nm)
 
+    def test_save_object_changed_fields_only(self):
+        """Establish that saving an existing instance only writes the
+        fields that actually changed.
+        """
+        nm = test_models.NormalModel(id=42, foo=1, bar=2, baz=3, bacon=4)
+        ns = test_serializers.NormalSerializer()
+        ns.track_changed_fields = True
+        ns.restore_object({'foo': 5, 'bar': 2}, instance=nm)
+        with mock.patch.object(BaseModelSerializer, 'save_object') as save:
+            ns.save_object(nm, force_update=True)
+            save.assert_called_once_with(nm, force_update=True,
+                                         update_fields=['foo'])
+        self.assertFalse(hasattr(nm, '_loaded_values'))
+
+    def test_save_object_no_changes(self):
+        """Establish that saving an existing instance with no changes
+        sends an empty `update_fields`, which skips the write entirely.
+        """
+        nm = test_models.NormalModel(id=42, foo=1, bar=2, baz=3, bacon=4)
+        ns = test_serializers.NormalSerializer()
+        ns.track_changed_fields = True
+        ns.restore_object({'foo': 1}, instance=nm)
+        with mock.patch.object(BaseModelSerializer, 'save_object') as save:
+            ns.save_object(nm)
+            save.assert_called_once_with(nm, update_fields=[])
+
+    def test_save_object_changed_fields_auto_now(self):
+        """Establish that `auto_now` fields are written along with any
+        changed fields, but not on their own.
+        """
+        mm = test_models.ModifiedModel(id=42, foo=1)
+        serializer_class = viewsets.ModelViewSet(
+            model=test_models.ModifiedModel,
+        ).get_serializer_class()
+        s = serializer_class()
+        s.track_changed_fields = True
+        s.restore_object({'foo': 2}, instance=mm)
+        with mock.patch.object(BaseModelSerializer, 'save_object') as save:
+            s.save_object(mm)
+            save.assert_called_once_with(mm,
+                update_fields=['foo', 'modified'],
+            )
+
+    def test_save_object_changed_fields_initial(self):
+        """Establish that `initial` values are taken into account when
+        determining which fields have changed.
+        """
+        nm = test_models.NormalModel(id=42)
+        cm = test_models.ChildModel(id=1, normal_id=41)
+        cs = test_serializers.ChildSerializer(initial={'normal': nm.id})
+        cs.track_changed_fields = True
+        cs.restore_object({}, instance=cm)
+        with mock.patch.object(BaseModelSerializer, 'save_object') as save:
+            with mock.patch.object(test_models.NormalModel.objects,
+                                   'get') as get:
+                get.return_value = nm
+                cs.save_object(cm)
+            save.assert_called_once_with(cm, update_fields=['normal'])
+
+    def test_save_object_initial_instance(self):
+        """Establish that model instances in `initial` are set on the
+        object as they are, without being looked up again.
+        """
+        nm = test_models.NormalModel(id=42)
+        cm = test_models.ChildModel()
+        cs = test_serializers.ChildSerializer(initial={'normal': nm})
+        with mock.patch.object(BaseModelSerializer, 'save_object') as save:
+            with mock.patch.object(test_models.NormalModel.objects,
+                                   'get') as get:
+                cs.save_object(cm)
+                self.assertFalse(get.called)
+        self.assertIs(cm.normal, nm)
+
+    def test_save_object_new_instance(self):
+        """Establish that saving a new instance does not restrict the
+        fields being written.
+        """
+        nm = test_models.NormalModel(foo=1)
+        ns = test_serializers.NormalSerializer()
+        ns.track_changed_fields = True
+        ns.restore_object({'foo': 5}, instance=nm)
+        with mock.patch.object(BaseModelSerializer, 'save_object') as save:
+            ns.save_object(nm, force_insert=True)
+            save.assert_called_once_with(nm, force_insert=True)
+
+
+class ChangedFieldsTests(DatabaseTestCase):
+    """Tests for saving existing instances through a serializer."""
+    models = (test_models.SluggedModel,)
+
+    def setUp(self):
+        super(ChangedFieldsTests, self).setUp()
+        self.obj = test_models.SluggedModel.objects.create(name='Foo')
+        self.serializer_class = viewsets.ModelViewSet(
+            model=test_models.SluggedModel,
+        ).get_serializer_class()
+
+    def test_fields_computed_by_save(self):
+        """Establish that by default, fields whose values are computed by
+        the model's `save` method are written along with those that were
+        changed.
+        """
+        s = self.serializer_class(self.obj, data={'name': 'Bar Baz'},
+                                  partial=True)
+        self.assertTrue(s.is_valid(), s.errors)
+        s.save()
+        obj = test_models.SluggedModel.objects.get(pk=self.obj.pk)
+        self.assertEqual(obj.name, 'Bar Baz')
+        self.assertEqual(obj.slug, 'bar-baz')
+
+    def test_track_changed_fields(self):
+        """Establish that opting in to change tracking writes only the
+        fields that changed.
+        """
+        s = self.serializer_class(self.obj, data={'name': 'Bar'},
+                                  partial=True)
+        s.track_changed_fields = True
+        self.assertTrue(s.is_valid(), s.errors)
+        s.save()
+        obj = test_models.SluggedModel.objects.get(pk=self.obj.pk)
+        self.assertEqual((obj.name, obj.slug), ('Bar', 'foo'))
+
 
 class RelatedFieldTests(unittest.TestCase):
     def setUp(self):
@@ -477,6 +601,57 @@ class PostgresFieldTests(unittest.TestCase):
         self.assertEqual(fields_dict['coords'].__class__,
                          fields.CompositeField)
 
+    def test_deferrable_fields_all_read(self):
+        """Establish that a serializer which reads every field reports
+        that nothing may be deferred.
+        """
+        s = test_serializers.PGFieldsSerializer()
+        self.assertEqual(s.get_deferrable_fields(), [])
+
+    def test_deferrable_fields_subset(self):
+        """Establish that a serializer which does not read the expensive
+        fields reports that they may be deferred.
+        """
+        class Serializer(ModelSerializer):
+            class Meta:
+                model = test_models.PGFieldsModel
+                fields = ('id', 'uuid', 'extra')
+
+        s = Serializer()
+        self.assertEqual(s.get_deferrable_fields(),
+                         ['array', 'coords', 'size'])
+
+    def test_deferrable_fields_method_field(self):
+        """Establish that a serializer with a method field, which may read
+        any attribute, reports that nothing may be deferred.
+        """
+        class Serializer(ModelSerializer):
+            length = serializers.SerializerMethodField('get_length')
+
+            class Meta:
+                model = test_models.PGFieldsModel
+                fields = ('id', 'uuid', 'length')
+
+            def get_length(self, obj):
+                return len(obj.extra)
+
+        s = Serializer()
+        self.assertEqual(s.get_deferrable_fields(), [])
+
+    def test_deferrable_fields_other_source(self):
+        """Establish that a serializer with a field whose source is not a
+        model field reports that nothing may be deferred.
+        """
+        class Serializer(ModelSerializer):
+            label = serializers.Field(source='get_label')
+
+            class Meta:
+                model = test_models.PGFieldsModel
+                fields = ('id', 'label')
+
+        s = Serializer()
+        self.assertEqual(s.get_deferrable_fields(), [])
+
     def test_json_field_from_native(self):
         """Determine that a JSON serializer sends the value
         through on the `from_native` method.
@@ -493,6 +668,55 @@ class PostgresFieldTests(unittest.TestCase):
         answer = jf.to_native([1, 3, 5])
         self.assertEqual(answer, [1, 3, 5])
 
+    def test_json_field_raw_passthrough(self):
+        """Establish that a raw JSON field passes the JSON text through
+        as a pre-encoded fragment when the JSON renderer is in use.
+        """
+        jf = fields.JSONField(raw=True)
+        jf.context = {'request': mock.Mock(accepted_renderer=JSONRenderer())}
+        obj = mock.Mock(spec=[])
+        obj.extra_raw_json = '{"foo": [1, 2]}'
+        answer = jf.field_to_native(obj, 'extra')
+        self.assertIsInstance(answer, RawJSON)
+        self.assertEqual(answer.text, '{"foo": [1, 2]}')
+
+    def test_json_field_raw_other_renderer(self):
+        """Establish that a raw JSON field decodes the JSON text if the
+        renderer in use would not understand a pre-encoded fragment.
+        """
+        jf = fields.JSONField(raw=True)
+        jf.context = {'request': mock.Mock(accepted_renderer=object())}
+        obj = mock.Mock(spec=[])
+        obj.extra_raw_json = '{"foo": [1, 2]}'
+        self.assertEqual(jf.field_to_native(obj, 'extra'), {'foo': [1, 2]})
+
+    def test_json_field_raw_column_loaded(self):
+        """Establish that a raw JSON field uses the column's value if the
+        column itself is loaded, as the text may be out of date.
+        """
+        jf = fields.JSONField(raw=True)
+        jf.context = {'request': mock.Mock(accepted_renderer=JSONRenderer())}
+        obj = mock.Mock(spec=[])
+        obj.extra = {'foo': 3}
+        obj.extra_raw_json = '{"foo": [1, 2]}'
+        self.assertEqual(jf.field_to_native(obj, 'extra'), {'foo': 3})
+
+    def test_raw_json_fields(self):
+        """Establish that `Meta.raw_json_fields` causes JSON fields to
+        pass their text through.
+        """
+        class Serializer(ModelSerializer):
+            class Meta:
+                model = test_models.PGFieldsModel
+                raw_json_fields = ('extra',)
+
+        s = Serializer()
+        self.assertTrue(s.fields['extra'].raw)
+        self.assertEqual(s.get_raw_json_fields(),
+                         {'extra': 'extra_raw_json'})
+        self.assertEqual(test_serializers.PGFieldsSerializer()\
+                                         .get_raw_json_fields(), {})
+
     def test_uuid_field_from_native(self):
         """Determine that the UUID serializer converts the value
         back to a Python UUID object.
@@ -534,6 +758,75 @@ class PostgresFieldTests(unittest.TestCase):
         self.assertIsInstance(answer, list)
         self.assertEqual(answer, [1, 1, 2, 3, 5, 8])
 
+    def test_array_field_from_native_fast_path(self):
+        """Establish that the Array serializer does not convert each item
+        individually when the items already have the correct type.
+        """
+        af = fields.ArrayField(of=serializers.IntegerField())
+        with mock.patch.object(af.of, 'from_native') as from_native:
+            answer = af.from_native([1, 1, 2, 3, None, 8])
+            self.assertFalse(from_native.called)
+        self.assertEqual(answer, [1, 1, 2, 3, None, 8])
+
+    def test_array_field_from_native_invalid_item(self):
+        """Establish that an invalid item is still rejected, even though
+        other items have the correct type.
+        """
+        af = fields.ArrayField(of=serializers.IntegerField())
+        with self.assertRaises(ValidationError):
+            af.from_native([1, 2, 'bacon'])
+
+    def test_array_field_to_native_fast_path(self):
+        """Establish that the Array serializer does not convert each item
+        individually when conversion would leave the items untouched.
+        """
+        af = fields.ArrayField(of=serializers.CharField())
+        with mock.patch.object(af.of, 'to_native') as to_native:
+            answer = af.to_native(('foo', 'bar'))
+            self.assertFalse(to_native.called)
+        self.assertEqual(answer, ['foo', 'bar'])
+
+    def test_array_field_to_native_custom_item_field(self):
+        """Establish that an item field which overrides `to_native` is
+        used for each item.
+        """
+        class DoublingField(serializers.IntegerField):
+            def to_native(self, value):
+                return value * 2
+
+        af = fields.ArrayField(of=DoublingField())
+        self.assertEqual(af.to_native([1, 2, 3]), [2, 4, 6])
+
+    def test_array_field_size_limits(self):
+        """Establish that arrays outside of the size limits are
+        rejected.
+        """
+        af = fields.ArrayField(of=serializers.IntegerField(),
+                               max_length=3, min_length=2)
+        self.assertEqual(af.from_native([1, 2, 3]), [1, 2, 3])
+        with self.assertRaises(ValidationError):
+            af.from_native([1, 2, 3, 4])
+        with self.assertRaises(ValidationError):
+            af.from_native([1])
+
+    def test_array_field_null(self):
+        """Establish that a null array is passed through in either
+        direction, even if size limits are set.
+        """
+        af = fields.ArrayField(of=serializers.IntegerField(),
+                               max_length=3, min_length=2)
+        self.assertIsNone(af.from_native(None))
+        self.assertIsNone(af.to_native(None))
+
+    def test_array_field_item_validators(self):
+        """Establish that the item field's validators are run against
+        every item, and that all errors are reported at once.
+        """
+        af = fields.ArrayField(of=serializers.IntegerField(max_value=5))
+        with self.assertRaises(ValidationError) as cm:
+            af.from_native([1, 6, '7'])
+        self.assertEqual(len(cm.exception.messages), 2)
+
     def test_composite_field_from_native(self):
         """Establish that the composite serializer converts the value
         back into the appropriate Python instance type.
@@ -572,3 +865,75 @@ class PostgresFieldTests(unittest.TestCase):
         answer = cf.to_native(Point(x=3, y=1))
         self.assertIsInstance(answer, dict)
         self.assertEqual(answer, { 'x': 3, 'y': 1 })
+
+    def test_composite_field_from_native_converts_and_validates(self):
+        """Establish that the composite serializer still converts and
+        validates subfield values which are not already of the right type.
+        """
+        Point = namedtuple('Point', ['x', 'y'])
+        cf = fields.CompositeField(
+            fields={
+                'x': serializers.IntegerField(max_value=5),
+                'y': serializers.IntegerField(),
+            },
+            instance_class=Point,
+        )
+        answer = cf.from_native({ 'x': '3', 'y': 1 })
+        self.assertEqual(answer, Point(x=3, y=1))
+        with self.assertRaises(ValidationError):
+            cf.from_native({ 'x': 6, 'y': 1 })
+
+    def test_composite_field_from_native_unknown_key(self):
+        """Establish that the composite serializer rejects keys which
+        do not correspond to any subfield.
+        """
+        Point = namedtuple('Point', ['x', 'y'])
+        cf = fields.CompositeField(
+            fields={
+                'x': serializers.IntegerField(),
+                'y': serializers.IntegerField(),
+            },
+            instance_class=Point,
+        )
+        with self.assertRaises(ValidationError):
+            cf.from_native({ 'x': 3, 'y': 1, 'z': 4 })
+
+    def test_composite_field_nested(self):
+        """Establish that composite fields nested within composite fields
+        are converted in both directions.
+        """
+        Point = namedtuple('Point', ['x', 'y'])
+        Line = namedtuple('Line', ['start', 'end'])
+        point_field = lambda: fields.CompositeField(
+            fields={
+                'x': serializers.IntegerField(),
+                'y': serializers.IntegerField(),
+            },
+            instance_class=Point,
+        )
+        cf = fields.CompositeField(
+            fields={ 'start': point_field(), 'end': point_field() },
+            instance_class=Line,
+        )
+        line = Line(start=Point(x=0, y=1), end=Point(x=2, y=3))
+        native = cf.to_native(line)
+        self.assertEqual(native, {
+            'start': { 'x': 0, 'y': 1 },
+            'end': { 'x': 2, 'y': 3 },
+        })
+        self.assertEqual(cf.from_native(native), line)
+
+    def test_composite_field_dotted_source(self):
+        """Establish that subfields with dotted sources fall back to
+        the full `field_to_native` lookup.
+        """
+        Point = namedtuple('Point', ['x', 'y'])
+        cf = fields.CompositeField(
+            fields={
+                'x': serializers.IntegerField(),
+                'x_real': serializers.FloatField(source='x.real'),
+            },
+            instance_class=Point,
+        )
+        answer = cf.to_native(Point(x=3, y=1))
+        self.assertEqual(answer, { 'x': 3, 'x_real': 3.0 })
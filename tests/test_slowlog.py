@@ -0,0 +1,168 @@
+from __future__ import absolute_import, unicode_literals
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+from drf_toolbox import slowlog, timing
+from drf_toolbox.renderers import JSONRenderer
+from rest_framework.response import Response
+from tests import serializers as test_serializers
+from tests.compat import mock
+import collections
+import unittest
+
+
+class RateLimiterTests(unittest.TestCase):
+    """A set of tests to establish that the rate limiter allows only so
+    many events per period.
+    """
+    def test_limit(self):
+        limiter = slowlog.RateLimiter(2)
+        self.assertEqual([limiter.allow() for i in range(0, 3)],
+                         [True, True, False])
+
+    def test_new_period(self):
+        limiter = slowlog.RateLimiter(1, period=10.0)
+        with mock.patch.object(slowlog, 'default_timer') as timer:
+            timer.return_value = 100.0
+            self.assertTrue(limiter.allow())
+            self.assertFalse(limiter.allow())
+            timer.return_value = 110.0
+            self.assertTrue(limiter.allow())
+
+
+class FieldTreeTests(unittest.TestCase):
+    """A set of tests to establish that serializer field trees and row
+    counts are determined correctly.
+    """
+    def setUp(self):
+        serializer = test_serializers.ChildSerializerII(
+            context={'request': RequestFactory().get('/')},
+        )
+        self.tree = slowlog.get_field_tree(serializer)
+
+    def test_field_tree(self):
+        self.assertEqual(self.tree, collections.OrderedDict([
+            ('id', 'IntegerField'),
+            ('normal', collections.OrderedDict([
+                ('id', 'IntegerField'),
+                ('bacon', 'IntegerField'),
+            ])),
+        ]))
+
+    def test_count_rows(self):
+        """Establish that objects are counted at each nested level, and
+        that missing related objects are not counted.
+        """
+        data = [{'id': 1, 'normal': {'id': 2}}, {'id': 3, 'normal': None}]
+        self.assertEqual(slowlog.count_rows(data, self.tree),
+                         {'self': 2, 'normal': 1})
+
+    def test_count_rows_paginated(self):
+        data = {'count': 40, 'results': [{'id': 1, 'normal': {'id': 2}}]}
+        self.assertEqual(slowlog.count_rows(data, self.tree),
+                         {'self': 1, 'normal': 1})
+
+    def test_count_rows_detail(self):
+        data = {'id': 1, 'normal': {'id': 2}}
+        self.assertEqual(slowlog.count_rows(data, self.tree),
+                         {'self': 1, 'normal': 1})
+
+
+class SampleTests(unittest.TestCase):
+    """A set of tests to establish that requests are sampled as
+    configured.
+    """
+    def test_no_threshold(self):
+        self.assertFalse(slowlog.sample(None))
+
+    @override_settings(DRF_TOOLBOX_SLOW_REQUEST_SAMPLE_RATE=0.25)
+    def test_rate(self):
+        with mock.patch.object(slowlog.random, 'random') as r:
+            r.return_value = 0.2
+            self.assertTrue(slowlog.sample(1.0))
+            r.return_value = 0.3
+            self.assertFalse(slowlog.sample(1.0))
+
+    @override_settings(DRF_TOOLBOX_SLOW_REQUEST_THRESHOLD=2.0)
+    def test_threshold(self):
+        """Establish that the viewset's threshold takes precedence over
+        the setting.
+        """
+        self.assertEqual(slowlog.get_threshold(object()), 2.0)
+        view = mock.MagicMock(slow_request_threshold=0.5)
+        self.assertEqual(slowlog.get_threshold(view), 0.5)
+
+
+class WatchTests(unittest.TestCase):
+    """A set of tests to establish that slow requests, and only slow
+    requests, are logged.
+    """
+    def setUp(self):
+        patcher = mock.patch.object(slowlog, '_limiter', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.request = RequestFactory().get('/child/')
+        self.view = mock.MagicMock(kwargs={'pk': 7})
+        self.view.get_serializer.return_value = \
+            test_serializers.ChildSerializerII(
+                context={'request': self.request},
+            )
+        self.view.timings = timing.RequestTimings('ChildViewSet.list')
+        self.view.timings.add('queryset', 0.5, queries=3)
+        self.view.timings.started -= 2.0
+
+    def _render(self, response):
+        response.accepted_renderer = JSONRenderer()
+        response.accepted_media_type = 'application/json'
+        response.renderer_context = {'request': self.request}
+        return response.render()
+
+    def test_slow(self):
+        response = self._render(
+            Response([{'id': 1, 'normal': {'id': 2, 'bacon': 3}}]),
+        )
+        with mock.patch.object(slowlog.logger, 'warning') as warning:
+            slowlog.watch(self.view, self.request, response, 1.0)
+        self.assertEqual(warning.call_count, 1)
+        record = warning.call_args[1]['extra']['slow_request']
+        self.assertEqual(record['view'], 'ChildViewSet.list')
+        self.assertEqual(record['path'], '/child/')
+        self.assertEqual(record['kwargs'], {'pk': '7'})
+        self.assertEqual(record['timings'], {'queryset': 500.0})
+        self.assertEqual(record['queries'], 3)
+        self.assertEqual(record['serializer'], 'ChildSerializerII')
+        self.assertEqual(list(record['fields']['normal'].keys()),
+                         ['id', 'bacon'])
+        self.assertEqual(record['rows'], {'self': 1, 'normal': 1})
+
+    def test_fast(self):
+        with mock.patch.object(slowlog.logger, 'warning') as warning:
+            slowlog.watch(self.view, self.request, HttpResponse(''), 10.0)
+        self.assertFalse(warning.called)
+
+    @override_settings(DRF_TOOLBOX_SLOW_REQUEST_RATE_LIMIT=1)
+    def test_rate_limit(self):
+        with mock.patch.object(slowlog.logger, 'warning') as warning:
+            for i in range(0, 3):
+                slowlog.watch(self.view, self.request, HttpResponse(''), 1.0)
+        self.assertEqual(warning.call_count, 1)
+
+    def test_after_render(self):
+        """Establish that an unrendered response is considered once it
+        has been rendered.
+        """
+        response = Response([])
+        with mock.patch.object(slowlog.logger, 'warning') as warning:
+            slowlog.watch(self.view, self.request, response, 1.0)
+            self.assertFalse(warning.called)
+            self._render(response)
+        self.assertEqual(warning.call_count, 1)
+
+    def test_describe_error(self):
+        """Establish that failing to describe a slow request is logged
+        rather than raised.
+        """
+        self.view.get_serializer.side_effect = ValueError
+        with mock.patch.object(slowlog.logger, 'exception') as exception:
+            slowlog.watch(self.view, self.request, HttpResponse(''), 1.0)
+        self.assertEqual(exception.call_count, 1)
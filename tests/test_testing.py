@@ -0,0 +1,120 @@
+from __future__ import absolute_import, unicode_literals
+from drf_toolbox.compat import models
+from drf_toolbox.decorators import base_action
+from drf_toolbox.routers import Router
+from drf_toolbox.testing import QueryCountTestCase, get_endpoints
+from drf_toolbox.testing import make_query_count_tests
+from tests import models as test_models
+from tests.compat import mock
+from tests.views import ChildViewSet, GrandchildViewSet, NormalViewSet
+import unittest
+
+
+class NormalViewSetX(NormalViewSet):
+    @base_action(['GET'])
+    def summary(self, request):
+        pass
+
+    @base_action(['POST'])
+    def reset(self, request):
+        pass
+
+
+class QueryCountTestsTests(unittest.TestCase):
+    """A set of tests to establish that query count tests are generated
+    for the endpoints of a router as expected.
+    """
+    def setUp(self):
+        self.router = Router()
+        self.router.register('normal', NormalViewSetX)
+        self.router.register('normal/child', ChildViewSet)
+        self.router.register('normal/child/grandchild', GrandchildViewSet)
+
+    def test_get_endpoints(self):
+        """Establish that every viewset is found, along with the chain
+        of viewsets it is nested beneath.
+        """
+        self.assertEqual(list(get_endpoints(self.router)), [
+            ((), 'normal', NormalViewSetX),
+            ((('normal', NormalViewSetX),), 'child', ChildViewSet),
+            ((('normal', NormalViewSetX), ('child', ChildViewSet)),
+             'grandchild', GrandchildViewSet),
+        ])
+
+    def test_make_query_count_tests(self):
+        """Establish that a test is created for the list, detail and GET
+        base action routes of each viewset.
+        """
+        test_case = make_query_count_tests(self.router, page_sizes=(1, 3))
+        self.assertTrue(issubclass(test_case, QueryCountTestCase))
+        self.assertEqual(test_case.page_sizes, (1, 3))
+        self.assertIs(test_case.router, self.router)
+        self.assertEqual(
+            sorted([name for name in dir(test_case)
+                    if name.startswith('test_')]),
+            ['test_normal_child_grandchild_list',
+             'test_normal_child_grandchild_retrieve',
+             'test_normal_child_list',
+             'test_normal_child_retrieve',
+             'test_normal_list',
+             'test_normal_retrieve',
+             'test_normal_summary'],
+        )
+
+    def test_generated_test(self):
+        """Establish that each generated test checks its endpoint."""
+        test_case = make_query_count_tests(self.router)
+        test = test_case('test_normal_child_list')
+        with mock.patch.object(test_case, 'assertQueryCountConstant') as m:
+            test.test_normal_child_list()
+            m.assert_called_once_with((('normal', NormalViewSetX),),
+                                      'child', ChildViewSet, 'list')
+
+
+class FixtureTests(unittest.TestCase):
+    """A set of tests to establish that fixture values are generated
+    as expected.
+    """
+    def setUp(self):
+        self.test = QueryCountTestCase('setUp')
+        self.test.setUp()
+
+    def test_field_values(self):
+        """Establish that values are appropriate to each field's type,
+        and unique for each index.
+        """
+        self.assertEqual(self.test.get_field_value(models.IntegerField(), 3),
+                         3)
+        self.assertEqual(self.test.get_field_value(
+            models.CharField(name='title', max_length=10), 3,
+        ), 'titl3')
+        self.assertEqual(self.test.get_field_value(
+            models.IntegerField(choices=((5, 'five'), (6, 'six'))), 3,
+        ), 5)
+        self.assertFalse(self.test.get_field_value(models.BooleanField(), 3))
+
+    def test_create_object(self):
+        """Establish that required fields, including foreign keys, are
+        given values, and provided values are kept.
+        """
+        with mock.patch.object(test_models.NormalModel, '_default_manager') \
+                                                                as normals:
+            with mock.patch.object(test_models.ChildModel,
+                                   '_default_manager') as children:
+                self.test.create_object(test_models.ChildModel)
+                normals.create.assert_called_once_with(foo=2, bar=2, baz=2,
+                                                       bacon=2)
+                children.create.assert_called_once_with(
+                    normal=normals.create.return_value,
+                )
+
+    def test_foreign_key(self):
+        """Establish that the foreign key to a parent is found, and that
+        the test is skipped if there is no such key.
+        """
+        fk = self.test._get_foreign_key(test_models.ChildModel,
+                                        test_models.NormalModel())
+        self.assertEqual(fk.name, 'normal')
+        with self.assertRaises(unittest.SkipTest):
+            self.test._get_foreign_key(test_models.GrandchildModel,
+                                       test_models.NormalModel())
@@ -0,0 +1,114 @@
+from __future__ import absolute_import, unicode_literals
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+from drf_toolbox import timing
+from drf_toolbox.renderers import JSONRenderer
+from rest_framework.response import Response
+from tests.compat import mock
+from tests.views import NormalViewSet
+import unittest
+
+
+class RequestTimingsTests(unittest.TestCase):
+    """A set of tests to establish that request timings are recorded and
+    reported as expected.
+    """
+    def setUp(self):
+        patcher = mock.patch.object(timing, '_stats', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.timings = timing.RequestTimings('NormalViewSet.list')
+        self.timings.add('queryset', 0.0123, queries=4)
+        self.timings.add('serialize', 0.05)
+
+    def test_header(self):
+        self.assertEqual(self.timings.get_header(),
+            'queryset;dur=12.3;desc="4 queries", serialize;dur=50.0',
+        )
+
+    @override_settings(
+        DRF_TOOLBOX_STATS_BACKEND='drf_toolbox.timing.MemoryStats',
+    )
+    def test_finish(self):
+        """Establish that finishing adds the total, sets the header and
+        sends the timings to the stats backend.
+        """
+        response = HttpResponse('')
+        self.timings.finish(response)
+        self.assertEqual(list(self.timings.durations.keys()),
+                         ['queryset', 'serialize', 'total'])
+        self.assertTrue(response['Server-Timing'].startswith(
+            'queryset;dur=12.3;desc="4 queries", serialize;dur=50.0, '
+            'total;dur=',
+        ))
+        stats = timing.get_stats()
+        self.assertIsInstance(stats, timing.MemoryStats)
+        self.assertEqual(stats.timings['NormalViewSet.list.serialize'],
+                         [50.0])
+        self.assertEqual(stats.counts, {
+            'NormalViewSet.list.queryset.queries': 4,
+        })
+
+    def test_finish_no_stats(self):
+        """Establish that there is no stats backend by default."""
+        self.timings.finish(HttpResponse(''))
+        self.assertIsNone(timing.get_stats())
+
+    def test_finish_after_render(self):
+        """Establish that an unrendered response is reported once it has
+        been rendered.
+        """
+        response = Response({'foo': 'bar'})
+        response.accepted_renderer = JSONRenderer()
+        response.accepted_media_type = 'application/json'
+        response.renderer_context = {'view': mock.Mock(timings=self.timings)}
+        self.timings.finish(response)
+        self.assertFalse(response.has_header('Server-Timing'))
+        response.render()
+        self.assertIn('render;dur=', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+
+class RenderTimingTests(unittest.TestCase):
+    """A set of tests to establish that DRF Toolbox renderers record how
+    long rendering takes.
+    """
+    def test_render(self):
+        timings = timing.RequestTimings('foo')
+        JSONRenderer().render({'foo': 'bar'}, 'application/json', {
+            'view': mock.Mock(timings=timings),
+        })
+        self.assertEqual(list(timings.durations.keys()), ['render'])
+
+    def test_render_untimed(self):
+        """Establish that views which are not recording timings, or no
+        view at all, are left alone.
+        """
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render({'foo': 1}, 'application/json', {
+            'view': NormalViewSet(),
+        }), b'{"foo": 1}')
+        self.assertEqual(renderer.render({'foo': 1}), b'{"foo": 1}')
+
+
+class ServerTimingViewSetTests(unittest.TestCase):
+    """A set of tests to establish that viewsets record the timings of
+    requests if asked to.
+    """
+    def _dispatch(self, server_timing):
+        class ViewSet(NormalViewSet):
+            pass
+        ViewSet.server_timing = server_timing
+        view = ViewSet.as_view({'get': 'list'})
+        with mock.patch('rest_framework.views.APIView.dispatch') as d:
+            d.return_value = HttpResponse('')
+            return view(RequestFactory().get('/normal/'))
+
+    def test_server_timing(self):
+        header = self._dispatch(True)['Server-Timing']
+        self.assertTrue(header.startswith('queryset;dur='))
+        self.assertIn('desc="0 queries", serialize;dur=', header)
+
+    def test_no_server_timing(self):
+        self.assertFalse(self._dispatch(False).has_header('Server-Timing'))
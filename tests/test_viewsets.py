@@ -1,13 +1,25 @@
 from __future__ import absolute_import, unicode_literals
+from datetime import datetime
+from django.core.cache import cache
+from django.core.urlresolvers import RegexURLResolver
+from django.db.models import Count, Max
+from django.db.models.sql.datastructures import EmptyResultSet
+from django.http import Http404, HttpResponse
 from django.test.client import RequestFactory
-from drf_toolbox import serializers
+from drf_toolbox import profiling, queries, routers, serializers
 from drf_toolbox.compat import django_pgfields_installed, models
-from drf_toolbox.viewsets import ModelViewSet
-from rest_framework.request import Request
+from drf_toolbox.pagination import CountedQuerySet
+from drf_toolbox.utils import json
+from drf_toolbox.viewsets import BulkModelMixin, ModelViewSet
 from rest_framework.decorators import link
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.response import Response
 from tests import models as test_models
 from tests.compat import mock
+from tests.database import DatabaseTestCase
 from tests.views import *
+import pytz
 import unittest
 import uuid
 
@@ -43,6 +55,187 @@ class ModelViewSetTests(unittest.TestCase):
             self.assertEqual(m.return_value.mock_calls,
                              [mock.call.filter(foo__pk=42)])
 
+    def test_get_queryset_nested(self):
+        """Establish that a nested viewset loads its parent object and
+        filters directly on the foreign key to it.
+        """
+        nm = test_models.NormalModel(id=42)
+        cvs = ChildViewSet(kwargs={'normal__pk': 42})
+        manager = test_models.NormalModel._default_manager
+        with mock.patch.object(manager, 'filter') as parent_filter:
+            parent_filter.return_value.get.return_value = nm
+            with mock.patch.object(ModelViewSet.mro()[1],
+                                   'get_queryset') as m:
+                m.return_value = mock.MagicMock()
+                cvs.get_queryset()
+                cvs.get_queryset()
+        parent_filter.assert_called_once_with(pk=42)
+        self.assertFalse(parent_filter.return_value.select_related.called)
+        self.assertEqual(m.return_value.mock_calls,
+                         [mock.call.filter(normal=nm)] * 2)
+        self.assertIs(cvs.get_parent_object(), nm)
+
+    def test_get_queryset_double_nested(self):
+        """Establish that a doubly-nested viewset loads its parent object
+        and grandparent object together, and filters only on the foreign
+        key to the parent.
+        """
+        cm = test_models.ChildModel(id=1, normal_id=42)
+        gvs = GrandchildViewSet(kwargs={'child__pk': 1,
+                                        'child__normal__pk': 42})
+        manager = test_models.ChildModel._default_manager
+        with mock.patch.object(manager, 'filter') as parent_filter:
+            related = parent_filter.return_value.select_related
+            related.return_value.get.return_value = cm
+            with mock.patch.object(ModelViewSet.mro()[1],
+                                   'get_queryset') as m:
+                m.return_value = mock.MagicMock()
+                gvs.get_queryset()
+        parent_filter.assert_called_once_with(pk=1, normal__pk=42)
+        related.assert_called_once_with('normal')
+        self.assertEqual(m.return_value.mock_calls,
+                         [mock.call.filter(child=cm)])
+
+    def test_get_parent_object_does_not_exist(self):
+        """Establish that a nested viewset raises Http404 if the parent
+        object does not exist.
+        """
+        cvs = ChildViewSet(kwargs={'normal__pk': 42})
+        manager = test_models.NormalModel._default_manager
+        with mock.patch.object(manager, 'filter') as parent_filter:
+            parent_filter.return_value.get.side_effect = \
+                test_models.NormalModel.DoesNotExist
+            with self.assertRaises(Http404):
+                cvs.get_parent_object()
+
+    def test_get_parent_object_not_nested(self):
+        """Establish that a viewset which is not nested has no
+        parent object.
+        """
+        self.assertIsNone(NormalViewSet(kwargs={'pk': 42}).get_parent_object())
+        self.assertIsNone(ModelViewSet(kwargs={'foo__pk': 42})
+                                                .get_parent_object())
+
+    def test_initial_converts_kwargs(self):
+        """Establish that `initial` converts kwargs captured from the
+        URL using the converters provided by the router.
+        """
+        mvs = ModelViewSet(kwargs={'foo__pk': '42', 'format': 'json'},
+                           kwarg_converters={'foo__pk': int, 'pk': int})
+        with mock.patch.object(ModelViewSet.mro()[1], 'initial') as m:
+            mvs.initial(self.request)
+            m.assert_called_once_with(self.request)
+        self.assertEqual(mvs.kwargs, {'foo__pk': 42, 'format': 'json'})
+
+    def test_initial_converts_kwargs_invalid(self):
+        """Establish that `initial` raises Http404 if a kwarg captured
+        from the URL can not be converted.
+        """
+        mvs = ModelViewSet(kwargs={'pk': '-' * 36},
+                           kwarg_converters={'pk': uuid.UUID})
+        with self.assertRaises(Http404):
+            mvs.initial(self.request)
+
+    def test_filter_queryset_no_deferrable_fields(self):
+        """Establish that `filter_queryset` leaves the queryset alone if
+        there is nothing to defer.
+        """
+        vs = NormalViewSet(request=self.request, kwargs={},
+                           format_kwarg='format')
+        qs = mock.MagicMock()
+        qs.model = test_models.NormalModel
+        self.assertIs(vs.filter_queryset(qs), qs)
+        self.assertFalse(qs.defer.called)
+
+    @unittest.skipUnless(django_pgfields_installed, NO_DJANGOPG)
+    def test_filter_queryset_deferrable_fields(self):
+        """Establish that `filter_queryset` defers expensive fields that
+        the serializer never reads.
+        """
+        class Serializer(serializers.ModelSerializer):
+            class Meta:
+                model = test_models.PGFieldsModel
+                fields = ('id', 'coords')
+
+        class ViewSet(ModelViewSet):
+            defer_unread_fields = True
+            model = test_models.PGFieldsModel
+            serializer_class = Serializer
+
+        vs = ViewSet(request=self.request, kwargs={}, format_kwarg='format')
+        qs = mock.MagicMock()
+        qs.model = test_models.PGFieldsModel
+        self.assertIs(vs.filter_queryset(qs), qs.defer.return_value)
+        qs.defer.assert_called_once_with('array', 'extra', 'size')
+
+    @unittest.skipUnless(django_pgfields_installed, NO_DJANGOPG)
+    def test_filter_queryset_deferral_opt_in(self):
+        """Establish that `filter_queryset` does not defer any fields
+        unless the viewset opts in.
+        """
+        class Serializer(serializers.ModelSerializer):
+            class Meta:
+                model = test_models.PGFieldsModel
+                fields = ('id', 'coords')
+
+        class ViewSet(ModelViewSet):
+            model = test_models.PGFieldsModel
+            serializer_class = Serializer
+
+        vs = ViewSet(request=self.request, kwargs={}, format_kwarg='format')
+        qs = mock.MagicMock()
+        qs.model = test_models.PGFieldsModel
+        self.assertIs(vs.filter_queryset(qs), qs)
+        self.assertFalse(qs.defer.called)
+
+    @unittest.skipUnless(django_pgfields_installed, NO_DJANGOPG)
+    def test_filter_queryset_raw_json_fields(self):
+        """Establish that `filter_queryset` loads the text of raw JSON
+        fields instead of the fields themselves.
+        """
+        class Serializer(serializers.ModelSerializer):
+            class Meta:
+                model = test_models.PGFieldsModel
+                fields = ('id', 'extra')
+                raw_json_fields = ('extra',)
+
+        class ViewSet(ModelViewSet):
+            defer_unread_fields = True
+            model = test_models.PGFieldsModel
+            serializer_class = Serializer
+
+        vs = ViewSet(request=self.request, kwargs={}, format_kwarg='format')
+        qs = mock.MagicMock()
+        qs.model = test_models.PGFieldsModel
+        with mock.patch('drf_toolbox.viewsets.connections') as connections:
+            quote_name = connections.__getitem__.return_value.ops.quote_name
+            quote_name.side_effect = lambda name: '"%s"' % name
+            answer = vs.filter_queryset(qs)
+        qs.extra.assert_called_once_with(select={
+            'extra_raw_json': '"tests_pgfieldsmodel"."extra"::text',
+        })
+        qs.extra.return_value.defer.assert_called_once_with(
+            'extra', 'array', 'coords', 'size',
+        )
+        self.assertIs(answer, qs.extra.return_value.defer.return_value)
+
+    def test_loading_plan_default_serializer(self):
+        """Establish that the loading plan of a viewset whose serializer
+        class is created on the fly is only worked out once.
+        """
+        class ViewSet(ModelViewSet):
+            model = test_models.NormalModel
+
+        with mock.patch.object(serializers.BaseModelSerializer,
+                               'get_deferrable_fields') as deferrable:
+            deferrable.return_value = []
+            for i in range(0, 5):
+                vs = ViewSet(request=self.request, kwargs={},
+                             format_kwarg='format')
+                plan = vs._get_loading_plan()
+        self.assertEqual(deferrable.call_count, 1)
+        self.assertIs(plan['model'], test_models.NormalModel)
+
     def test_get_serializer(self):
         """Establish that our `get_serializer` method returns a
         correctly-created serializer class.
@@ -163,6 +356,18 @@ class ModelViewSetTests(unittest.TestCase):
         self.assertFalse(serializer.fields['normal'].required)
         self.assertEqual(serializer._initial, {'normal': '42'})
 
+    def test_get_serializer_nested_parent_loaded(self):
+        """Establish that `get_serializer` provides the parent object
+        itself as initial data if it has already been loaded.
+        """
+        nm = test_models.NormalModel(id=42)
+        cvs = ChildViewSet(request=self.request,
+                           kwargs={'normal__pk': 42},
+                           format_kwarg='format')
+        cvs._parent_object = nm
+        serializer = cvs.get_serializer()
+        self.assertEqual(serializer._initial, {'normal': nm})
+
     def test_get_serializer_random_kwarg(self):
         """Establish that our `get_serializer` method correctly ignores
         a keyword argument that it doesn't know what to do with.
@@ -218,3 +423,766 @@ class ModelViewSetTests(unittest.TestCase):
                      format_kwarg='format')
         with self.assertRaises(TypeError):
             serializer = vs.get_serializer()
+
+
+class ChildCountsTests(unittest.TestCase):
+    """A set of tests to establish that the number of objects in child
+    collections is counted with one query per child collection.
+    """
+    class ViewSet(NormalViewSet):
+        children = {'child': ChildViewSet}
+        child_endpoint_counts = True
+
+    def test_get_child_counts(self):
+        """Establish that child collections are counted for every object
+        with a single grouped query.
+        """
+        vs = self.ViewSet(kwargs={})
+        objects = [test_models.NormalModel(id=i) for i in (1, 2, 3)]
+        manager = test_models.ChildModel._default_manager
+        with mock.patch.object(manager, 'all') as all_:
+            queryset = all_.return_value
+            rows = queryset.filter.return_value.order_by.return_value \
+                           .values.return_value.annotate.return_value
+            rows.__iter__.return_value = iter([
+                {'normal': 1, 'count': 4},
+                {'normal': 3, 'count': 2},
+            ])
+            counts = vs.get_child_counts(objects)
+        queryset.filter.assert_called_once_with(normal__in=[1, 2, 3])
+        self.assertEqual(counts, {'child': {1: 4, 2: 0, 3: 2}})
+
+    def test_get_child_counts_no_foreign_key(self):
+        """Establish that child viewsets without a single foreign key to
+        the parent model are not counted.
+        """
+        class ViewSet(self.ViewSet):
+            children = {'related': NormalViewSet}
+
+        vs = ViewSet(kwargs={})
+        objects = [test_models.NormalModel(id=1)]
+        self.assertEqual(vs.get_child_counts(objects), {})
+
+    def test_get_serializer(self):
+        """Establish that the serializer's context includes the child
+        counts for the objects being serialized.
+        """
+        vs = self.ViewSet(request=Request(RequestFactory().get('/foo/')),
+                          kwargs={}, format_kwarg='format')
+        objects = [test_models.NormalModel(id=1)]
+        with mock.patch.object(vs, 'get_child_counts') as get_child_counts:
+            serializer = vs.get_serializer(objects, many=True)
+            get_child_counts.assert_called_once_with(objects)
+        self.assertEqual(serializer.context['child_counts'],
+                         get_child_counts.return_value)
+
+    def test_get_serializer_input(self):
+        """Establish that children are not counted for serializers which
+        validate input.
+        """
+        vs = self.ViewSet(request=Request(RequestFactory().get('/foo/')),
+                          kwargs={}, format_kwarg='format')
+        obj = test_models.NormalModel(id=1)
+        with mock.patch.object(vs, 'get_child_counts') as get_child_counts:
+            serializer = vs.get_serializer(obj, data={'foo': 2},
+                                           partial=True)
+        self.assertFalse(get_child_counts.called)
+        self.assertNotIn('child_counts', serializer.context)
+
+
+class ScopedChildCountsTests(DatabaseTestCase):
+    """A set of tests to establish that child collections are counted as
+    the child viewset would list them, against a database.
+    """
+    models = (test_models.NormalModel, test_models.ChildModel,
+              test_models.GrandchildModel, test_models.RelatedModel)
+
+    class ScopedChildViewSet(ChildViewSet):
+        def get_queryset(self):
+            queryset = super(ScopedChildCountsTests.ScopedChildViewSet,
+                             self).get_queryset()
+            return queryset.filter(id__lte=self.request.META['HTTP_X_MAX'])
+
+    def test_scoped_counts(self):
+        """Establish that children the child viewset would not list for
+        the current request are not counted.
+        """
+        class ViewSet(NormalViewSet):
+            children = {'child': self.ScopedChildViewSet}
+            child_endpoint_counts = True
+
+        normal = test_models.NormalModel.objects.create(foo=1, bar=1, baz=1,
+                                                        bacon=1)
+        for i in range(0, 3):
+            test_models.ChildModel.objects.create(id=i + 1, normal=normal)
+
+        request = Request(RequestFactory().get('/normal/', HTTP_X_MAX='2'))
+        vs = ViewSet(request=request, kwargs={}, format_kwarg=None)
+        self.assertEqual(vs.get_child_counts([normal]),
+                         {'child': {normal.pk: 2}})
+
+
+class ParentObjectTests(DatabaseTestCase):
+    """A set of tests to establish that the objects of a nested viewset
+    share its parent object, against a database.
+    """
+    models = (test_models.NormalModel, test_models.ChildModel,
+              test_models.GrandchildModel, test_models.RelatedModel)
+
+    def setUp(self):
+        super(ParentObjectTests, self).setUp()
+
+        class ParentViewSet(NormalViewSet):
+            base_name = 'normal'
+
+        router = routers.Router()
+        router.register('normal', ParentViewSet)
+        router.register('normal/child', ChildViewSet)
+        self.resolver = RegexURLResolver(r'^/', router.get_urls())
+
+    def _get(self, path):
+        """Perform a GET request to the given path, and return the number
+        of queries it performed.
+        """
+        callback, args, kwargs = self.resolver.resolve(path)
+        request = RequestFactory().get(path, HTTP_ACCEPT='application/json')
+        with queries.QueryCounter() as counter:
+            response = callback(request, *args, **kwargs)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return len(counter)
+
+    def test_query_count_constant(self):
+        """Establish that listing or retrieving the children of a parent
+        performs the same number of queries, however many there are.
+        """
+        counts = []
+        for size in (2, 5):
+            normal = test_models.NormalModel.objects.create(foo=size,
+                bar=size, baz=size, bacon=size,
+            )
+            children = [test_models.ChildModel.objects.create(normal=normal)
+                        for i in range(0, size)]
+            counts.append((
+                self._get('/normal/%d/child/' % normal.pk),
+                self._get('/normal/%d/child/%d/' % (normal.pk,
+                                                   children[0].pk)),
+            ))
+        self.assertEqual(counts, [(2, 2), (2, 2)])
+
+
+class ConditionalGetTests(unittest.TestCase):
+    """A set of tests to establish that viewsets answer conditional GET
+    requests with 304 Not Modified when appropriate.
+    """
+    class ViewSet(ModelViewSet):
+        model = test_models.ModifiedModel
+        conditional_get = True
+
+    def setUp(self):
+        self.obj = test_models.ModifiedModel(id=42, foo=1,
+            modified=datetime(2014, 4, 21, 16, tzinfo=pytz.UTC),
+        )
+
+    def _get_viewset(self, **headers):
+        request = Request(RequestFactory().get('/modified/42/', **headers))
+        return self.ViewSet(request=request, kwargs={'pk': 42},
+                            format_kwarg='format')
+
+    def _retrieve(self, **headers):
+        vs = self._get_viewset(**headers)
+        with mock.patch.object(vs, 'get_object') as get_object:
+            get_object.return_value = self.obj
+            with mock.patch.object(vs, 'get_serializer') as get_serializer:
+                get_serializer.return_value.data = {'foo': 1}
+                response = vs.retrieve(vs.request)
+        return response, get_serializer
+
+    def test_get_modified_field(self):
+        """Establish that the modified field is found automatically, and
+        only if conditional GET is switched on.
+        """
+        vs = self.ViewSet()
+        self.assertEqual(vs._get_modified_field().name, 'modified')
+        vs.conditional_get = False
+        self.assertIsNone(vs._get_modified_field())
+        vs = NormalViewSet(conditional_get=True)
+        self.assertIsNone(vs._get_modified_field())
+
+    def test_retrieve(self):
+        """Establish that a retrieved object carries validators."""
+        response, get_serializer = self._retrieve()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertEqual(response['Last-Modified'],
+                         'Mon, 21 Apr 2014 16:00:00 GMT')
+
+    def test_retrieve_if_none_match(self):
+        """Establish that an object is not serialized if the client
+        already has the current ETag.
+        """
+        etag = self._retrieve()[0]['ETag']
+        response, get_serializer = self._retrieve(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(get_serializer.called)
+
+        # A different ETag means the client's copy is stale.
+        response, get_serializer = self._retrieve(HTTP_IF_NONE_MATCH='"x"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_retrieve_if_modified_since(self):
+        """Establish that an object is not serialized if it has not been
+        modified since the client's copy.
+        """
+        response, get_serializer = self._retrieve(
+            HTTP_IF_MODIFIED_SINCE='Mon, 21 Apr 2014 16:00:00 GMT',
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(get_serializer.called)
+        response, get_serializer = self._retrieve(
+            HTTP_IF_MODIFIED_SINCE='Mon, 21 Apr 2014 15:59:59 GMT',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_list(self):
+        """Establish that a list is not serialized if neither the number
+        of objects nor the most recent modification has changed.
+        """
+        def list_(**headers):
+            vs = self._get_viewset(**headers)
+            with mock.patch.object(vs, 'get_queryset') as get_queryset:
+                get_queryset.return_value.aggregate.return_value = {
+                    'count': 3, 'modified': self.obj.modified,
+                }
+                with mock.patch.object(ModelViewSet.mro()[1], 'list') as m:
+                    m.return_value = Response([])
+                    response = vs.list(vs.request)
+            aggregates = get_queryset.return_value.aggregate.call_args[1]
+            self.assertIsInstance(aggregates['count'], Count)
+            self.assertIsInstance(aggregates['modified'], Max)
+            self.assertEqual(aggregates['modified'].lookup, 'modified')
+            return response, m
+
+        response, super_list = list_()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+        response, super_list = list_(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(super_list.called)
+
+    def test_rendered_content_etag(self):
+        """Establish that responses without other validators get an ETag
+        derived from their rendered content.
+        """
+        class ViewSet(NormalViewSet):
+            conditional_get = True
+
+            def retrieve(self, request, *args, **kwargs):
+                return Response({'foo': 'bar'})
+
+        view = ViewSet.as_view({'get': 'retrieve'})
+        rf = RequestFactory()
+        response = view(rf.get('/normal/42/', HTTP_ACCEPT='application/json'),
+                        pk=42)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = view(rf.get('/normal/42/', HTTP_ACCEPT='application/json',
+                               HTTP_IF_NONE_MATCH=etag), pk=42)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+
+class CountStrategyTests(unittest.TestCase):
+    """A set of tests to establish that paginated list endpoints count
+    their objects according to the viewset's count strategy.
+    """
+    def setUp(self):
+        cache.clear()
+
+    def _get_queryset(self, sql='SELECT 1', params=(42,)):
+        queryset = mock.MagicMock()
+        queryset.db = 'default'
+        queryset.count.return_value = 7
+        compiler = queryset.query.get_compiler.return_value
+        compiler.as_sql.return_value = (sql, params)
+        return queryset
+
+    def _get_viewset(self, count_strategy):
+        vs = NormalViewSet(kwargs={})
+        vs.count_strategy = count_strategy
+        return vs
+
+    def test_exact(self):
+        """Establish that exact counts count the queryset."""
+        vs = self._get_viewset('exact')
+        queryset = self._get_queryset()
+        self.assertEqual(vs.get_count(queryset), 7)
+        queryset.query.get_compiler.assert_called_once_with('default')
+
+    def test_empty(self):
+        """Establish that a query which can match nothing is not
+        counted at all.
+        """
+        vs = self._get_viewset('cached')
+        queryset = self._get_queryset()
+        compiler = queryset.query.get_compiler.return_value
+        compiler.as_sql.side_effect = EmptyResultSet
+        self.assertEqual(vs.get_count(queryset), 0)
+        self.assertFalse(queryset.count.called)
+
+    def test_cached(self):
+        """Establish that cached counts are only counted once for
+        the same query.
+        """
+        vs = self._get_viewset('cached')
+        queryset = self._get_queryset()
+        self.assertEqual(vs.get_count(queryset), 7)
+        self.assertEqual(vs.get_count(queryset), 7)
+        self.assertEqual(queryset.count.call_count, 1)
+
+        # A query with different parameters is counted separately.
+        other_queryset = self._get_queryset(params=(43,))
+        other_queryset.count.return_value = 3
+        self.assertEqual(vs.get_count(other_queryset), 3)
+
+    def test_estimated(self):
+        """Establish that estimated counts come from the query plan on
+        PostgreSQL.
+        """
+        vs = self._get_viewset('estimated')
+        queryset = self._get_queryset()
+        with mock.patch('drf_toolbox.viewsets.connections') as connections:
+            connection = connections.__getitem__.return_value
+            connection.vendor = 'postgresql'
+            cursor = connection.cursor.return_value
+            cursor.fetchone.return_value = (
+                'Seq Scan on normal  (cost=0.00..35.50 rows=2550 width=4)',
+            )
+            self.assertEqual(vs.get_count(queryset), 2550)
+        cursor.execute.assert_called_once_with('EXPLAIN SELECT 1', (42,))
+        self.assertFalse(queryset.count.called)
+
+    def test_estimated_below_threshold(self):
+        """Establish that small estimates are replaced with
+        exact counts.
+        """
+        vs = self._get_viewset('estimated')
+        queryset = self._get_queryset()
+        with mock.patch('drf_toolbox.viewsets.connections') as connections:
+            connection = connections.__getitem__.return_value
+            connection.vendor = 'postgresql'
+            cursor = connection.cursor.return_value
+            cursor.fetchone.return_value = ('Result  (rows=12)',)
+            self.assertEqual(vs.get_count(queryset), 7)
+
+    def test_estimated_unsupported(self):
+        """Establish that estimated counts fall back to exact counts on
+        databases without estimates.
+        """
+        vs = self._get_viewset('estimated')
+        queryset = self._get_queryset()
+        with mock.patch('drf_toolbox.viewsets.connections') as connections:
+            connections.__getitem__.return_value.vendor = 'sqlite'
+            self.assertEqual(vs.get_count(queryset), 7)
+
+    def test_unknown(self):
+        """Establish that an unknown count strategy raises ValueError."""
+        vs = self._get_viewset('guessed')
+        with self.assertRaises(ValueError):
+            vs.get_count(self._get_queryset())
+
+    def test_paginate_queryset(self):
+        """Establish that the paginator obtains its count from `get_count`
+        unless counts are exact.
+        """
+        queryset = test_models.NormalModel.objects.all()
+        for count_strategy in ('exact', 'cached'):
+            vs = self._get_viewset(count_strategy)
+            with mock.patch.object(vs, 'get_count'):
+                with mock.patch.object(ModelViewSet.mro()[1],
+                                       'paginate_queryset') as paginate:
+                    vs.paginate_queryset(queryset)
+                object_list = paginate.call_args[0][0]
+                if count_strategy == 'exact':
+                    self.assertIs(object_list, queryset)
+                    continue
+                self.assertIsInstance(object_list, CountedQuerySet)
+                self.assertIs(object_list.queryset, queryset)
+                self.assertEqual(object_list.count(),
+                                 vs.get_count.return_value)
+                vs.get_count.assert_called_once_with(queryset)
+
+
+class ApproximateCountTests(DatabaseTestCase):
+    """A set of tests to establish that approximate counts are reported,
+    but do not determine which pages exist, against a database.
+    """
+    models = (test_models.NormalModel, test_models.ChildModel,
+              test_models.GrandchildModel, test_models.RelatedModel)
+
+    class ViewSet(ModelViewSet):
+        model = test_models.NormalModel
+        paginate_by = 2
+        count_strategy = 'cached'
+
+    def setUp(self):
+        super(ApproximateCountTests, self).setUp()
+        for i in range(0, 5):
+            test_models.NormalModel.objects.create(foo=i, bar=i, baz=i,
+                                                   bacon=i)
+
+    def _list(self, page, count):
+        request = Request(RequestFactory().get('/normal/?page=%d' % page))
+        vs = self.ViewSet(request=request, kwargs={}, format_kwarg=None)
+        with mock.patch.object(vs, 'get_count', return_value=count):
+            return vs.list(request).data
+
+    def test_estimate_too_low(self):
+        """Establish that pages beyond those the count allows for are
+        still served, and linked to.
+        """
+        data = self._list(2, count=1)
+        self.assertEqual([row['foo'] for row in data['results']], [2, 3])
+        self.assertIsNotNone(data['next'])
+        self.assertEqual(data['count'], 5)
+        data = self._list(3, count=1)
+        self.assertEqual([row['foo'] for row in data['results']], [4])
+        self.assertIsNone(data['next'])
+        self.assertEqual(data['count'], 5)
+
+    def test_estimate_too_high(self):
+        """Establish that the last page does not link to a next page, and
+        that pages beyond it are not found.
+        """
+        data = self._list(1, count=50)
+        self.assertEqual(data['count'], 50)
+        data = self._list(3, count=50)
+        self.assertEqual([row['foo'] for row in data['results']], [4])
+        self.assertIsNone(data['next'])
+        self.assertEqual(data['count'], 5)
+        with self.assertRaises(Http404):
+            self._list(4, count=50)
+
+
+class BulkModelMixinTests(unittest.TestCase):
+    """A set of tests to establish that the bulk update and delete
+    base action works as expected.
+    """
+    class BulkViewSet(BulkModelMixin, ModelViewSet):
+        model = test_models.NormalModel
+
+    def _get_viewset(self, method, data, kwargs=None):
+        request = getattr(RequestFactory(), method)('/normal/bulk/',
+            data=json.dumps(data),
+            content_type='application/json',
+        )
+        return self.BulkViewSet(
+            request=Request(request, parsers=[JSONParser()]),
+            kwargs=kwargs or {},
+            format_kwarg='format',
+        )
+
+    def setUp(self):
+        self.qs = mock.MagicMock()
+        self.qs.filter.return_value.update.return_value = 2
+        self.qs.filter.return_value.count.return_value = 3
+        patchers = (
+            mock.patch.object(self.BulkViewSet, 'get_queryset',
+                              return_value=self.qs),
+            mock.patch('drf_toolbox.viewsets.transaction'),
+        )
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_bulk_update_by_pk(self):
+        """Establish that a bulk update keyed by primary key groups
+        objects receiving identical changes into one UPDATE.
+        """
+        vs = self._get_viewset('patch', {
+            '1': {'foo': 3},
+            '2': {'foo': 3},
+            '3': {'bar': '4'},
+        })
+        response = vs.bulk(vs.request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'updated': 4})
+
+        # Establish that we got exactly two UPDATE statements.
+        updates = {}
+        for filter_call, update_call in zip(
+                    self.qs.filter.call_args_list,
+                    self.qs.filter.return_value.update.call_args_list):
+            pks = tuple(sorted(filter_call[1]['pk__in']))
+            updates[pks] = update_call[1]
+        self.assertEqual(updates, {
+            ('1', '2'): {'foo': 3},
+            ('3',): {'bar': 4},
+        })
+
+    def test_bulk_update_by_filter(self):
+        """Establish that a bulk update using a filter runs a single
+        UPDATE against the filtered queryset.
+        """
+        vs = self._get_viewset('patch', {
+            'filter': {'bar__gt': 4},
+            'update': {'foo': 1},
+        })
+        response = vs.bulk(vs.request)
+        self.assertEqual(response.data, {'updated': 2})
+        self.qs.filter.assert_called_once_with(bar__gt=4)
+        self.qs.filter.return_value.update.assert_called_once_with(foo=1)
+
+    def test_bulk_update_unknown_filter(self):
+        """Establish that a bulk update filtering on something that is
+        not a serializer field is rejected.
+        """
+        vs = self._get_viewset('patch', {
+            'filter': {'bogus__gt': 4},
+            'update': {'foo': 1},
+        })
+        response = vs.bulk(vs.request)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.qs.filter.called)
+
+    def test_bulk_update_invalid_value(self):
+        """Establish that a bulk update with an invalid value is rejected
+        before anything is written.
+        """
+        vs = self._get_viewset('patch', {'1': {'foo': 'bar'}})
+        response = vs.bulk(vs.request)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('foo', response.data)
+        self.assertFalse(self.qs.filter.return_value.update.called)
+
+    def test_bulk_update_nested_field(self):
+        """Establish that the field corresponding to a parent viewset
+        can not be changed in bulk.
+        """
+        class ViewSet(BulkModelMixin, ModelViewSet):
+            model = test_models.ChildModel
+
+        request = RequestFactory().patch('/normal/42/child/bulk/',
+            data=json.dumps({'1': {'normal': 43}}),
+            content_type='application/json',
+        )
+        vs = ViewSet(request=Request(request, parsers=[JSONParser()]),
+                     kwargs={'normal__pk': '42'}, format_kwarg='format')
+        with mock.patch.object(ViewSet, 'get_queryset') as get_queryset:
+            response = vs.bulk(vs.request)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('normal', response.data)
+
+    def test_bulk_destroy_by_pk(self):
+        """Establish that a bulk delete of a list of primary keys runs
+        a single delete against the filtered queryset.
+        """
+        vs = self._get_viewset('delete', [1, 2, 3])
+        response = vs.bulk(vs.request)
+        self.assertEqual(response.data, {'deleted': 3})
+        self.qs.filter.assert_called_once_with(pk__in=[1, 2, 3])
+        self.qs.filter.return_value.delete.assert_called_once_with()
+
+    def test_bulk_destroy_by_filter(self):
+        """Establish that a bulk delete using a filter works as expected."""
+        vs = self._get_viewset('delete', {'filter': {'foo': 1}})
+        response = vs.bulk(vs.request)
+        self.assertEqual(response.data, {'deleted': 3})
+        self.qs.filter.assert_called_once_with(foo=1)
+
+    def test_bulk_destroy_bad_payload(self):
+        """Establish that a bulk delete with a payload that is neither
+        a list nor a filter is rejected.
+        """
+        vs = self._get_viewset('delete', {'foo': 1})
+        response = vs.bulk(vs.request)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.qs.filter.called)
+
+
+class BulkFilterTests(DatabaseTestCase):
+    """A set of tests to establish that bulk filters are restricted to
+    the model fields that the serializer exposes, against a database.
+    """
+    models = (test_models.NormalModel, test_models.ChildModel,
+              test_models.GrandchildModel, test_models.RelatedModel)
+
+    class BulkSerializer(serializers.ModelSerializer):
+        renamed = serializers.IntegerField(source='bar')
+
+        class Meta:
+            model = test_models.NormalModel
+            fields = ('id', 'foo', 'renamed', 'bacon')
+
+    class BulkViewSet(BulkModelMixin, ModelViewSet):
+        model = test_models.NormalModel
+
+    class ChildBulkViewSet(BulkModelMixin, ModelViewSet):
+        model = test_models.ChildModel
+
+    def setUp(self):
+        super(BulkFilterTests, self).setUp()
+        self.BulkViewSet.serializer_class = self.BulkSerializer
+        self.normals = [
+            test_models.NormalModel.objects.create(foo=0, bar=i, baz=i,
+                                                   bacon=i)
+            for i in range(0, 4)
+        ]
+        test_models.ChildModel.objects.create(normal=self.normals[0])
+
+    def _bulk(self, viewset, method, data):
+        request = getattr(RequestFactory(), method)('/bulk/',
+            data=json.dumps(data),
+            content_type='application/json',
+        )
+        vs = viewset(request=Request(request, parsers=[JSONParser()]),
+                     kwargs={}, format_kwarg='format')
+        return vs.bulk(vs.request)
+
+    def _foos(self):
+        return list(test_models.NormalModel.objects.order_by('bar')
+                                           .values_list('foo', flat=True))
+
+    def test_update_by_source(self):
+        """Establish that filter keys are mapped to the source of the
+        serializer field.
+        """
+        response = self._bulk(self.BulkViewSet, 'patch', {
+            'filter': {'renamed__gte': 2},
+            'update': {'foo': 5},
+        })
+        self.assertEqual(response.data, {'updated': 2})
+        self.assertEqual(self._foos(), [0, 0, 5, 5])
+
+    def test_lookups(self):
+        response = self._bulk(self.BulkViewSet, 'delete', {
+            'filter': {'bacon__in': [0, 1], 'renamed__lt': 1},
+        })
+        self.assertEqual(response.data, {'deleted': 1})
+        self.assertEqual(test_models.NormalModel.objects.count(), 3)
+
+    def test_unexposed_field(self):
+        """Establish that model fields which the serializer does not
+        expose, or exposes under another name, can not be filtered on.
+        """
+        for key in ('bar', 'baz', 'bar__gt'):
+            response = self._bulk(self.BulkViewSet, 'patch', {
+                'filter': {key: 1},
+                'update': {'foo': 5},
+            })
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._foos(), [0, 0, 0, 0])
+
+    def test_relation_traversal(self):
+        """Establish that filters may not traverse relations, or use
+        lookups other than the permitted ones.
+        """
+        for key in ('normal__bacon', 'normal__bacon__gt', 'normal__regex'):
+            response = self._bulk(self.ChildBulkViewSet, 'delete', {
+                'filter': {key: 0},
+            })
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(test_models.ChildModel.objects.count(), 1)
+
+    def test_empty_filter(self):
+        """Establish that an empty filter, which would otherwise affect
+        every object, is rejected.
+        """
+        response = self._bulk(self.BulkViewSet, 'patch', {
+            'filter': {},
+            'update': {'foo': 5},
+        })
+        self.assertEqual(response.status_code, 400)
+        response = self._bulk(self.BulkViewSet, 'delete', {'filter': {}})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._foos(), [0, 0, 0, 0])
+
+
+class QueryBudgetTests(unittest.TestCase):
+    """A set of tests to establish that query budgets are applied to the
+    appropriate actions.
+    """
+    def setUp(self):
+        class ViewSet(NormalViewSet):
+            query_budgets = {'list': 2}
+        self.viewset = ViewSet
+        self.request = RequestFactory().get('/normal/')
+
+    def _dispatch(self, action):
+        view = self.viewset.as_view({'get': action})
+        with mock.patch('rest_framework.views.APIView.dispatch') as d:
+            with mock.patch('drf_toolbox.queries.enforce_budget') as e:
+                d.return_value = 'response'
+                self.assertEqual(view(self.request), 'response')
+                return e
+
+    def test_budget(self):
+        """Establish that an action with a budget has its queries
+        counted and checked.
+        """
+        enforce_budget = self._dispatch('list')
+        self.assertEqual(enforce_budget.call_count, 1)
+        args, kwargs = enforce_budget.call_args
+        self.assertEqual(args[1], 2)
+        self.assertEqual(kwargs, {'mode': None, 'name': 'ViewSet.list'})
+
+    def test_no_budget(self):
+        """Establish that an action without a budget is left alone."""
+        self.assertFalse(self._dispatch('retrieve').called)
+
+
+class SerializationProfileTests(unittest.TestCase):
+    """A set of tests to establish that viewsets report serialization
+    profiles when asked.
+    """
+    def test_header(self):
+        class ViewSet(NormalViewSet):
+            profile_serialization = True
+        view = ViewSet.as_view({'get': 'list'})
+        with mock.patch('rest_framework.views.APIView.dispatch') as d:
+            d.return_value = HttpResponse('')
+            with mock.patch.object(profiling.SerializationProfile,
+                                   'get_header') as get_header:
+                get_header.return_value = 'bacon;calls=1;dur=0.1;queries=0'
+                response = view(RequestFactory().get('/normal/'))
+        self.assertEqual(response[profiling.HEADER],
+                         'bacon;calls=1;dur=0.1;queries=0')
+
+    def test_no_header(self):
+        view = NormalViewSet.as_view({'get': 'list'})
+        with mock.patch('rest_framework.views.APIView.dispatch') as d:
+            d.return_value = HttpResponse('')
+            response = view(RequestFactory().get('/normal/'))
+        self.assertFalse(response.has_header(profiling.HEADER))
+
+
+class SlowRequestTests(unittest.TestCase):
+    """A set of tests to establish that sampled requests are watched for
+    slowness.
+    """
+    def _dispatch(self, sampled):
+        class ViewSet(NormalViewSet):
+            slow_request_threshold = 0.5
+        view = ViewSet.as_view({'get': 'list'})
+        with mock.patch('rest_framework.views.APIView.dispatch') as d:
+            d.return_value = HttpResponse('')
+            with mock.patch('drf_toolbox.slowlog.sample') as sample:
+                sample.return_value = sampled
+                with mock.patch('drf_toolbox.slowlog.watch') as watch:
+                    response = view(RequestFactory().get('/normal/'))
+        sample.assert_called_once_with(0.5)
+        self.assertFalse(response.has_header('Server-Timing'))
+        return watch
+
+    def test_sampled(self):
+        watch = self._dispatch(True)
+        self.assertEqual(watch.call_count, 1)
+        view, request, response, threshold = watch.call_args[0]
+        self.assertEqual(view.timings.name, 'ViewSet.list')
+        self.assertEqual(list(view.timings.durations.keys()),
+                         ['queryset', 'serialize'])
+        self.assertEqual(threshold, 0.5)
+
+    def test_not_sampled(self):
+        self.assertFalse(self._dispatch(False).called)
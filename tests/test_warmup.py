@@ -0,0 +1,88 @@
+from __future__ import absolute_import, unicode_literals
+from django.conf.urls import include, patterns, url
+from django.core import urlresolvers
+from drf_toolbox import routers, warmup
+from drf_toolbox.serializers.fields import related
+from rest_framework import viewsets as drf_viewsets
+from tests import views
+from tests.compat import mock
+import sys
+import unittest
+
+
+class EmptyURLConf(object):
+    urlpatterns = []
+
+
+class WarmUpTests(unittest.TestCase):
+    """A set of tests to establish that warming up builds what the first
+    requests would otherwise have to.
+    """
+    def setUp(self):
+        self.router = routers.Router()
+        self.router.register('normal', views.NormalViewSet)
+        self.router.register('normal/child', views.ChildViewSet)
+        self.router.register('normal/child/grandchild',
+                             views.GrandchildViewSet)
+
+    def test_viewsets(self):
+        """Establish that every viewset, including nested viewsets, is
+        warmed up, and that related serializer classes are created.
+        """
+        with mock.patch.dict(related.RelatedField._serializer_classes,
+                             clear=True):
+            answer = warmup.warm_up(routers=[self.router],
+                                    urlconf=EmptyURLConf)
+            self.assertEqual(answer, [views.NormalViewSet,
+                                      views.ChildViewSet,
+                                      views.GrandchildViewSet])
+            models = set([key[0] for key in
+                          related.RelatedField._serializer_classes])
+        self.assertIn(views.NormalViewSet.model, models)
+        self.assertIn(views.ChildViewSet.model, models)
+
+    def test_lazy_viewsets(self):
+        """Establish that viewsets registered lazily are imported."""
+        sys.modules.pop('tests.lazy_views', None)
+        router = routers.Router(lazy=True)
+        router.register('normal', 'tests.lazy_views.NormalViewSet',
+                        base_name='normal', lookup_type='int')
+        answer = warmup.warm_up(routers=[router], urlconf=EmptyURLConf)
+        from tests import lazy_views
+        self.assertEqual(answer, [lazy_views.NormalViewSet])
+
+    def test_skip_non_toolbox_viewsets(self):
+        class ViewSet(drf_viewsets.ViewSet):
+            pass
+        router = routers.Router()
+        router.register('foo', ViewSet, base_name='foo')
+        self.assertEqual(warmup.warm_up(routers=[router],
+                                        urlconf=EmptyURLConf), [])
+
+    def test_failure(self):
+        """Establish that a viewset which cannot be warmed up is logged
+        and skipped.
+        """
+        class ViewSet(views.NormalViewSet):
+            def get_serializer_class(self):
+                return self.request.user.serializer_class
+        router = routers.Router()
+        router.register('normal', ViewSet)
+        with mock.patch.object(warmup.logger, 'warning') as warning:
+            self.assertEqual(warmup.warm_up(routers=[router],
+                                            urlconf=EmptyURLConf), [])
+        self.assertEqual(warning.call_count, 1)
+
+    def test_urlconf(self):
+        """Establish that the URL patterns of the given URLconf are
+        compiled and indexed.
+        """
+        class urlconf(object):
+            urlpatterns = patterns('',
+                url(r'^api/', include(self.router.urls)),
+            )
+        warmup.warm_up(routers=[], urlconf=urlconf)
+        resolver = urlresolvers.get_resolver(urlconf)
+        self.assertTrue(resolver._populated)
+        for pattern in resolver.url_patterns[0].url_patterns:
+            self.assertTrue(pattern._regex_dict)